@@ -1,15 +1,41 @@
 from dependency_injector import containers, providers
-from app.db import Database
-from app.services.book import BookService
-from app.services.author import AuthorService
-from app.services.library import LibraryService
-from app.services.rental import RentalService
-from app.services.user import UserService
-from app.repositories.book import BookRepository
-from app.repositories.author import AuthorRepository
-from app.repositories.library import LibraryRepository
-from app.repositories.rental import RentalRepository
-from app.repositories.user import UserRepository
+from app.db import Database, split_urls
+from app.metrics import Metrics
+from app.single_flight import SingleFlight
+from app.services.book import BookService, AsyncBookService
+from app.services.author import AuthorService, AsyncAuthorService
+from app.services.library import LibraryService, AsyncLibraryService
+from app.services.rental import RentalService, AsyncRentalService
+from app.services.user import UserService, AsyncUserService
+from app.services.auth import AuthService
+from app.services.search import AsyncSearchService
+from app.services.overdue import OverdueScanner
+from app.services.counters import CounterReconciler
+from app.services.archive import RentalArchiver
+from app.repositories.book import (
+    BookRepository,
+    AsyncBookRepository,
+    CachedBookRepository,
+)
+from app.repositories.author import (
+    AuthorRepository,
+    AsyncAuthorRepository,
+    CachedAuthorRepository,
+)
+from app.repositories.library import (
+    LibraryRepository,
+    AsyncLibraryRepository,
+    CachedLibraryRepository,
+)
+from app.repositories.rental import RentalRepository, AsyncRentalRepository
+from app.repositories.user import UserRepository, AsyncUserRepository
+from app.repositories.search import AsyncSearchRepository
+from app.repositories.overdue import AsyncOverdueRepository
+from app.repositories.counters import AsyncCounterRepository
+from app.repositories.archive import AsyncRentalArchiveRepository
+from app.repositories.password_managment import PasswordHasher
+from app.repositories.cache import EntityCache
+from app.repositories.versions import TableVersions
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -19,7 +45,80 @@ class Container(containers.DeclarativeContainer):
     wiring_config = containers.WiringConfiguration(modules=["app.routes"])
     config = providers.Configuration()
     config.db.url.from_env("DATABASE_URL")
-    db = providers.Singleton(Database, db_url=config.db.url)
+    config.dev_mode.from_env("DEV_MODE", as_=int, default=0)
+    config.password.workers.from_env("PASSWORD_WORKERS", as_=int, default=2)
+    config.password.max_concurrency.from_env(
+        "PASSWORD_MAX_CONCURRENCY", as_=int, default=0
+    )
+    config.auth.secret_key.from_env("SECRET_KEY")
+    config.auth.algorithm.from_env("ALGORITHM", default="HS256")
+    config.auth.cache_size.from_env("AUTH_CACHE_SIZE", as_=int, default=1024)
+    config.cache.max_size.from_env("CACHE_MAX_SIZE", as_=int, default=4096)
+    config.cache.ttl.from_env("CACHE_TTL", as_=float, default=60.0)
+    config.overdue.interval.from_env("OVERDUE_SCAN_INTERVAL", as_=float, default=300.0)
+    config.overdue.batch_size.from_env("OVERDUE_SCAN_BATCH", as_=int, default=500)
+    config.counters.interval.from_env(
+        "COUNTS_RECONCILE_INTERVAL", as_=float, default=3600.0
+    )
+    config.counters.batch_size.from_env("COUNTS_RECONCILE_BATCH", as_=int, default=1000)
+    config.archive.interval.from_env(
+        "RENTAL_ARCHIVE_INTERVAL", as_=float, default=3600.0
+    )
+    config.archive.after_days.from_env(
+        "RENTAL_ARCHIVE_AFTER_DAYS", as_=int, default=365
+    )
+    config.archive.batch_size.from_env("RENTAL_ARCHIVE_BATCH", as_=int, default=1000)
+    config.db.sqlite.journal_mode.from_env("SQLITE_JOURNAL_MODE", default="wal")
+    config.db.sqlite.synchronous.from_env("SQLITE_SYNCHRONOUS", default="normal")
+    config.db.sqlite.cache_size.from_env("SQLITE_CACHE_SIZE", as_=int, default=-64_000)
+    config.db.sqlite.mmap_size.from_env(
+        "SQLITE_MMAP_SIZE", as_=int, default=268_435_456
+    )
+    config.db.sqlite.busy_timeout.from_env(
+        "SQLITE_BUSY_TIMEOUT", as_=int, default=5_000
+    )
+    config.db.pool.pool_size.from_env("DB_POOL_SIZE", as_=int, default=20)
+    config.db.pool.max_overflow.from_env("DB_MAX_OVERFLOW", as_=int, default=10)
+    config.db.pool.pool_pre_ping.from_env("DB_POOL_PRE_PING", as_=int, default=1)
+    config.db.pool.pool_recycle.from_env("DB_POOL_RECYCLE", as_=int, default=1_800)
+    config.db.pool.pool_timeout.from_env("DB_POOL_TIMEOUT", as_=float, default=30.0)
+    config.db.replica_urls.from_env("DATABASE_REPLICA_URLS", as_=split_urls, default="")
+    config.db.replica_selection.from_env(
+        "DATABASE_REPLICA_SELECTION", default="round_robin"
+    )
+    config.db.read_your_writes.from_env("READ_YOUR_WRITES", as_=int, default=1)
+    config.db.unit_of_work.from_env("UNIT_OF_WORK", as_=int, default=1)
+    db = providers.Singleton(
+        Database,
+        db_url=config.db.url,
+        pragmas=config.db.sqlite,
+        pool=config.db.pool,
+        replica_urls=config.db.replica_urls,
+        replica_selection=config.db.replica_selection,
+        read_your_writes=config.db.read_your_writes,
+    )
+
+    metrics = providers.Singleton(Metrics)
+    single_flight = providers.Singleton(SingleFlight)
+
+    entity_cache = providers.Singleton(
+        EntityCache, max_size=config.cache.max_size, ttl=config.cache.ttl
+    )
+
+    table_versions = providers.Singleton(TableVersions, ttl=config.cache.ttl)
+
+    auth_service = providers.Singleton(
+        AuthService,
+        secret_key=config.auth.secret_key,
+        algorithm=config.auth.algorithm,
+        cache_size=config.auth.cache_size,
+    )
+
+    password_hasher = providers.Singleton(
+        PasswordHasher,
+        max_workers=config.password.workers,
+        max_concurrency=config.password.max_concurrency,
+    )
 
     book_repository = providers.Factory(
         BookRepository, session_factory=db.provided.session
@@ -65,3 +164,122 @@ class Container(containers.DeclarativeContainer):
         UserService,
         user_repository=user_repository,
     )
+
+    async_book_repository = providers.Factory(
+        AsyncBookRepository,
+        session_factory=db.provided.async_session,
+        read_session_factory=db.provided.async_read_session,
+        versions=table_versions,
+    )
+
+    cached_book_repository = providers.Factory(
+        CachedBookRepository, repository=async_book_repository, cache=entity_cache
+    )
+
+    async_book_service = providers.Factory(
+        AsyncBookService,
+        book_repository=cached_book_repository,
+    )
+
+    async_author_repository = providers.Factory(
+        AsyncAuthorRepository,
+        session_factory=db.provided.async_session,
+        read_session_factory=db.provided.async_read_session,
+        versions=table_versions,
+    )
+
+    cached_author_repository = providers.Factory(
+        CachedAuthorRepository, repository=async_author_repository, cache=entity_cache
+    )
+
+    async_author_service = providers.Factory(
+        AsyncAuthorService,
+        author_repository=cached_author_repository,
+    )
+
+    async_library_repository = providers.Factory(
+        AsyncLibraryRepository,
+        session_factory=db.provided.async_session,
+        read_session_factory=db.provided.async_read_session,
+        versions=table_versions,
+    )
+
+    cached_library_repository = providers.Factory(
+        CachedLibraryRepository, repository=async_library_repository, cache=entity_cache
+    )
+
+    async_library_service = providers.Factory(
+        AsyncLibraryService,
+        library_repository=cached_library_repository,
+    )
+
+    async_rental_repository = providers.Factory(
+        AsyncRentalRepository,
+        session_factory=db.provided.async_session,
+        read_session_factory=db.provided.async_read_session,
+        versions=table_versions,
+    )
+
+    async_rental_service = providers.Factory(
+        AsyncRentalService,
+        rental_repository=async_rental_repository,
+    )
+
+    async_user_repository = providers.Factory(
+        AsyncUserRepository,
+        session_factory=db.provided.async_session,
+        read_session_factory=db.provided.async_read_session,
+        password_hasher=password_hasher,
+    )
+
+    async_user_service = providers.Factory(
+        AsyncUserService,
+        user_repository=async_user_repository,
+    )
+
+    async_search_repository = providers.Factory(
+        AsyncSearchRepository, session_factory=db.provided.async_session
+    )
+
+    async_search_service = providers.Factory(
+        AsyncSearchService,
+        search_repository=async_search_repository,
+    )
+
+    async_overdue_repository = providers.Factory(
+        AsyncOverdueRepository, session_factory=db.provided.async_session
+    )
+
+    overdue_scanner = providers.Singleton(
+        OverdueScanner,
+        overdue_repository=async_overdue_repository,
+        interval=config.overdue.interval,
+        batch_size=config.overdue.batch_size,
+    )
+
+    async_counter_repository = providers.Factory(
+        AsyncCounterRepository,
+        session_factory=db.provided.async_session,
+        versions=table_versions,
+    )
+
+    counter_reconciler = providers.Singleton(
+        CounterReconciler,
+        counter_repository=async_counter_repository,
+        interval=config.counters.interval,
+        batch_size=config.counters.batch_size,
+    )
+
+    async_rental_archive_repository = providers.Factory(
+        AsyncRentalArchiveRepository,
+        session_factory=db.provided.async_session,
+        versions=table_versions,
+    )
+
+    rental_archiver = providers.Singleton(
+        RentalArchiver,
+        archive_repository=async_rental_archive_repository,
+        interval=config.archive.interval,
+        after_days=config.archive.after_days,
+        batch_size=config.archive.batch_size,
+    )
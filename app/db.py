@@ -1,15 +1,142 @@
-from typing import Callable
-from contextlib import contextmanager, AbstractContextManager
-from sqlalchemy import create_engine, orm
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable
+from contextlib import (
+    contextmanager,
+    asynccontextmanager,
+    AbstractContextManager,
+)
+from sqlalchemy import create_engine, event, orm
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.query_budget import QueryBudget
 
 Base = declarative_base()
 
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+# Applied to every new SQLite connection. WAL lets readers run alongside a
+# writer; synchronous=normal is durable across crashes of the app in WAL mode.
+SQLITE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "cache_size": -64_000,
+    "mmap_size": 268_435_456,
+    "busy_timeout": 5_000,
+}
+
+POOL_OPTIONS = {
+    "pool_size": 20,
+    "max_overflow": 10,
+    "pool_pre_ping": True,
+    "pool_recycle": 1_800,
+    "pool_timeout": 30.0,
+}
+
+REPLICA_SELECTION = ("round_robin", "least_busy")
+
+# Set once the current request (task) has committed on the primary; its
+# later reads skip the replicas so they see their own writes.
+_wrote: ContextVar[bool] = ContextVar("wrote_to_primary", default=False)
+_unit_of_work: ContextVar[AsyncSession | None] = ContextVar(
+    "unit_of_work", default=None
+)
+
+
+def engine_options(db_url: str, pool: dict) -> dict:
+    if not pool:
+        return {}
+    url = make_url(db_url)
+    options = {key: pool[key] for key in POOL_OPTIONS if pool.get(key) is not None}
+    if url.get_backend_name() != "sqlite":
+        return options
+    if url.database in (None, "", ":memory:"):
+        return {}
+    # SQLAlchemy 1.4 gives SQLite files a NullPool. Reconnecting for every
+    # session reopens the WAL index and reruns the pragmas, so pool them too.
+    if url.get_driver_name() == "aiosqlite":
+        return {**options, "poolclass": AsyncAdaptedQueuePool}
+    return {
+        **options,
+        "poolclass": QueuePool,
+        "connect_args": {"check_same_thread": False},
+    }
+
+
+def apply_pragmas(engine: Engine, pragmas: dict) -> None:
+    if engine.dialect.name != "sqlite" or not pragmas:
+        return
+    statements = [f"PRAGMA {name} = {value}" for name, value in pragmas.items()]
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+class PrimarySession(Session):
+    def commit(self) -> None:
+        # Inside a unit of work the repositories' commits only flush; the
+        # unit of work commits once at its end.
+        if self.info.get("unit_of_work"):
+            self.flush()
+            self.info["wrote"] = True
+            return
+        super().commit()
+
+
+@event.listens_for(PrimarySession, "after_commit")
+def mark_committed(session: Session) -> None:
+    session.info["wrote"] = True
+
+
+def after_unit_of_work(callback: Callable[[], None]) -> None:
+    # Outside a unit of work the caller has already committed, so there is
+    # nothing left to wait for.
+    session = _unit_of_work.get()
+    if session is not None and session.info.get("unit_of_work"):
+        session.info.setdefault("after_commit", []).append(callback)
+
+
+def split_urls(value: str) -> list[str]:
+    return [url.strip() for url in value.split(",") if url.strip()]
+
+
+def to_async_url(db_url: str) -> str:
+    url = make_url(db_url)
+    if url.get_driver_name() in ("aiosqlite", "asyncpg"):
+        return url.render_as_string(hide_password=False)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}'")
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url.render_as_string(hide_password=False)
+
 
 class Database:
-    def __init__(self, db_url: str) -> None:
-        self._engine = create_engine(db_url)
+    def __init__(
+        self,
+        db_url: str,
+        async_db_url: str | None = None,
+        pragmas: dict | None = None,
+        pool: dict | None = None,
+        replica_urls: list[str] | None = None,
+        replica_selection: str = "round_robin",
+        read_your_writes: bool = True,
+    ) -> None:
+        if replica_selection not in REPLICA_SELECTION:
+            raise ValueError(f"Unknown replica selection '{replica_selection}'")
+        pragmas = SQLITE_PRAGMAS if pragmas is None else pragmas
+        pool = POOL_OPTIONS if pool is None else pool
+        self._engine = create_engine(db_url, **engine_options(db_url, pool))
         self._session_factory = orm.scoped_session(
             orm.sessionmaker(
                 autocommit=False,
@@ -17,10 +144,59 @@ class Database:
                 bind=self._engine,
             ),
         )
+        async_db_url = async_db_url or to_async_url(db_url)
+        self._async_engine = create_async_engine(
+            async_db_url, **engine_options(async_db_url, pool)
+        )
+        self._replica_engines = [
+            create_async_engine(url, **engine_options(url, pool))
+            for url in map(to_async_url, replica_urls or ())
+        ]
+        for engine in self.engines:
+            apply_pragmas(engine, pragmas)
+        self._async_session_factory = orm.sessionmaker(
+            autoflush=False,
+            expire_on_commit=False,
+            bind=self._async_engine,
+            class_=AsyncSession,
+            sync_session_class=PrimarySession,
+        )
+        self._replica_session_factories = [
+            orm.sessionmaker(
+                autoflush=False,
+                expire_on_commit=False,
+                bind=engine,
+                class_=AsyncSession,
+            )
+            for engine in self._replica_engines
+        ]
+        self._replica_selection = replica_selection
+        self._replica_in_use = [0] * len(self._replica_engines)
+        self._next_replica = 0
+        self.read_your_writes = read_your_writes
+        self.query_budget = QueryBudget(self.engines)
+
+    @property
+    def replicas(self) -> int:
+        return len(self._replica_engines)
+
+    @property
+    def engines(self) -> tuple[Engine, ...]:
+        return (
+            self._engine,
+            self._async_engine.sync_engine,
+            *(engine.sync_engine for engine in self._replica_engines),
+        )
 
     def create_database(self) -> None:
         Base.metadata.create_all(self._engine)
 
+    async def dispose(self) -> None:
+        self._engine.dispose()
+        await self._async_engine.dispose()
+        for engine in self._replica_engines:
+            await engine.dispose()
+
     @contextmanager
     def session(self) -> Callable[..., AbstractContextManager[Session]]:
         session: Session = self._session_factory()
@@ -31,3 +207,126 @@ class Database:
             raise
         finally:
             session.close()
+
+    @asynccontextmanager
+    async def async_session(self) -> AsyncIterator[AsyncSession]:
+        shared = _unit_of_work.get()
+        if shared is not None and shared.info.get("unit_of_work"):
+            try:
+                yield shared
+            finally:
+                if self.read_your_writes and shared.info.get("wrote"):
+                    _wrote.set(True)
+            return
+        session: AsyncSession = self._async_session_factory()
+        try:
+            yield session
+        except Exception:
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+            if self.read_your_writes and session.info.get("wrote"):
+                _wrote.set(True)
+
+    @asynccontextmanager
+    async def unit_of_work(self) -> AsyncIterator[AsyncSession]:
+        # One session, and so one pooled connection, for everything the
+        # enclosed code does through async_session. Joins an open one.
+        shared = _unit_of_work.get()
+        if shared is not None and shared.info.get("unit_of_work"):
+            yield shared
+            return
+        session: AsyncSession = self._async_session_factory()
+        session.info["unit_of_work"] = True
+        token = _unit_of_work.set(session)
+        try:
+            yield session
+        except Exception:
+            await self.end_unit_of_work(session, commit=False)
+            raise
+        else:
+            await self.end_unit_of_work(session, commit=True)
+        finally:
+            _unit_of_work.reset(token)
+            await session.close()
+
+    async def end_unit_of_work(self, session: AsyncSession, commit: bool) -> None:
+        if not session.info.pop("unit_of_work", False):
+            return
+        callbacks = session.info.pop("after_commit", [])
+        if not commit:
+            await session.rollback()
+            return
+        await session.commit()
+        for callback in callbacks:
+            callback()
+
+    @asynccontextmanager
+    async def async_read_session(self) -> AsyncIterator[AsyncSession]:
+        if not self._replica_engines or _wrote.get():
+            async with self.async_session() as session:
+                yield session
+            return
+        replica = self._pick_replica()
+        session: AsyncSession = self._replica_session_factories[replica]()
+        self._replica_in_use[replica] += 1
+        try:
+            yield session
+        finally:
+            self._replica_in_use[replica] -= 1
+            await session.close()
+
+    def _pick_replica(self) -> int:
+        count = len(self._replica_engines)
+        start = self._next_replica
+        self._next_replica = (start + 1) % count
+        if self._replica_selection == "least_busy":
+            return min(
+                range(count),
+                key=lambda i: (self._replica_in_use[i], (i - start) % count),
+            )
+        return start
+
+    def replica_stats(self) -> list[dict]:
+        return [
+            {"url": engine.url.render_as_string(), "in_use": in_use}
+            for engine, in_use in zip(self._replica_engines, self._replica_in_use)
+        ]
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _wrote.set(False)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _wrote.reset(token)
+
+
+class UnitOfWorkMiddleware:
+    def __init__(self, app, db: Database, exclude: tuple[str, ...] = ()) -> None:
+        self.app = app
+        self.db = db
+        self.exclude = exclude
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude:
+            await self.app(scope, receive, send)
+            return
+        async with self.db.unit_of_work() as session:
+
+            # Settle the transaction before the status goes out, so a failed
+            # commit still becomes a 500 and error responses roll back.
+            async def send_wrapper(message) -> None:
+                if message["type"] == "http.response.start":
+                    await self.db.end_unit_of_work(session, message["status"] < 400)
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,239 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.db import Base
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_request: ContextVar[list | None] = ContextVar("metrics_request", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, value: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + value
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name + _labels(self.labels, labels), value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, value: float = 1) -> None:
+        self.inc(*labels, value=-value)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        buckets: tuple[float, ...],
+        labels: tuple[str, ...] = (),
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 3)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def samples(self):
+        names = self.labels + ("le",)
+        for labels, series in self._series.items():
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                total += count
+                yield self.name + "_bucket" + _labels(names, labels + (bound,)), total
+            yield self.name + "_sum" + _labels(self.labels, labels), series[-2]
+            yield self.name + "_count" + _labels(self.labels, labels), series[-1]
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.requests = Counter(
+            "http_requests_total",
+            "HTTP requests by route and status.",
+            ("method", "route", "status"),
+        )
+        self.latency = Histogram(
+            "http_request_duration_seconds",
+            "Time to the last response byte.",
+            LATENCY_BUCKETS,
+            ("method", "route"),
+        )
+        self.response_size = Histogram(
+            "http_response_size_bytes",
+            "Response body size.",
+            SIZE_BUCKETS,
+            ("method", "route"),
+        )
+        self.in_flight = Gauge("http_requests_in_flight", "Requests being served.")
+        self.request_statements = Histogram(
+            "db_statements_per_request",
+            "SQL statements executed while serving one request.",
+            COUNT_BUCKETS,
+            ("route",),
+        )
+        self.request_db_seconds = Histogram(
+            "db_seconds_per_request",
+            "Time spent in SQL statements while serving one request.",
+            LATENCY_BUCKETS,
+            ("route",),
+        )
+        self.request_rows = Counter(
+            "db_rows_total",
+            "ORM rows loaded plus rows affected by DML, by route.",
+            ("route",),
+        )
+        self.statements = Counter(
+            "db_statements_total", "SQL statements executed, in or out of requests."
+        )
+        self.db_seconds = Counter(
+            "db_seconds_total", "Time spent in SQL statements, in or out of requests."
+        )
+        self.pool_checkout = Histogram(
+            "db_pool_checkout_seconds",
+            "Time to check a connection out of the pool, including connecting.",
+            LATENCY_BUCKETS,
+        )
+        self.coalesced = Counter(
+            "http_requests_coalesced_total",
+            "GET requests answered with the response of an identical one in flight.",
+            ("route",),
+        )
+        self._instrumented: set[int] = set()
+
+    def instrument(self, engine: Engine) -> None:
+        if id(engine) in self._instrumented:
+            return
+        self._instrumented.add(id(engine))
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        if len(self._instrumented) == 1:
+            event.listen(Base, "load", self._on_load, propagate=True)
+        pool = engine.pool
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                return connect()
+            finally:
+                self.pool_checkout.observe(time.perf_counter() - started)
+
+        pool.connect = timed_connect
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, many):
+        context._metrics_started = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, many):
+        elapsed = time.perf_counter() - context._metrics_started
+        self.statements.inc()
+        self.db_seconds.inc(value=elapsed)
+        stats = _request.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+            if context.isinsert or context.isupdate or context.isdelete:
+                stats[2] += max(cursor.rowcount, 0)
+
+    def _on_load(self, target, context):
+        stats = _request.get()
+        if stats is not None:
+            stats[2] += 1
+
+    def render(self) -> str:
+        lines = []
+        for metric in (
+            self.requests,
+            self.latency,
+            self.response_size,
+            self.in_flight,
+            self.request_statements,
+            self.request_db_seconds,
+            self.request_rows,
+            self.statements,
+            self.db_seconds,
+            self.pool_checkout,
+            self.coalesced,
+        ):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name} {value}" for name, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    def __init__(self, app, metrics: Metrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        metrics = self.metrics
+        started = time.perf_counter()
+        stats = [0, 0.0, 0]
+        token = _request.set(stats)
+        status = 500
+        size = 0
+
+        async def send_wrapper(message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        metrics.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight.dec()
+            _request.reset(token)
+            route = scope.get("route")
+            route = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            metrics.requests.inc(method, route, status)
+            metrics.latency.observe(time.perf_counter() - started, method, route)
+            metrics.response_size.observe(size, method, route)
+            metrics.request_statements.observe(stats[0], route)
+            metrics.request_db_seconds.observe(stats[1], route)
+            if stats[2]:
+                metrics.request_rows.inc(route, value=stats[2])
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, String, Date, ForeignKey, Boolean
+from sqlalchemy import Column, String, Date, DateTime, ForeignKey, Boolean, Index, text
+from sqlalchemy import Integer, func
 from app.db import Base
 from sqlalchemy.orm import relationship
 import uuid
@@ -7,10 +8,15 @@ from datetime import datetime, timedelta
 
 class Author(Base):
     __tablename__ = "authors"
-    id = Column(String, primary_key=True, index=True, default=str(uuid.uuid4()))
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, unique=True, index=True)
+    updated_at = Column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True
+    )
+    book_count = Column(Integer, nullable=False, default=0, server_default="0")
+    on_loan_count = Column(Integer, nullable=False, default=0, server_default="0")
     books = relationship(
-        "Book", back_populates="author", cascade="all, delete", lazy="joined"
+        "Book", back_populates="author", cascade="all, delete", lazy="raise_on_sql"
     )
 
     def __repr__(self) -> str:
@@ -19,14 +25,25 @@ class Author(Base):
 
 class Book(Base):
     __tablename__ = "books"
-    id = Column(String, primary_key=True, index=True, default=str(uuid.uuid4()))
+    __table_args__ = (Index("ix_books_library_id_name_id", "library_id", "name", "id"),)
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, unique=True, index=True)
     written_at = Column(Date, nullable=True)
     author_id = Column(String, ForeignKey("authors.id"))
-    author = relationship("Author", back_populates="books", lazy="joined")
+    author = relationship("Author", back_populates="books", lazy="raise_on_sql")
     library_id = Column(String, ForeignKey("libraries.id"))
-    library = relationship("Library", back_populates="books", lazy="joined")
-    rental = relationship("Rental", back_populates="book", uselist=False, lazy="joined")
+    library = relationship("Library", back_populates="books", lazy="raise_on_sql")
+    updated_at = Column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True
+    )
+    rentals = relationship("Rental", back_populates="book", lazy="raise_on_sql")
+    rental = relationship(
+        "Rental",
+        primaryjoin="and_(Book.id == Rental.book_id, Rental.closed_at.is_(None))",
+        uselist=False,
+        viewonly=True,
+        lazy="raise_on_sql",
+    )
 
     def __repr__(self) -> str:
         return f"Book(name={self.name} written_at={self.written_at})"
@@ -34,44 +51,127 @@ class Book(Base):
 
 class Library(Base):
     __tablename__ = "libraries"
-    id = Column(String, primary_key=True, index=True, default=str(uuid.uuid4()))
+    __table_args__ = (Index("ix_libraries_name_id", "name", "id"),)
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False)
     city = Column(String, nullable=False)
+    updated_at = Column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True
+    )
+    book_count = Column(Integer, nullable=False, default=0, server_default="0")
+    on_loan_count = Column(Integer, nullable=False, default=0, server_default="0")
     books = relationship(
-        "Book", back_populates="library", cascade="all, delete", lazy="joined"
+        "Book", back_populates="library", cascade="all, delete", lazy="raise_on_sql"
     )
 
     def __repr__(self) -> str:
-        return f"Library(name={self.name}, city={self.city}, books={self.books})"
+        return f"Library(name={self.name}, city={self.city})"
 
 
 class User(Base):
     __tablename__ = "users"
-    id = Column(String, primary_key=True, index=True, default=str(uuid.uuid4()))
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     name = Column(String, nullable=False, index=True, unique=True)
     email = Column(String, nullable=False, index=True, unique=True)
     password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
-    rentals = relationship("Rental", back_populates="user", lazy="joined")
+    rentals = relationship("Rental", back_populates="user", lazy="raise_on_sql")
 
     def __repr__(self) -> str:
-        return f"User(name={self.name}, email={self.email}, password={self.password}, is_active={self.is_active}, is_superuser={self.is_superuser}, rentals={self.rentals})"
+        return f"User(name={self.name}, email={self.email}, password={self.password}, is_active={self.is_active}, is_superuser={self.is_superuser})"
 
 
 class Rental(Base):
     __tablename__ = "rentals"
-    id = Column(String, primary_key=True, index=True, default=str(uuid.uuid4()))
+    __table_args__ = (
+        Index("ix_rentals_rented_at_id", "rented_at", "id"),
+        Index("ix_rentals_user_id_rented_at_id", "user_id", "rented_at", "id"),
+        Index(
+            "ix_rentals_open_returned_at_id",
+            "returned_at",
+            "id",
+            sqlite_where=text("closed_at IS NULL"),
+            postgresql_where=text("closed_at IS NULL"),
+        ),
+        Index(
+            "ix_rentals_closed_at_id",
+            "closed_at",
+            "id",
+            sqlite_where=text("closed_at IS NOT NULL"),
+            postgresql_where=text("closed_at IS NOT NULL"),
+        ),
+        Index(
+            "ux_rentals_open_book_id",
+            "book_id",
+            unique=True,
+            sqlite_where=text("closed_at IS NULL"),
+            postgresql_where=text("closed_at IS NULL"),
+        ),
+    )
+    id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     book_id = Column(String, ForeignKey("books.id"))
-    book = relationship("Book", back_populates="rental", lazy="joined")
+    book = relationship("Book", back_populates="rentals", lazy="raise_on_sql")
     user_id = Column(String, ForeignKey("users.id"))
-    user = relationship("User", back_populates="rentals", lazy="joined")
-    rented_at = Column(Date, nullable=False, default=datetime.now().date())
+    user = relationship("User", back_populates="rentals", lazy="raise_on_sql")
+    rented_at = Column(Date, nullable=False, default=lambda: datetime.now().date())
     returned_at = Column(
         Date,
         nullable=True,
-        default=(datetime.now() + timedelta(days=30)).date(),
+        default=lambda: (datetime.now() + timedelta(days=30)).date(),
+    )
+    closed_at = Column(DateTime, nullable=True)
+    updated_at = Column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True
     )
 
     def __repr__(self) -> str:
         return f"Rental(book_id={self.book_id}, user_id={self.user_id}, rented_at={self.rented_at}, returned_at={self.returned_at})"
+
+
+class ArchivedRental(Base):
+    # Returned rentals moved out of the hot table once they are old enough.
+    # No foreign keys: the history outlives deleted books and users.
+    __tablename__ = "rentals_archive"
+    __table_args__ = (
+        Index("ix_rentals_archive_user_id_rented_at_id", "user_id", "rented_at", "id"),
+        Index("ix_rentals_archive_book_id", "book_id"),
+    )
+    id = Column(String, primary_key=True)
+    book_id = Column(String, nullable=True)
+    user_id = Column(String, nullable=True)
+    rented_at = Column(Date, nullable=False)
+    returned_at = Column(Date, nullable=True)
+    closed_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=True)
+    archived_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    def __repr__(self) -> str:
+        return f"ArchivedRental(book_id={self.book_id}, user_id={self.user_id}, rented_at={self.rented_at}, closed_at={self.closed_at})"
+
+
+class OverdueRental(Base):
+    __tablename__ = "overdue_rentals"
+    __table_args__ = (
+        Index("ix_overdue_rentals_due_at_rental_id", "due_at", "rental_id"),
+        Index("ix_overdue_rentals_user_id_due_at", "user_id", "due_at", "rental_id"),
+    )
+    rental_id = Column(String, ForeignKey("rentals.id"), primary_key=True)
+    user_id = Column(String, nullable=False)
+    book_id = Column(String, nullable=False)
+    due_at = Column(Date, nullable=False)
+    detected_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"OverdueRental(rental_id={self.rental_id}, due_at={self.due_at})"
+
+
+class ScanCheckpoint(Base):
+    __tablename__ = "scan_checkpoints"
+    name = Column(String, primary_key=True)
+    due_at = Column(Date, nullable=True)
+    rental_id = Column(String, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self) -> str:
+        return f"ScanCheckpoint(name={self.name}, due_at={self.due_at})"
@@ -0,0 +1,96 @@
+import functools
+import inspect
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_logs: ContextVar[tuple[list[str], ...]] = ContextVar("query_logs", default=())
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def repeated(statements: list[str]) -> dict[str, int]:
+    return {
+        statement: count
+        for statement, count in Counter(statements).items()
+        if count > 1
+    }
+
+
+class QueryBudget:
+    def __init__(self, engines: tuple[Engine, ...]) -> None:
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, many) -> None:
+        for log in _logs.get():
+            log.append(statement)
+
+    @contextmanager
+    def track(self) -> Iterator[list[str]]:
+        log: list[str] = []
+        token = _logs.set(_logs.get() + (log,))
+        try:
+            yield log
+        finally:
+            _logs.reset(token)
+
+    @contextmanager
+    def limit(self, max_statements: int, label: str = "block") -> Iterator[list[str]]:
+        with self.track() as log:
+            yield log
+        if len(log) > max_statements:
+            raise QueryBudgetExceeded(
+                f"{label} ran {len(log)} statements, budget is {max_statements}:\n"
+                + "\n".join(log)
+            )
+
+    def budget(self, max_statements: int):
+        def decorator(function):
+            label = function.__qualname__
+            if inspect.iscoroutinefunction(function):
+
+                @functools.wraps(function)
+                async def wrapper(*args, **kwargs):
+                    with self.limit(max_statements, label):
+                        return await function(*args, **kwargs)
+
+            else:
+
+                @functools.wraps(function)
+                def wrapper(*args, **kwargs):
+                    with self.limit(max_statements, label):
+                        return function(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+
+class RepeatedStatementMiddleware:
+    def __init__(self, app, query_budget: QueryBudget) -> None:
+        self.app = app
+        self.query_budget = query_budget
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        with self.query_budget.track() as log:
+            await self.app(scope, receive, send)
+        for statement, count in repeated(log).items():
+            logger.warning(
+                "%s %s ran an identical statement %d times: %s",
+                scope["method"],
+                scope["path"],
+                count,
+                statement,
+            )
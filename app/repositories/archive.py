@@ -0,0 +1,73 @@
+from contextlib import AbstractAsyncContextManager
+from datetime import datetime
+from typing import Callable
+from sqlalchemy import delete, insert, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Subquery
+from app.models import ArchivedRental, Rental
+from .pagination import keyset
+from .versions import TableVersions
+
+# Columns a rental keeps in the archive; also the shape of history rows.
+HISTORY = (
+    "id",
+    "book_id",
+    "user_id",
+    "rented_at",
+    "returned_at",
+    "closed_at",
+    "updated_at",
+)
+
+
+def history_columns(model) -> list:
+    return [model.__table__.c[name] for name in HISTORY]
+
+
+def history(user: str | None, limit: int, cursor: str | None) -> Subquery:
+    # Each table is paged on its own (user_id, rented_at, id) index before
+    # the two pages are merged, so the archive is never scanned past the
+    # rows one page can use.
+    parts = []
+    for model in (Rental, ArchivedRental):
+        statement = select(*history_columns(model))
+        if user:
+            statement = statement.where(model.user_id == user)
+        part = keyset(statement, model.rented_at, model.id, limit, cursor).subquery()
+        parts.append(select(part))
+    return union_all(*parts).subquery("history")
+
+
+class AsyncRentalArchiveRepository:
+    def __init__(
+        self,
+        session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+        versions: TableVersions | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.versions = versions or TableVersions()
+
+    async def archive(self, closed_before: datetime, batch_size: int) -> int:
+        statement = (
+            select(Rental.id)
+            .where(Rental.closed_at < closed_before)
+            .order_by(Rental.closed_at, Rental.id)
+            .limit(batch_size)
+        )
+        async with self.session_factory() as session:
+            ids = (await session.execute(statement)).scalars().all()
+            if not ids:
+                return 0
+            await session.execute(
+                insert(ArchivedRental).from_select(
+                    HISTORY, select(*history_columns(Rental)).where(Rental.id.in_(ids))
+                )
+            )
+            await session.execute(
+                delete(Rental)
+                .where(Rental.id.in_(ids))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+        self.versions.bump("rentals")
+        return len(ids)
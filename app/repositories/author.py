@@ -1,10 +1,25 @@
-from contextlib import AbstractContextManager
-from typing import Callable
-from .db_session_handler import add_to_db
+from contextlib import AbstractContextManager, AbstractAsyncContextManager
+from datetime import datetime
+from typing import AsyncIterator, Callable, Sequence
+from uuid import uuid4
+from .db_session_handler import (
+    add_to_db,
+    async_add_to_db,
+    async_stream_rows,
+    async_insert_many,
+)
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models import Author
-from app.schemas import AuthorSchemaIn
-from sqlalchemy.orm import subqueryload
+from app.models import Author, Book
+from .batch import fetch_by_ids
+from .cache import EntityCache, book_invalidates
+from .counters import adjust_counts, open_loans
+from .loading import load_profile
+from .pagination import attach_children, fetch_page, fetch_rows
+from .versions import TableVersions
+from app.schemas import AuthorSchema, AuthorSchemaIn, Page
+from app.serialization import columns
 
 
 class AuthorRepository:
@@ -15,13 +30,13 @@ class AuthorRepository:
 
     def get_all(self) -> list[Author]:
         with self.session_factory() as session:
-            return session.query(Author).options(subqueryload(Author.books)).all()
+            return session.query(Author).options(*load_profile(Author, "list")).all()
 
     def get_by_id(self, id: int) -> Author:
         with self.session_factory() as session:
             return (
                 session.query(Author)
-                .options(subqueryload(Author.books))
+                .options(*load_profile(Author, "detail"))
                 .filter_by(id=id)
                 .first()
             )
@@ -47,3 +62,248 @@ class AuthorRepository:
                 .filter(Author.id == id)
                 .update(author.dict(exclude_unset=True))
             )
+
+
+async def resolve_author_ids(session: AsyncSession, names: set[str]) -> dict[str, str]:
+    if not names:
+        return {}
+    statement = select(Author.name, Author.id).where(Author.name.in_(names))
+    ids = dict((await session.execute(statement)).all())
+    missing = [(0, {"id": str(uuid4()), "name": name}) for name in names - ids.keys()]
+    created, failed = await async_insert_many(session, Author, missing)
+    ids.update((author["name"], author["id"]) for author in created)
+    if failed:
+        ids = dict((await session.execute(statement)).all())
+    return ids
+
+
+class AsyncAuthorRepository:
+    def __init__(
+        self,
+        session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+        read_session_factory: (
+            Callable[..., AbstractAsyncContextManager[AsyncSession]] | None
+        ) = None,
+        versions: TableVersions | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory or session_factory
+        self.versions = versions or TableVersions()
+
+    async def get_all(self) -> list[Author]:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Author).options(*load_profile(Author, "list"))
+            )
+            return result.unique().scalars().all()
+
+    async def get_page(self, limit: int, cursor: str | None = None) -> Page:
+        async with self.read_session_factory() as session:
+            return await fetch_page(
+                session,
+                select(Author).options(*load_profile(Author, "list")),
+                Author.name,
+                Author.id,
+                limit,
+                cursor,
+            )
+
+    async def get_rows(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        schema: type[AuthorSchema] = AuthorSchema,
+    ) -> Page:
+        async with self.read_session_factory() as session:
+            page = await fetch_rows(
+                session,
+                select(*columns(schema, Author, Author.name, Author.id)),
+                Author.name,
+                Author.id,
+                limit,
+                cursor,
+            )
+            return await attach_children(session, page, schema, books=Book.author_id)
+
+    async def get_by_ids(self, ids: Sequence[str]) -> list[Author | None]:
+        async with self.read_session_factory() as session:
+            return await fetch_by_ids(
+                session,
+                select(Author).options(*load_profile(Author, "detail")),
+                Author.id,
+                ids,
+            )
+
+    async def get_by_id(self, id: str) -> Author:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Author).options(*load_profile(Author, "detail")).filter_by(id=id)
+            )
+            return result.unique().scalars().first()
+
+    async def get_by_name(self, name: str) -> Author:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Author)
+                .options(*load_profile(Author, "detail"))
+                .filter(Author.name == name)
+            )
+            return result.unique().scalars().first()
+
+    async def add(self, author: AuthorSchemaIn) -> Author:
+        async with self.session_factory() as session:
+            author = Author(**author.dict(exclude_unset=True))
+            await async_add_to_db(session, author)
+            self.versions.bump("authors")
+            return author
+
+    async def add_many(
+        self, authors: list[tuple[int, AuthorSchemaIn]]
+    ) -> tuple[list[dict], list[tuple[int, str]]]:
+        async with self.session_factory() as session:
+            names = {author.name for _, author in authors}
+            result = await session.execute(
+                select(Author.name).where(Author.name.in_(names))
+            )
+            existing = set(result.scalars())
+            rows, errors = [], []
+            for row, author in authors:
+                if author.name in existing:
+                    errors.append((row, f"Author '{author.name}' already exists"))
+                    continue
+                existing.add(author.name)
+                rows.append((row, {"id": str(uuid4()), **author.dict()}))
+            created, failed = await async_insert_many(session, Author, rows)
+            self.versions.bump("authors")
+            return created, errors + failed
+
+    async def export(
+        self,
+        updated_since: datetime | None = None,
+    ) -> AsyncIterator[Sequence[dict]]:
+        async with self.read_session_factory() as session:
+            statement = select(*Author.__table__.columns).order_by(Author.id)
+            if updated_since:
+                statement = statement.where(Author.updated_at >= updated_since)
+            async for batch in async_stream_rows(session, statement):
+                yield batch
+
+    async def delete(self, id: str) -> Author:
+        async with self.session_factory() as session:
+            author = await session.get(
+                Author,
+                id,
+                options=load_profile(Author, "delete"),
+                populate_existing=True,
+            )
+            if author is None:
+                raise ValueError(f"Author {id} not found")
+            await adjust_counts(
+                session,
+                (
+                    (None, book.library_id, -1, -open_loans(book))
+                    for book in author.books
+                ),
+            )
+            await session.delete(author)
+            await session.commit()
+            self.versions.bump("authors", "books", "rentals")
+            return author
+
+    async def update(self, id: str, author: AuthorSchemaIn) -> Author:
+        async with self.session_factory() as session:
+            await session.execute(
+                update(Author)
+                .where(Author.id == id)
+                .values(**author.dict(exclude_unset=True))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            self.versions.bump("authors")
+            return await session.get(
+                Author,
+                id,
+                options=load_profile(Author, "detail"),
+                populate_existing=True,
+            )
+
+
+def author_tags(author: Author) -> set:
+    return {("author", author.id), ("author", "name", author.name)}
+
+
+class CachedAuthorRepository:
+    def __init__(self, repository: AsyncAuthorRepository, cache: EntityCache) -> None:
+        self._repository = repository
+        self._cache = cache
+
+    async def get_all(self) -> list[Author]:
+        return await self._repository.get_all()
+
+    async def get_page(self, limit: int, cursor: str | None = None) -> Page:
+        return await self._repository.get_page(limit, cursor)
+
+    async def get_rows(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        schema: type[AuthorSchema] = AuthorSchema,
+    ) -> Page:
+        return await self._repository.get_rows(limit, cursor, schema)
+
+    async def get_by_ids(self, ids: Sequence[str]) -> list[Author | None]:
+        return await self._cache.get_many_or_load(
+            [("author", "id", id) for id in ids],
+            lambda keys: self._repository.get_by_ids([key[2] for key in keys]),
+            author_tags,
+        )
+
+    async def get_by_id(self, id: str) -> Author:
+        return await self._cache.get_or_load(
+            ("author", "id", id), lambda: self._repository.get_by_id(id), author_tags
+        )
+
+    async def get_by_name(self, name: str) -> Author:
+        return await self._cache.get_or_load(
+            ("author", "name", name),
+            lambda: self._repository.get_by_name(name),
+            author_tags,
+        )
+
+    async def add(self, author: AuthorSchemaIn) -> Author:
+        author = await self._repository.add(author)
+        self._cache.invalidate(*author_tags(author))
+        return author
+
+    async def add_many(
+        self, authors: list[tuple[int, AuthorSchemaIn]]
+    ) -> tuple[list[dict], list[tuple[int, str]]]:
+        created, errors = await self._repository.add_many(authors)
+        self._cache.invalidate(*(("author", "name", a["name"]) for a in created))
+        return created, errors
+
+    def export(
+        self,
+        updated_since: datetime | None = None,
+    ) -> AsyncIterator[Sequence[dict]]:
+        return self._repository.export(updated_since=updated_since)
+
+    async def delete(self, id: str) -> Author:
+        author = await self._repository.delete(id)
+        # The delete cascades to the author's books, which other cached entries
+        # embed.
+        self._cache.invalidate(
+            *author_tags(author),
+            ("author", id, "books"),
+            *{tag for book in author.books for tag in book_invalidates(book)},
+        )
+        return author
+
+    async def update(self, id: str, author: AuthorSchemaIn) -> Author:
+        old = await self.get_by_id(id)
+        stale = author_tags(old) if old else set()
+        author = await self._repository.update(id, author)
+        self._cache.invalidate(
+            ("author", id), *stale, *(author_tags(author) if author else ())
+        )
+        return author
@@ -0,0 +1,86 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, Sequence
+from sqlalchemy import Column
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+# Well under SQLite's default limit of 999 bound parameters per statement.
+ID_CHUNK_SIZE = 500
+
+
+def unique(ids: Sequence[Hashable]) -> list:
+    return list(dict.fromkeys(ids))
+
+
+async def fetch_by_ids(
+    session: AsyncSession,
+    statement: Select,
+    id_column: Column,
+    ids: Sequence[str],
+    chunk_size: int = ID_CHUNK_SIZE,
+) -> list:
+    ids = list(ids)
+    wanted = unique(ids)
+    found = {}
+    for start in range(0, len(wanted), chunk_size):
+        result = await session.execute(
+            statement.where(id_column.in_(wanted[start : start + chunk_size]))
+        )
+        for item in result.unique().scalars():
+            found[item.id] = item
+    return [found.get(id) for id in ids]
+
+
+class BatchLoader:
+    # Keys requested while the event loop is busy with other work are
+    # resolved together by one call to load_many. Results are kept for the
+    # life of the loader, which is one request for the services.
+    def __init__(
+        self, load_many: Callable[[list], Awaitable[Sequence]], max_batch: int = 0
+    ) -> None:
+        self._load_many = load_many
+        self._max_batch = max_batch
+        self._results: dict[Hashable, asyncio.Future] = {}
+        self._queue: list[Hashable] = []
+        self._batches = 0
+        self._keys = 0
+
+    def load(self, key: Hashable) -> Awaitable:
+        future = self._results.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._results[key] = future
+            if not self._queue:
+                asyncio.get_running_loop().call_soon(self._dispatch)
+            self._queue.append(key)
+        return future
+
+    async def load_many(self, keys: Sequence[Hashable]) -> list:
+        return list(await asyncio.gather(*map(self.load, keys)))
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, []
+        size = self._max_batch or len(queue)
+        for start in range(0, len(queue), size):
+            asyncio.ensure_future(self._resolve(queue[start : start + size]))
+
+    async def _resolve(self, keys: list[Hashable]) -> None:
+        self._batches += 1
+        self._keys += len(keys)
+        try:
+            values = await self._load_many(keys)
+        except Exception as e:
+            for key in keys:
+                future = self._results.pop(key)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for key, value in zip(keys, values):
+            future = self._results[key]
+            if future.cancelled():
+                del self._results[key]
+            elif not future.done():
+                future.set_result(value)
+
+    def stats(self) -> dict:
+        return {"batches": self._batches, "keys": self._keys}
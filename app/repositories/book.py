@@ -1,10 +1,27 @@
-from .db_session_handler import add_to_db
-from contextlib import AbstractContextManager
-from typing import Callable
+from uuid import uuid4
+from .author import resolve_author_ids
+from .db_session_handler import (
+    add_to_db,
+    async_add_to_db,
+    async_stream_rows,
+    async_insert_many,
+)
+from contextlib import AbstractContextManager, AbstractAsyncContextManager
+from datetime import datetime
+from typing import AsyncIterator, Callable, Sequence
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models import Book
-from app.schemas import BookSchemaIn
-from sqlalchemy.orm import subqueryload
+from sqlalchemy.sql import Select
+from app.models import Author, Book, Library, Rental
+from .batch import fetch_by_ids
+from .cache import EntityCache, book_invalidates, book_tags
+from .counters import adjust_counts, open_loans
+from .loading import load_profile
+from .pagination import fetch_page, fetch_rows
+from .versions import TableVersions
+from app.schemas import BookImportSchema, BookSchema, BookSchemaIn, Page
+from app.serialization import columns
 
 
 class BookRepository:
@@ -29,7 +46,7 @@ class BookRepository:
 
     def get_all(self) -> list[Book]:
         with self.session_factory() as session:
-            return session.query(Book).options(subqueryload(Book.author)).all()
+            return session.query(Book).options(*load_profile(Book, "list")).all()
 
     def delete(self, id: int) -> Book:
         with self.session_factory() as session:
@@ -42,3 +59,333 @@ class BookRepository:
                 .filter(Book.id == id)
                 .update(book.dict(exclude_unset=True))
             )
+
+
+class AsyncBookRepository:
+    def __init__(
+        self,
+        session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+        read_session_factory: (
+            Callable[..., AbstractAsyncContextManager[AsyncSession]] | None
+        ) = None,
+        versions: TableVersions | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory or session_factory
+        self.versions = versions or TableVersions()
+
+    async def add(self, book: BookSchemaIn) -> Book:
+        async with self.session_factory() as session:
+            book = Book(**book.dict(exclude_unset=True))
+            await adjust_counts(session, [(book.author_id, book.library_id, 1, 0)])
+            await async_add_to_db(session, book)
+            self.versions.bump("books")
+            return book
+
+    async def get_by_name(self, name: str) -> list[Book]:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Book)
+                .options(*load_profile(Book, "list"))
+                .filter(Book.name == name)
+            )
+            return result.unique().scalars().all()
+
+    async def get_by_ids(self, ids: Sequence[str]) -> list[Book | None]:
+        async with self.read_session_factory() as session:
+            return await fetch_by_ids(
+                session,
+                select(Book).options(*load_profile(Book, "detail")),
+                Book.id,
+                ids,
+            )
+
+    async def get_by_id(self, id: str) -> Book:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Book)
+                .options(*load_profile(Book, "detail"))
+                .filter(Book.id == id)
+            )
+            return result.unique().scalars().first()
+
+    async def get_all(self) -> list[Book]:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Book).options(*load_profile(Book, "list"))
+            )
+            return result.unique().scalars().all()
+
+    async def get_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        available: bool | None = None,
+        library_id: str | None = None,
+    ) -> Page:
+        async with self.read_session_factory() as session:
+            statement = self._filter(
+                select(Book).options(*load_profile(Book, "list")),
+                available,
+                library_id,
+            )
+            return await fetch_page(
+                session, statement, Book.name, Book.id, limit, cursor
+            )
+
+    async def get_rows(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        available: bool | None = None,
+        library_id: str | None = None,
+        schema: type[BookSchema] = BookSchema,
+    ) -> Page:
+        async with self.read_session_factory() as session:
+            statement = self._filter(
+                select(*columns(schema, Book, Book.name, Book.id)),
+                available,
+                library_id,
+            )
+            return await fetch_rows(
+                session, statement, Book.name, Book.id, limit, cursor
+            )
+
+    @staticmethod
+    def _filter(
+        statement: Select, available: bool | None, library_id: str | None
+    ) -> Select:
+        if library_id:
+            statement = statement.where(Book.library_id == library_id)
+        if available is not None:
+            on_loan = AsyncBookRepository._on_loan()
+            statement = statement.where(~on_loan if available else on_loan)
+        return statement
+
+    @staticmethod
+    def _on_loan():
+        return (
+            select(Rental.id)
+            .where(Rental.book_id == Book.id, Rental.closed_at.is_(None))
+            .exists()
+        )
+
+    async def add_many(
+        self, books: list[tuple[int, BookImportSchema]]
+    ) -> tuple[list[dict], list[tuple[int, str]]]:
+        async with self.session_factory() as session:
+            author_ids = await resolve_author_ids(
+                session, {book.author for _, book in books if not book.author_id}
+            )
+            known_authors = await self._existing(
+                session, Author.id, {book.author_id for _, book in books}
+            )
+            known_libraries = await self._existing(
+                session, Library.id, {book.library_id for _, book in books}
+            )
+            existing = await self._existing(
+                session, Book.name, {book.name for _, book in books}
+            )
+            rows, errors = [], []
+            for row, book in books:
+                if book.author_id and book.author_id not in known_authors:
+                    errors.append((row, f"Author {book.author_id} not found"))
+                elif book.library_id not in known_libraries:
+                    errors.append((row, f"Library {book.library_id} not found"))
+                elif book.name in existing:
+                    errors.append((row, f"Book '{book.name}' already exists"))
+                else:
+                    existing.add(book.name)
+                    values = {
+                        "id": str(uuid4()),
+                        "name": book.name,
+                        "written_at": book.written_at,
+                        "author_id": book.author_id or author_ids[book.author],
+                        "library_id": book.library_id,
+                    }
+                    rows.append((row, values))
+
+            async def count(created: list[dict]) -> None:
+                await adjust_counts(
+                    session,
+                    ((book["author_id"], book["library_id"], 1, 0) for book in created),
+                )
+
+            created, failed = await async_insert_many(session, Book, rows, count)
+            self.versions.bump("authors", "books")
+            return created, errors + failed
+
+    @staticmethod
+    async def _existing(session: AsyncSession, column, values: set) -> set:
+        values.discard(None)
+        if not values:
+            return set()
+        result = await session.execute(select(column).where(column.in_(values)))
+        return set(result.scalars())
+
+    async def export(
+        self,
+        updated_since: datetime | None = None,
+        author_id: str | None = None,
+        library_id: str | None = None,
+    ) -> AsyncIterator[Sequence[dict]]:
+        async with self.read_session_factory() as session:
+            statement = select(*Book.__table__.columns).order_by(Book.id)
+            if updated_since:
+                statement = statement.where(Book.updated_at >= updated_since)
+            if author_id:
+                statement = statement.where(Book.author_id == author_id)
+            if library_id:
+                statement = statement.where(Book.library_id == library_id)
+            async for batch in async_stream_rows(session, statement):
+                yield batch
+
+    async def delete(self, id: str) -> Book:
+        async with self.session_factory() as session:
+            book = await session.get(
+                Book, id, options=load_profile(Book, "delete"), populate_existing=True
+            )
+            if book is None:
+                raise ValueError(f"Book {id} not found")
+            await adjust_counts(
+                session, [(book.author_id, book.library_id, -1, -open_loans(book))]
+            )
+            await session.delete(book)
+            await session.commit()
+            self.versions.bump("books", "rentals")
+            return book
+
+    async def update(self, id: str, book: BookSchemaIn) -> Book:
+        values = book.dict(exclude_unset=True)
+        async with self.session_factory() as session:
+            old = (
+                await session.execute(
+                    select(
+                        Book.author_id,
+                        Book.library_id,
+                        self._on_loan().label("on_loan"),
+                    ).where(Book.id == id)
+                )
+            ).first()
+            await session.execute(
+                update(Book)
+                .where(Book.id == id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            if old is not None:
+                loaned = int(old.on_loan)
+                await adjust_counts(
+                    session,
+                    [
+                        (old.author_id, old.library_id, -1, -loaned),
+                        (
+                            values.get("author_id", old.author_id),
+                            values.get("library_id", old.library_id),
+                            1,
+                            loaned,
+                        ),
+                    ],
+                )
+            await session.commit()
+            self.versions.bump("books")
+            return await session.get(
+                Book, id, options=load_profile(Book, "detail"), populate_existing=True
+            )
+
+
+class CachedBookRepository:
+    def __init__(self, repository: AsyncBookRepository, cache: EntityCache) -> None:
+        self._repository = repository
+        self._cache = cache
+
+    async def add(self, book: BookSchemaIn) -> Book:
+        book = await self._repository.add(book)
+        self._cache.invalidate(*book_invalidates(book))
+        return book
+
+    async def add_many(
+        self, books: list[tuple[int, BookImportSchema]]
+    ) -> tuple[list[dict], list[tuple[int, str]]]:
+        created, errors = await self._repository.add_many(books)
+        self._cache.invalidate(
+            *{
+                tag
+                for book in created
+                for tag in (
+                    ("book", "name", book["name"]),
+                    ("author", book["author_id"]),
+                    ("library", book["library_id"]),
+                )
+            }
+        )
+        return created, errors
+
+    async def get_by_name(self, name: str) -> list[Book]:
+        return await self._cache.get_or_load(
+            ("book", "name", name),
+            lambda: self._repository.get_by_name(name),
+            lambda books: set().union(*map(book_tags, books)),
+        )
+
+    async def get_by_ids(self, ids: Sequence[str]) -> list[Book | None]:
+        return await self._cache.get_many_or_load(
+            [("book", "id", id) for id in ids],
+            lambda keys: self._repository.get_by_ids([key[2] for key in keys]),
+            book_tags,
+        )
+
+    async def get_by_id(self, id: str) -> Book:
+        return await self._cache.get_or_load(
+            ("book", "id", id), lambda: self._repository.get_by_id(id), book_tags
+        )
+
+    async def get_all(self) -> list[Book]:
+        return await self._repository.get_all()
+
+    async def get_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        available: bool | None = None,
+        library_id: str | None = None,
+    ) -> Page:
+        return await self._repository.get_page(limit, cursor, available, library_id)
+
+    async def get_rows(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        available: bool | None = None,
+        library_id: str | None = None,
+        schema: type[BookSchema] = BookSchema,
+    ) -> Page:
+        return await self._repository.get_rows(
+            limit, cursor, available, library_id, schema
+        )
+
+    def export(
+        self,
+        updated_since: datetime | None = None,
+        author_id: str | None = None,
+        library_id: str | None = None,
+    ) -> AsyncIterator[Sequence[dict]]:
+        return self._repository.export(
+            updated_since=updated_since, author_id=author_id, library_id=library_id
+        )
+
+    async def delete(self, id: str) -> Book:
+        book = await self._repository.delete(id)
+        self._cache.invalidate(*book_invalidates(book))
+        return book
+
+    async def update(self, id: str, book: BookSchemaIn) -> Book:
+        # Tags as plain values: the update re-reads the row, which may refresh
+        # the instance old came from.
+        old = await self.get_by_id(id)
+        stale = book_invalidates(old) if old else set()
+        book = await self._repository.update(id, book)
+        self._cache.invalidate(
+            ("book", id), *stale, *(book_invalidates(book) if book else ())
+        )
+        return book
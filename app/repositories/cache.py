@@ -0,0 +1,155 @@
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Hashable, Iterable
+from sqlalchemy import inspect
+from sqlalchemy.orm import InstanceState
+from app.db import after_unit_of_work
+from app.models import Book
+
+MISSING = object()
+
+
+def book_tags(book: Book) -> set:
+    return {
+        ("book", book.id),
+        ("book", "name", book.name),
+        ("author", book.author_id, "books"),
+        ("library", book.library_id, "books"),
+    }
+
+
+def book_invalidates(book: Book) -> set:
+    return {
+        ("book", book.id),
+        ("book", "name", book.name),
+        ("author", book.author_id),
+        ("library", book.library_id),
+    }
+
+
+def detach(value: object) -> None:
+    # Under a unit of work a load leaves its instances in the request's
+    # shared session, where a rollback would expire them (and a later re-read
+    # overwrite them) while the cache still hands them out.
+    for entity in value if isinstance(value, list) else (value,):
+        state = inspect(entity, raiseerr=False)
+        if isinstance(state, InstanceState) and state.session is not None:
+            state.session.expunge(entity)
+
+
+class EntityCache:
+    def __init__(self, max_size: int = 4096, ttl: float = 60.0) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, object, frozenset]] = (
+            OrderedDict()
+        )
+        self._tags: dict[Hashable, set[Hashable]] = {}
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value, _ = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return value
+            self._remove(key)
+            self._evictions += 1
+        self._misses += 1
+        return MISSING
+
+    def set(
+        self,
+        key: Hashable,
+        value: object,
+        tags: Iterable[Hashable] = (),
+        generation: int | None = None,
+    ) -> None:
+        if not self._max_size or self._ttl <= 0:
+            return
+        if generation is not None and generation != self._generation:
+            return
+        detach(value)
+        self._remove(key)
+        tags = frozenset(tags) | {key}
+        self._entries[key] = (time.monotonic() + self._ttl, value, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._entries) > self._max_size:
+            self._remove(next(iter(self._entries)))
+            self._evictions += 1
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable],
+        tags: Callable[[object], Iterable[Hashable]],
+    ):
+        value = self.get(key)
+        if value is not MISSING:
+            return value
+        generation = self._generation
+        value = await load()
+        if value:
+            self.set(key, value, tags(value), generation)
+        return value
+
+    async def get_many_or_load(
+        self,
+        keys: list[Hashable],
+        load: Callable[[list[Hashable]], Awaitable[list]],
+        tags: Callable[[object], Iterable[Hashable]],
+    ) -> list:
+        values = [self.get(key) for key in keys]
+        missing = list(dict.fromkeys(k for k, v in zip(keys, values) if v is MISSING))
+        if not missing:
+            return values
+        generation = self._generation
+        loaded = dict(zip(missing, await load(missing)))
+        for key, value in loaded.items():
+            if value:
+                self.set(key, value, tags(value), generation)
+        return [loaded[k] if v is MISSING else v for k, v in zip(keys, values)]
+
+    def invalidate(self, *tags: Hashable) -> None:
+        self._invalidate(tags)
+        # A load between now and the unit of work's commit still reads the
+        # old rows, so drop whatever it cached once the commit lands.
+        after_unit_of_work(lambda: self._invalidate(tags))
+
+    def _invalidate(self, tags: Iterable[Hashable]) -> None:
+        self._generation += 1
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+                self._invalidations += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._entries),
+            "max_size": self._max_size,
+            "ttl": self._ttl,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "invalidations": self._invalidations,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+        }
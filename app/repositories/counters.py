@@ -0,0 +1,134 @@
+from collections import defaultdict
+from contextlib import AbstractAsyncContextManager
+from typing import Callable, Iterable
+from sqlalchemy import bindparam, event, func, inspect, or_, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import ColumnElement, Update
+from app.db import Base
+from app.models import Author, Book, Library, Rental
+from .versions import TableVersions
+
+# Parents carrying book_count/on_loan_count, keyed to the book column that
+# points at them.
+COUNTED = {Author: Book.author_id, Library: Book.library_id}
+COUNTERS = ("book_count", "on_loan_count")
+
+
+def recount(model, *where) -> Update:
+    parent = COUNTED[model]
+    books = select(func.count(Book.id)).where(parent == model.id).scalar_subquery()
+    on_loan = (
+        select(func.count(Rental.id))
+        .join(Book, Rental.book_id == Book.id)
+        .where(parent == model.id, Rental.closed_at.is_(None))
+        .scalar_subquery()
+    )
+    return (
+        update(model)
+        .where(*where, or_(model.book_count != books, model.on_loan_count != on_loan))
+        .values(book_count=books, on_loan_count=on_loan, updated_at=model.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_counters(target, connection: Connection, **kw) -> None:
+    # Databases created before the counters existed get the columns here and
+    # are counted once from scratch.
+    inspector = inspect(connection)
+    for model in COUNTED:
+        name = model.__tablename__
+        existing = {column["name"] for column in inspector.get_columns(name)}
+        missing = [counter for counter in COUNTERS if counter not in existing]
+        for counter in missing:
+            connection.execute(
+                text(
+                    f"ALTER TABLE {name} ADD COLUMN {counter} INTEGER NOT NULL DEFAULT 0"
+                )
+            )
+        if missing:
+            connection.execute(recount(model))
+
+
+def open_loans(book: Book) -> int:
+    return sum(rental.closed_at is None for rental in book.rentals)
+
+
+async def adjust_counts(
+    session: AsyncSession,
+    changes: Iterable[tuple[str | None, str | None, int, int]],
+) -> None:
+    # Each change is (author_id, library_id, books, on_loan). The deltas are
+    # summed per parent and applied as relative updates in the caller's
+    # transaction, so concurrent writers never overwrite each other's counts.
+    totals = {model: defaultdict(lambda: [0, 0]) for model in COUNTED}
+    for author_id, library_id, books, on_loan in changes:
+        for model, id in ((Author, author_id), (Library, library_id)):
+            if id is not None:
+                totals[model][id][0] += books
+                totals[model][id][1] += on_loan
+    for model, deltas in totals.items():
+        params = [
+            {"parent_id": id, "books": books, "on_loan": on_loan}
+            for id, (books, on_loan) in deltas.items()
+            if books or on_loan
+        ]
+        if not params:
+            continue
+        table = model.__table__
+        await session.execute(
+            update(table)
+            .where(table.c.id == bindparam("parent_id"))
+            .values(
+                book_count=table.c.book_count + bindparam("books"),
+                on_loan_count=table.c.on_loan_count + bindparam("on_loan"),
+                updated_at=table.c.updated_at,
+            ),
+            params,
+        )
+
+
+async def adjust_loans(
+    session: AsyncSession, book_id: str | ColumnElement, on_loan: int
+) -> None:
+    # The parents are looked up from the book inside the UPDATE itself, so a
+    # loan changes both counters without reading the book first.
+    for model, parent in COUNTED.items():
+        book = select(parent).where(Book.id == book_id).scalar_subquery()
+        await session.execute(
+            update(model)
+            .where(model.id == book)
+            .values(
+                on_loan_count=model.on_loan_count + on_loan,
+                updated_at=model.updated_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+
+class AsyncCounterRepository:
+    def __init__(
+        self,
+        session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+        versions: TableVersions | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.versions = versions or TableVersions()
+
+    async def reconcile(
+        self, model, after: str | None, batch_size: int
+    ) -> tuple[str | None, int]:
+        statement = select(model.id).order_by(model.id).limit(batch_size)
+        if after is not None:
+            statement = statement.where(model.id > after)
+        async with self.session_factory() as session:
+            ids = (await session.execute(statement)).scalars().all()
+            if not ids:
+                return None, 0
+            result = await session.execute(recount(model, model.id.in_(ids)))
+            await session.commit()
+        if result.rowcount:
+            self.versions.bump(model.__tablename__)
+        last = ids[-1] if len(ids) == batch_size else None
+        return last, result.rowcount
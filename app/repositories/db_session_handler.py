@@ -1,5 +1,9 @@
-from sqlalchemy import inspect
+from sqlalchemy import insert, inspect
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm.session import Session
+from sqlalchemy.sql import Select
+from typing import AsyncIterator, Awaitable, Callable, Sequence
 from ..db import Base
 
 
@@ -9,5 +13,49 @@ def add_to_db(session: Session, obj: Base) -> None:
     session.refresh(obj)
 
 
+async def async_add_to_db(session: AsyncSession, obj: Base) -> None:
+    session.add(obj)
+    await session.commit()
+    await session.refresh(obj)
+
+
+async def async_insert_many(
+    session: AsyncSession,
+    model: type[Base],
+    rows: list[tuple[int, dict]],
+    before_commit: Callable[[list[dict]], Awaitable[None]] | None = None,
+) -> tuple[list[dict], list[tuple[int, str]]]:
+    if not rows:
+        return [], []
+    try:
+        await session.execute(insert(model), [values for _, values in rows])
+        if before_commit:
+            await before_commit([values for _, values in rows])
+        await session.commit()
+        return [values for _, values in rows], []
+    except IntegrityError:
+        await session.rollback()
+    created, errors = [], []
+    for row, values in rows:
+        try:
+            await session.execute(insert(model), [values])
+            if before_commit:
+                await before_commit([values])
+            await session.commit()
+            created.append(values)
+        except IntegrityError as e:
+            await session.rollback()
+            errors.append((row, str(e.orig)))
+    return created, errors
+
+
+async def async_stream_rows(
+    session: AsyncSession, statement: Select, batch_size: int = 1000
+) -> AsyncIterator[Sequence[dict]]:
+    result = await session.stream(statement.execution_options(yield_per=batch_size))
+    async for batch in result.mappings().partitions(batch_size):
+        yield batch
+
+
 def object_as_dict(obj) -> dict:
     return {c.key: getattr(obj, c.key) for c in inspect(obj).mapper.column_attrs}
@@ -1,9 +1,25 @@
-from contextlib import AbstractContextManager
-from typing import Callable
-from .db_session_handler import add_to_db
+from contextlib import AbstractContextManager, AbstractAsyncContextManager
+from datetime import datetime
+from typing import AsyncIterator, Callable, Sequence
+from uuid import uuid4
+from .db_session_handler import (
+    add_to_db,
+    async_add_to_db,
+    async_stream_rows,
+    async_insert_many,
+)
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.schemas import LibrarySchemaIn
-from app.models import Library
+from app.schemas import LibrarySchema, LibrarySchemaIn, Page
+from app.models import Book, Library
+from app.serialization import columns
+from .batch import fetch_by_ids
+from .cache import EntityCache, book_invalidates
+from .counters import adjust_counts, open_loans
+from .loading import load_profile
+from .pagination import attach_children, fetch_page, fetch_rows
+from .versions import TableVersions
 
 
 class LibraryRepository:
@@ -41,3 +57,235 @@ class LibraryRepository:
                 .filter(Library.id == id)
                 .update(library.dict(exclude_unset=True))
             )
+
+
+class AsyncLibraryRepository:
+    def __init__(
+        self,
+        session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+        read_session_factory: (
+            Callable[..., AbstractAsyncContextManager[AsyncSession]] | None
+        ) = None,
+        versions: TableVersions | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory or session_factory
+        self.versions = versions or TableVersions()
+
+    async def get_all(self) -> list[Library]:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Library).options(*load_profile(Library, "list"))
+            )
+            return result.unique().scalars().all()
+
+    async def get_page(self, limit: int, cursor: str | None = None) -> Page:
+        async with self.read_session_factory() as session:
+            return await fetch_page(
+                session,
+                select(Library).options(*load_profile(Library, "list")),
+                Library.name,
+                Library.id,
+                limit,
+                cursor,
+            )
+
+    async def get_rows(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        schema: type[LibrarySchema] = LibrarySchema,
+    ) -> Page:
+        async with self.read_session_factory() as session:
+            page = await fetch_rows(
+                session,
+                select(*columns(schema, Library, Library.name, Library.id)),
+                Library.name,
+                Library.id,
+                limit,
+                cursor,
+            )
+            return await attach_children(session, page, schema, books=Book.library_id)
+
+    async def get_by_ids(self, ids: Sequence[str]) -> list[Library | None]:
+        async with self.read_session_factory() as session:
+            return await fetch_by_ids(
+                session,
+                select(Library).options(*load_profile(Library, "detail")),
+                Library.id,
+                ids,
+            )
+
+    async def get_by_id(self, id: str) -> Library:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Library)
+                .options(*load_profile(Library, "detail"))
+                .filter(Library.id == id)
+            )
+            return result.unique().scalars().first()
+
+    async def get_by_name(self, name: str) -> Library:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Library)
+                .options(*load_profile(Library, "detail"))
+                .filter(Library.name == name)
+            )
+            return result.unique().scalars().first()
+
+    async def add(self, library: LibrarySchemaIn) -> Library:
+        async with self.session_factory() as session:
+            library = Library(**library.dict(exclude_unset=True))
+            await async_add_to_db(session, library)
+            self.versions.bump("libraries")
+            return library
+
+    async def add_many(
+        self, libraries: list[tuple[int, LibrarySchemaIn]]
+    ) -> tuple[list[dict], list[tuple[int, str]]]:
+        async with self.session_factory() as session:
+            rows = [
+                (row, {"id": str(uuid4()), **library.dict()})
+                for row, library in libraries
+            ]
+            created, failed = await async_insert_many(session, Library, rows)
+            self.versions.bump("libraries")
+            return created, failed
+
+    async def export(
+        self,
+        updated_since: datetime | None = None,
+        city: str | None = None,
+    ) -> AsyncIterator[Sequence[dict]]:
+        async with self.read_session_factory() as session:
+            statement = select(*Library.__table__.columns).order_by(Library.id)
+            if updated_since:
+                statement = statement.where(Library.updated_at >= updated_since)
+            if city:
+                statement = statement.where(Library.city == city)
+            async for batch in async_stream_rows(session, statement):
+                yield batch
+
+    async def delete(self, id: str) -> Library:
+        async with self.session_factory() as session:
+            library = await session.get(
+                Library,
+                id,
+                options=load_profile(Library, "delete"),
+                populate_existing=True,
+            )
+            if library is None:
+                raise ValueError(f"Library {id} not found")
+            await adjust_counts(
+                session,
+                (
+                    (book.author_id, None, -1, -open_loans(book))
+                    for book in library.books
+                ),
+            )
+            await session.delete(library)
+            await session.commit()
+            self.versions.bump("libraries", "books", "rentals")
+            return library
+
+    async def update(self, id: str, library: LibrarySchemaIn) -> Library:
+        async with self.session_factory() as session:
+            await session.execute(
+                update(Library)
+                .where(Library.id == id)
+                .values(**library.dict(exclude_unset=True))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            self.versions.bump("libraries")
+            return await session.get(
+                Library,
+                id,
+                options=load_profile(Library, "detail"),
+                populate_existing=True,
+            )
+
+
+def library_tags(library: Library) -> set:
+    return {("library", library.id), ("library", "name", library.name)}
+
+
+class CachedLibraryRepository:
+    def __init__(self, repository: AsyncLibraryRepository, cache: EntityCache) -> None:
+        self._repository = repository
+        self._cache = cache
+
+    async def get_all(self) -> list[Library]:
+        return await self._repository.get_all()
+
+    async def get_page(self, limit: int, cursor: str | None = None) -> Page:
+        return await self._repository.get_page(limit, cursor)
+
+    async def get_rows(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        schema: type[LibrarySchema] = LibrarySchema,
+    ) -> Page:
+        return await self._repository.get_rows(limit, cursor, schema)
+
+    async def get_by_ids(self, ids: Sequence[str]) -> list[Library | None]:
+        return await self._cache.get_many_or_load(
+            [("library", "id", id) for id in ids],
+            lambda keys: self._repository.get_by_ids([key[2] for key in keys]),
+            library_tags,
+        )
+
+    async def get_by_id(self, id: str) -> Library:
+        return await self._cache.get_or_load(
+            ("library", "id", id), lambda: self._repository.get_by_id(id), library_tags
+        )
+
+    async def get_by_name(self, name: str) -> Library:
+        return await self._cache.get_or_load(
+            ("library", "name", name),
+            lambda: self._repository.get_by_name(name),
+            library_tags,
+        )
+
+    async def add(self, library: LibrarySchemaIn) -> Library:
+        library = await self._repository.add(library)
+        self._cache.invalidate(*library_tags(library))
+        return library
+
+    async def add_many(
+        self, libraries: list[tuple[int, LibrarySchemaIn]]
+    ) -> tuple[list[dict], list[tuple[int, str]]]:
+        created, errors = await self._repository.add_many(libraries)
+        self._cache.invalidate(
+            *(("library", "name", library["name"]) for library in created)
+        )
+        return created, errors
+
+    def export(
+        self,
+        updated_since: datetime | None = None,
+        city: str | None = None,
+    ) -> AsyncIterator[Sequence[dict]]:
+        return self._repository.export(updated_since=updated_since, city=city)
+
+    async def delete(self, id: str) -> Library:
+        library = await self._repository.delete(id)
+        # The delete cascades to the library's books, which other cached entries
+        # embed.
+        self._cache.invalidate(
+            *library_tags(library),
+            ("library", id, "books"),
+            *{tag for book in library.books for tag in book_invalidates(book)},
+        )
+        return library
+
+    async def update(self, id: str, library: LibrarySchemaIn) -> Library:
+        old = await self.get_by_id(id)
+        stale = library_tags(old) if old else set()
+        library = await self._repository.update(id, library)
+        self._cache.invalidate(
+            ("library", id), *stale, *(library_tags(library) if library else ())
+        )
+        return library
@@ -0,0 +1,37 @@
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+from app.models import Author, Book, Library, Rental, User
+
+# Relationships are lazy="raise_on_sql": every repository query picks a profile.
+# "delete" loads what the unit of work needs to cascade or null out foreign keys.
+PROFILES: dict[type, dict[str, tuple[LoaderOption, ...]]] = {
+    Author: {
+        "list": (selectinload(Author.books),),
+        "detail": (selectinload(Author.books),),
+        "delete": (selectinload(Author.books).selectinload(Book.rentals),),
+    },
+    Book: {
+        "list": (),
+        "detail": (),
+        "delete": (selectinload(Book.rentals),),
+    },
+    Library: {
+        "list": (selectinload(Library.books),),
+        "detail": (selectinload(Library.books),),
+        "delete": (selectinload(Library.books).selectinload(Book.rentals),),
+    },
+    Rental: {
+        "list": (),
+        "detail": (joinedload(Rental.book),),
+        "delete": (),
+    },
+    User: {
+        "list": (),
+        "detail": (selectinload(User.rentals),),
+        "delete": (selectinload(User.rentals),),
+    },
+}
+
+
+def load_profile(model: type, name: str) -> tuple[LoaderOption, ...]:
+    return PROFILES[model][name]
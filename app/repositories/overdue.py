@@ -0,0 +1,148 @@
+from contextlib import AbstractAsyncContextManager
+from datetime import date, datetime
+from typing import Callable
+from sqlalchemy import and_, delete, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import OverdueRental, Rental, ScanCheckpoint
+from .pagination import fetch_page
+from app.schemas import Page
+
+CHECKPOINT = "overdue"
+
+
+class AsyncOverdueRepository:
+    def __init__(
+        self, session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]]
+    ) -> None:
+        self.session_factory = session_factory
+
+    async def checkpoint(self) -> tuple[date | None, str | None]:
+        async with self.session_factory() as session:
+            checkpoint = await session.get(ScanCheckpoint, CHECKPOINT)
+            if checkpoint is None:
+                return None, None
+            return checkpoint.due_at, checkpoint.rental_id
+
+    async def scan(
+        self,
+        today: date,
+        after: tuple[date | None, str | None],
+        batch_size: int,
+    ) -> list[dict]:
+        due_at, rental_id = after
+        statement = (
+            select(Rental.id, Rental.user_id, Rental.book_id, Rental.returned_at)
+            .where(Rental.closed_at.is_(None), Rental.returned_at < today)
+            .order_by(Rental.returned_at, Rental.id)
+            .limit(batch_size)
+        )
+        if due_at is not None:
+            statement = statement.where(
+                or_(
+                    Rental.returned_at > due_at,
+                    and_(Rental.returned_at == due_at, Rental.id > rental_id),
+                )
+            )
+        async with self.session_factory() as session:
+            result = await session.execute(statement)
+            return [
+                {
+                    "rental_id": row.id,
+                    "user_id": row.user_id,
+                    "book_id": row.book_id,
+                    "due_at": row.returned_at,
+                }
+                for row in result
+            ]
+
+    async def missed(
+        self,
+        today: date,
+        before: tuple[date, str],
+        updated_since: datetime | None,
+        batch_size: int,
+    ) -> list[dict]:
+        # Open rentals whose due date was moved behind the checkpoint after it
+        # passed them; recorded rows drop out, so no keyset is needed.
+        due_at, rental_id = before
+        recorded = select(OverdueRental.rental_id).where(
+            OverdueRental.rental_id == Rental.id
+        )
+        statement = (
+            select(Rental.id, Rental.user_id, Rental.book_id, Rental.returned_at)
+            .where(
+                Rental.closed_at.is_(None),
+                Rental.returned_at < today,
+                or_(
+                    Rental.returned_at < due_at,
+                    and_(Rental.returned_at == due_at, Rental.id <= rental_id),
+                ),
+                ~recorded.exists(),
+            )
+            .order_by(Rental.returned_at, Rental.id)
+            .limit(batch_size)
+        )
+        if updated_since is not None:
+            statement = statement.where(Rental.updated_at >= updated_since)
+        async with self.session_factory() as session:
+            result = await session.execute(statement)
+            return [
+                {
+                    "rental_id": row.id,
+                    "user_id": row.user_id,
+                    "book_id": row.book_id,
+                    "due_at": row.returned_at,
+                }
+                for row in result
+            ]
+
+    async def record(self, rows: list[dict], advance: bool = True) -> None:
+        last = rows[-1]
+        async with self.session_factory() as session:
+            await session.execute(
+                delete(OverdueRental).where(
+                    OverdueRental.rental_id.in_([row["rental_id"] for row in rows])
+                )
+            )
+            await session.execute(insert(OverdueRental), rows)
+            if not advance:
+                await session.commit()
+                return
+            checkpoint = await session.get(ScanCheckpoint, CHECKPOINT)
+            if checkpoint is None:
+                checkpoint = ScanCheckpoint(name=CHECKPOINT)
+                session.add(checkpoint)
+            checkpoint.due_at = last["due_at"]
+            checkpoint.rental_id = last["rental_id"]
+            await session.commit()
+
+    async def prune(self, today: date) -> int:
+        still_overdue = select(Rental.id).where(
+            Rental.id == OverdueRental.rental_id,
+            Rental.closed_at.is_(None),
+            Rental.returned_at < today,
+        )
+        async with self.session_factory() as session:
+            result = await session.execute(
+                delete(OverdueRental)
+                .where(~still_overdue.exists())
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            return result.rowcount
+
+    async def get_page(
+        self, limit: int, cursor: str | None = None, user: str | None = None
+    ) -> Page:
+        async with self.session_factory() as session:
+            statement = select(OverdueRental)
+            if user:
+                statement = statement.filter(OverdueRental.user_id == user)
+            return await fetch_page(
+                session,
+                statement,
+                OverdueRental.due_at,
+                OverdueRental.rental_id,
+                limit,
+                cursor,
+            )
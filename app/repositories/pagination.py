@@ -0,0 +1,126 @@
+import base64
+import binascii
+import json
+from datetime import date
+from sqlalchemy import Column, and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from pydantic import BaseModel
+from app.schemas import Page
+from app.serialization import columns, nested_fields, scalar_fields
+
+
+def encode_cursor(sort_value, id: str) -> str:
+    if isinstance(sort_value, date):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_column: Column) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, id = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if sort_value is not None and sort_column.type.python_type is date:
+        sort_value = date.fromisoformat(sort_value)
+    return sort_value, id
+
+
+def keyset(
+    statement: Select,
+    sort_column: Column,
+    id_column: Column,
+    limit: int,
+    cursor: str | None = None,
+) -> Select:
+    if cursor:
+        sort_value, id = decode_cursor(cursor, sort_column)
+        statement = statement.where(
+            or_(
+                sort_column > sort_value,
+                and_(sort_column == sort_value, id_column > id),
+            )
+        )
+    return statement.order_by(sort_column, id_column).limit(limit + 1)
+
+
+async def fetch_page(
+    session: AsyncSession,
+    statement: Select,
+    sort_column: Column,
+    id_column: Column,
+    limit: int,
+    cursor: str | None = None,
+) -> Page:
+    result = await session.execute(
+        keyset(statement, sort_column, id_column, limit, cursor)
+    )
+    return _page(result.unique().scalars().all(), sort_column, id_column, limit)
+
+
+async def fetch_rows(
+    session: AsyncSession,
+    statement: Select,
+    sort_column: Column,
+    id_column: Column,
+    limit: int,
+    cursor: str | None = None,
+) -> Page:
+    result = await session.execute(
+        keyset(statement, sort_column, id_column, limit, cursor)
+    )
+    return _page(result.all(), sort_column, id_column, limit)
+
+
+async def fetch_children(
+    session: AsyncSession,
+    foreign_key: Column,
+    columns: tuple[Column, ...],
+    parent_ids: list[str],
+) -> dict[str, list[tuple]]:
+    children: dict[str, list[tuple]] = {id: [] for id in parent_ids}
+    if parent_ids:
+        result = await session.execute(
+            select(foreign_key, *columns).where(foreign_key.in_(parent_ids))
+        )
+        for row in result:
+            children[row[0]].append(row[1:])
+    return children
+
+
+async def attach_children(
+    session: AsyncSession,
+    page: Page,
+    schema: type[BaseModel],
+    **foreign_keys: Column,
+) -> Page:
+    # Rows come in as the schema's scalars plus extra columns (the parent id
+    # among them); only the nested fields the schema asks for are queried.
+    size = len(scalar_fields(schema))
+    parent_ids = [row.id for row in page.items]
+    children = [
+        await fetch_children(
+            session,
+            foreign_keys[name],
+            columns(child, foreign_keys[name].class_),
+            parent_ids,
+        )
+        for name, child in nested_fields(schema)
+    ]
+    page.items = [
+        (*row[:size], *(nested[row.id] for nested in children)) for row in page.items
+    ]
+    return page
+
+
+def _page(items: list, sort_column: Column, id_column: Column, limit: int) -> Page:
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(
+            getattr(last, sort_column.key), getattr(last, id_column.key)
+        )
+    return Page(items=items, next_cursor=next_cursor)
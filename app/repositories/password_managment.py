@@ -1,3 +1,8 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
 from passlib.context import CryptContext
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -9,3 +14,60 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    def __init__(
+        self, max_workers: int | None = None, max_concurrency: int | None = None
+    ) -> None:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        self._executor = ProcessPoolExecutor(max_workers) if max_workers else None
+        self._max_concurrency = max_concurrency or max_workers or 1
+        self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._max_queued = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit(verify_password, plain_password, hashed_password)
+
+    async def _submit(self, fn: Callable, *args):
+        queued_at = time.perf_counter()
+        self._queued += 1
+        self._max_queued = max(self._max_queued, self._queued)
+        async with self._semaphore:
+            started_at = time.perf_counter()
+            self._queued -= 1
+            self._running += 1
+            self._wait_seconds += started_at - queued_at
+            try:
+                if self._executor is None:
+                    return fn(*args)
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, fn, *args)
+            finally:
+                self._running -= 1
+                self._completed += 1
+                self._run_seconds += time.perf_counter() - started_at
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self._max_concurrency,
+            "queued": self._queued,
+            "running": self._running,
+            "completed": self._completed,
+            "max_queued": self._max_queued,
+            "wait_seconds": self._wait_seconds,
+            "run_seconds": self._run_seconds,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
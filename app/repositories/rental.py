@@ -1,10 +1,18 @@
-from .db_session_handler import add_to_db
-from contextlib import AbstractContextManager
-from typing import Callable
+from .db_session_handler import add_to_db, async_add_to_db, async_stream_rows
+from contextlib import AbstractContextManager, AbstractAsyncContextManager
+from datetime import datetime
+from typing import AsyncIterator, Callable, Sequence
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models import Rental
-from app.schemas import RentalSchemaIn
-from sqlalchemy.orm import subqueryload
+from app.models import ArchivedRental, OverdueRental, Rental
+from .archive import history
+from .counters import adjust_loans
+from .loading import load_profile
+from .pagination import fetch_page, fetch_rows
+from .versions import TableVersions
+from app.schemas import RentalSchemaIn, Page
 
 
 class RentalRepository:
@@ -42,3 +50,185 @@ class RentalRepository:
                 .filter(Rental.id == id)
                 .update(rental.dict(exclude_unset=True))
             )
+
+
+class AsyncRentalRepository:
+    def __init__(
+        self,
+        session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+        read_session_factory: (
+            Callable[..., AbstractAsyncContextManager[AsyncSession]] | None
+        ) = None,
+        versions: TableVersions | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory or session_factory
+        self.versions = versions or TableVersions()
+
+    async def add(self, rental: RentalSchemaIn) -> Rental:
+        async with self.session_factory() as session:
+            rental = Rental(**rental.dict(exclude_unset=True))
+            try:
+                await adjust_loans(session, rental.book_id, 1)
+                await async_add_to_db(session, rental)
+            except IntegrityError:
+                raise ValueError(f"Book {rental.book_id} is already on loan")
+            self.versions.bump("rentals", "authors", "libraries")
+            return rental
+
+    async def close(self, id: str) -> Rental:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                update(Rental)
+                .where(Rental.id == id, Rental.closed_at.is_(None))
+                .values(closed_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            if not result.rowcount:
+                raise ValueError(f"Rental {id} is not open")
+            await adjust_loans(
+                session,
+                select(Rental.book_id).where(Rental.id == id).scalar_subquery(),
+                -1,
+            )
+            await session.execute(
+                delete(OverdueRental).where(OverdueRental.rental_id == id)
+            )
+            await session.commit()
+            self.versions.bump("rentals", "authors", "libraries")
+            return await session.get(
+                Rental,
+                id,
+                options=load_profile(Rental, "detail"),
+                populate_existing=True,
+            )
+
+    async def get_by_user(
+        self, user: str, archived: bool = False
+    ) -> list[Rental | ArchivedRental]:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Rental)
+                .options(*load_profile(Rental, "list"))
+                .filter(Rental.user_id == user)
+            )
+            rentals = result.unique().scalars().all()
+            if archived:
+                result = await session.execute(
+                    select(ArchivedRental).filter(ArchivedRental.user_id == user)
+                )
+                rentals += result.scalars().all()
+            return rentals
+
+    async def get_by_id(
+        self, id: str, archived: bool = False
+    ) -> Rental | ArchivedRental | None:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Rental)
+                .options(*load_profile(Rental, "detail"))
+                .filter(Rental.id == id)
+            )
+            rental = result.unique().scalars().first()
+            if rental is None and archived:
+                rental = await session.get(ArchivedRental, id)
+            return rental
+
+    async def get_all(self) -> list[Rental]:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(Rental).options(*load_profile(Rental, "list"))
+            )
+            return result.unique().scalars().all()
+
+    async def get_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        user: str | None = None,
+        archived: bool = False,
+    ) -> Page:
+        if archived:
+            return await self._get_history(limit, cursor, user)
+        async with self.read_session_factory() as session:
+            statement = select(Rental).options(*load_profile(Rental, "list"))
+            if user:
+                statement = statement.filter(Rental.user_id == user)
+            return await fetch_page(
+                session, statement, Rental.rented_at, Rental.id, limit, cursor
+            )
+
+    async def _get_history(
+        self, limit: int, cursor: str | None, user: str | None
+    ) -> Page:
+        rows = history(user, limit, cursor)
+        async with self.read_session_factory() as session:
+            page = await fetch_rows(
+                session, select(rows), rows.c.rented_at, rows.c.id, limit
+            )
+        page.items = [dict(row._mapping) for row in page.items]
+        return page
+
+    async def export(
+        self,
+        updated_since: datetime | None = None,
+        user_id: str | None = None,
+        book_id: str | None = None,
+    ) -> AsyncIterator[Sequence[dict]]:
+        async with self.read_session_factory() as session:
+            statement = select(*Rental.__table__.columns).order_by(Rental.id)
+            if updated_since:
+                statement = statement.where(Rental.updated_at >= updated_since)
+            if user_id:
+                statement = statement.where(Rental.user_id == user_id)
+            if book_id:
+                statement = statement.where(Rental.book_id == book_id)
+            async for batch in async_stream_rows(session, statement):
+                yield batch
+
+    async def delete(self, id: str) -> Rental:
+        async with self.session_factory() as session:
+            rental = await session.get(
+                Rental,
+                id,
+                options=load_profile(Rental, "delete"),
+                populate_existing=True,
+            )
+            if rental is None:
+                raise ValueError(f"Rental {id} not found")
+            if rental.closed_at is None:
+                await adjust_loans(session, rental.book_id, -1)
+            await session.execute(
+                delete(OverdueRental).where(OverdueRental.rental_id == id)
+            )
+            await session.delete(rental)
+            await session.commit()
+            self.versions.bump("rentals", "authors", "libraries")
+            return rental
+
+    async def update(self, id: str, rental: RentalSchemaIn) -> Rental:
+        values = rental.dict(exclude_unset=True)
+        async with self.session_factory() as session:
+            old = (
+                await session.execute(
+                    select(Rental.book_id, Rental.closed_at).where(Rental.id == id)
+                )
+            ).first()
+            await session.execute(
+                update(Rental)
+                .where(Rental.id == id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            moved = values.get("book_id", old.book_id) if old else None
+            if old and old.closed_at is None and moved != old.book_id:
+                await adjust_loans(session, old.book_id, -1)
+                await adjust_loans(session, moved, 1)
+            await session.commit()
+            self.versions.bump("rentals", "authors", "libraries")
+            return await session.get(
+                Rental,
+                id,
+                options=load_profile(Rental, "detail"),
+                populate_existing=True,
+            )
@@ -0,0 +1,195 @@
+import re
+from contextlib import AbstractAsyncContextManager
+from typing import Callable
+from sqlalchemy import Float, event, func, inspect, literal, literal_column, text
+from sqlalchemy import select, type_coerce, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select, column, table
+from app.db import Base
+from app.models import Author, Book
+from app.schemas import Page
+from .pagination import encode_cursor, keyset
+
+SEARCHABLE = {"book": Book, "author": Author}
+
+TERM = re.compile(r"\w+", re.UNICODE)
+
+FTS5_DDL = (
+    """CREATE VIRTUAL TABLE {table}_fts USING fts5(
+        name, content='{table}', content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN
+        INSERT INTO {table}_fts(rowid, name) VALUES (new.rowid, new.name);
+    END""",
+    """CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN
+        INSERT INTO {table}_fts({table}_fts, rowid, name)
+        VALUES ('delete', old.rowid, old.name);
+    END""",
+    """CREATE TRIGGER {table}_fts_update AFTER UPDATE OF name ON {table} BEGIN
+        INSERT INTO {table}_fts({table}_fts, rowid, name)
+        VALUES ('delete', old.rowid, old.name);
+        INSERT INTO {table}_fts(rowid, name) VALUES (new.rowid, new.name);
+    END""",
+)
+
+TSVECTOR_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_{table}_name_fts "
+    "ON {table} USING gin (to_tsvector('simple', name))"
+)
+
+
+def terms(query: str) -> list[str]:
+    found = TERM.findall(query)
+    if not found:
+        raise ValueError("Search query must contain at least one word")
+    return found
+
+
+class FTS5Search:
+    def create(self, connection: Connection) -> None:
+        inspector = inspect(connection)
+        for model in SEARCHABLE.values():
+            name = model.__tablename__
+            if inspector.has_table(f"{name}_fts"):
+                continue
+            for statement in FTS5_DDL:
+                connection.execute(text(statement.format(table=name)))
+            connection.execute(text(self.rebuild(model)))
+
+    def drop(self, connection: Connection) -> None:
+        for model in SEARCHABLE.values():
+            name = model.__tablename__
+            for trigger in ("insert", "delete", "update"):
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {name}_fts_{trigger}"))
+            connection.execute(text(f"DROP TABLE IF EXISTS {name}_fts"))
+
+    def match(self, kind: str, model, query: str) -> Select:
+        fts = table(f"{model.__tablename__}_fts", column("rowid"), column("rank"))
+        expression = " ".join(f'"{term}"*' for term in terms(query))
+        return (
+            select(
+                literal(kind).label("kind"),
+                model.id,
+                model.name,
+                type_coerce(fts.c.rank, Float).label("rank"),
+            )
+            .select_from(
+                fts.join(
+                    model.__table__,
+                    literal_column(f"{model.__tablename__}.rowid") == fts.c.rowid,
+                )
+            )
+            .where(literal_column(fts.name).op("MATCH")(expression))
+        )
+
+    def rebuild(self, model) -> str:
+        name = f"{model.__tablename__}_fts"
+        return f"INSERT INTO {name}({name}) VALUES ('rebuild')"
+
+
+class TsvectorSearch:
+    def create(self, connection: Connection) -> None:
+        for model in SEARCHABLE.values():
+            connection.execute(text(TSVECTOR_DDL.format(table=model.__tablename__)))
+
+    def drop(self, connection: Connection) -> None:
+        for model in SEARCHABLE.values():
+            name = model.__tablename__
+            connection.execute(text(f"DROP INDEX IF EXISTS ix_{name}_name_fts"))
+
+    def match(self, kind: str, model, query: str) -> Select:
+        config = literal_column("'simple'")
+        vector = func.to_tsvector(config, model.name)
+        tsquery = func.to_tsquery(
+            config, " & ".join(f"{term}:*" for term in terms(query))
+        )
+        return select(
+            literal(kind).label("kind"),
+            model.id,
+            model.name,
+            type_coerce(-func.ts_rank(vector, tsquery), Float).label("rank"),
+        ).where(vector.op("@@")(tsquery))
+
+    def rebuild(self, model) -> str:
+        return f"REINDEX INDEX ix_{model.__tablename__}_name_fts"
+
+
+class LikeSearch:
+    def create(self, connection: Connection) -> None:
+        return None
+
+    def drop(self, connection: Connection) -> None:
+        return None
+
+    def match(self, kind: str, model, query: str) -> Select:
+        terms(query)
+        return select(
+            literal(kind).label("kind"),
+            model.id,
+            model.name,
+            type_coerce(literal(0.0), Float).label("rank"),
+        ).where(model.name.contains(query.strip(), autoescape=True))
+
+    def rebuild(self, model) -> None:
+        return None
+
+
+BACKENDS = {"sqlite": FTS5Search, "postgresql": TsvectorSearch}
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_search_index(target, connection: Connection, **kw) -> None:
+    BACKENDS.get(connection.dialect.name, LikeSearch)().create(connection)
+
+
+class AsyncSearchRepository:
+    def __init__(
+        self,
+        session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+        backend: FTS5Search | TsvectorSearch | LikeSearch | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self._backend = backend
+
+    def backend(
+        self, session: AsyncSession
+    ) -> FTS5Search | TsvectorSearch | LikeSearch:
+        if self._backend is None:
+            self._backend = BACKENDS.get(session.bind.dialect.name, LikeSearch)()
+        return self._backend
+
+    async def search(
+        self,
+        query: str,
+        kinds: list[str] | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> Page:
+        async with self.session_factory() as session:
+            backend = self.backend(session)
+            matches = union_all(
+                *(
+                    backend.match(kind, SEARCHABLE[kind], query)
+                    for kind in kinds or SEARCHABLE
+                )
+            ).subquery()
+            result = await session.execute(
+                keyset(select(matches), matches.c.rank, matches.c.id, limit, cursor)
+            )
+            items = [dict(row) for row in result.mappings()]
+            next_cursor = None
+            if len(items) > limit:
+                items = items[:limit]
+                next_cursor = encode_cursor(items[-1]["rank"], items[-1]["id"])
+            return Page(items=items, next_cursor=next_cursor)
+
+    async def rebuild(self) -> None:
+        async with self.session_factory() as session:
+            backend = self.backend(session)
+            for model in SEARCHABLE.values():
+                statement = backend.rebuild(model)
+                if statement:
+                    await session.execute(text(statement))
+            await session.commit()
@@ -1,11 +1,14 @@
-from .db_session_handler import add_to_db
-from contextlib import AbstractContextManager
+from .db_session_handler import add_to_db, async_add_to_db
+from contextlib import AbstractContextManager, AbstractAsyncContextManager
 from typing import Callable
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models import User
-from app.schemas import UserSchemaIn
-from .password_managment import hash_password
-from sqlalchemy.orm import subqueryload
+from .loading import load_profile
+from .pagination import fetch_page
+from app.schemas import UserSchemaIn, Page
+from .password_managment import PasswordHasher, hash_password
 
 
 class UserRepository:
@@ -35,7 +38,7 @@ class UserRepository:
 
     def get_all(self) -> list[User]:
         with self.session_factory() as session:
-            return session.query(User).options(subqueryload(User.rentals)).all()
+            return session.query(User).options(*load_profile(User, "list")).all()
 
     def delete(self, id: int) -> User:
         with self.session_factory() as session:
@@ -50,3 +53,95 @@ class UserRepository:
                 .filter(User.id == id)
                 .update(user.dict(exclude_unset=True))
             )
+
+
+class AsyncUserRepository:
+    def __init__(
+        self,
+        session_factory: Callable[..., AbstractAsyncContextManager[AsyncSession]],
+        password_hasher: PasswordHasher,
+        read_session_factory: (
+            Callable[..., AbstractAsyncContextManager[AsyncSession]] | None
+        ) = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.read_session_factory = read_session_factory or session_factory
+        self.password_hasher = password_hasher
+
+    async def add(self, user: UserSchemaIn) -> User:
+        async with self.session_factory() as session:
+            user = User(**user.dict(exclude_unset=True))
+            user.password = await self.password_hasher.hash(user.password)
+            await async_add_to_db(session, user)
+            return user
+
+    async def get_by_name(self, name: str) -> list[User]:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(User)
+                .options(*load_profile(User, "list"))
+                .filter(User.name == name)
+            )
+            return result.unique().scalars().all()
+
+    async def get_by_email(self, email: str) -> list[User]:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(User)
+                .options(*load_profile(User, "list"))
+                .filter(User.email == email)
+            )
+            return result.unique().scalars().all()
+
+    async def get_by_id(self, id: str) -> User:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(User)
+                .options(*load_profile(User, "detail"))
+                .filter(User.id == id)
+            )
+            return result.unique().scalars().first()
+
+    async def get_all(self) -> list[User]:
+        async with self.read_session_factory() as session:
+            result = await session.execute(
+                select(User).options(*load_profile(User, "list"))
+            )
+            return result.unique().scalars().all()
+
+    async def get_page(self, limit: int, cursor: str | None = None) -> Page:
+        async with self.read_session_factory() as session:
+            return await fetch_page(
+                session,
+                select(User).options(*load_profile(User, "list")),
+                User.name,
+                User.id,
+                limit,
+                cursor,
+            )
+
+    async def delete(self, id: str) -> User:
+        async with self.session_factory() as session:
+            user = await session.get(
+                User, id, options=load_profile(User, "delete"), populate_existing=True
+            )
+            if user is None:
+                raise ValueError(f"User {id} not found")
+            await session.delete(user)
+            await session.commit()
+            return user
+
+    async def update(self, id: str, user: UserSchemaIn) -> User:
+        async with self.session_factory() as session:
+            if user.password:
+                user.password = await self.password_hasher.hash(user.password)
+            await session.execute(
+                update(User)
+                .where(User.id == id)
+                .values(**user.dict(exclude_unset=True))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+            return await session.get(
+                User, id, options=load_profile(User, "detail"), populate_existing=True
+            )
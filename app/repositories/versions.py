@@ -0,0 +1,54 @@
+import secrets
+import time
+from hashlib import blake2b
+from typing import Iterable
+from app.db import after_unit_of_work
+
+
+class TableVersions:
+    # Counters live in the process, like EntityCache. The epoch changes on
+    # every start so tags handed out by an earlier process never match, and
+    # rolls every ttl seconds: another worker's writes never bump these
+    # counters, so like a cache entry a tag is only trusted for the TTL.
+    def __init__(self, ttl: float = 60.0) -> None:
+        self._epoch = secrets.token_hex(4)
+        self._ttl = ttl
+        self._versions: dict[str, int] = {}
+
+    def bump(self, *tables: str) -> None:
+        self._increment(tables)
+        # Inside a unit of work the rows only land when it commits. Bump again
+        # then, so a tag handed out in between does not outlive the old rows.
+        after_unit_of_work(lambda: self._increment(tables))
+
+    def _increment(self, tables: Iterable[str]) -> None:
+        for table in tables:
+            self._versions[table] = self._versions.get(table, 0) + 1
+
+    def get(self, table: str) -> int:
+        return self._versions.get(table, 0)
+
+    def etag(self, tables: Iterable[str], query: str = "") -> str:
+        versions = ".".join(str(self.get(table)) for table in tables)
+        digest = blake2b(query.encode(), digest_size=6).hexdigest()
+        # A TTL of 0 turns caching off, so no tag is ever handed out twice.
+        if self._ttl > 0:
+            window = str(int(time.time() // self._ttl))
+        else:
+            window = secrets.token_hex(4)
+        return f'W/"{self._epoch}.{window}.{versions}.{digest}"'
+
+    def stats(self) -> dict:
+        return dict(self._versions)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
@@ -1,9 +1,18 @@
-from fastapi import APIRouter, status, HTTPException, Depends
-from app.services.author import AuthorService
-from app.services.book import BookService
-from app.services.library import LibraryService
-from app.services.user import UserService
-from app.services.rental import RentalService
+from datetime import datetime
+from typing import Literal
+from urllib.parse import urlencode
+from fastapi import APIRouter, status, HTTPException, Depends, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from app.services.author import AsyncAuthorService
+from app.services.book import AsyncBookService
+from app.services.library import AsyncLibraryService
+from app.services.user import AsyncUserService
+from app.services.rental import AsyncRentalService
+from app.services.auth import AuthService
+from app.services.search import AsyncSearchService
+from app.services.overdue import OverdueScanner
+from app.services.counters import CounterReconciler
+from app.services.archive import RentalArchiver
 from app.containers import Container
 from dependency_injector.wiring import inject, Provide
 from app.schemas import (
@@ -11,44 +20,67 @@ from app.schemas import (
     BookSchema,
     LibrarySchema,
     AuthorSchema,
+    AuthorCountsSchema,
+    LibraryCountsSchema,
     BookSchemaIn,
     LibrarySchemaIn,
     UserSchemaIn,
     RentalSchemaIn,
+    RentalSchema,
+    OverdueRentalSchema,
+    UserSchema,
+    BulkResultSchema,
+    SearchResultSchema,
+    Page,
 )
-from app.repositories.password_managment import verify_password
+from app.repositories.password_managment import PasswordHasher
+from app.repositories.cache import EntityCache
+from app.repositories.versions import TableVersions, etag_matches
+from app.metrics import Metrics
+from app.single_flight import SingleFlight
+from app.serialization import model_response, page_response, sparse_schema
+from app.services.bulk import read_records
+from app.services.export import MEDIA_TYPES, export_stream
 from fastapi.security import OAuth2PasswordBearer
-import datetime
-from dotenv import load_dotenv
-from os import environ
 import jwt
 
 router = APIRouter()
 
-load_dotenv()
-
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+PAGE_LIMIT = Query(50, ge=1, le=500)
+
+
+def split_ids(values: list[str] | None) -> list[str]:
+    return [id for value in values or () for id in value.split(",") if id]
+
+
+class TableETag:
+    def __init__(self, *tables: str) -> None:
+        self.tables = tables
 
-def create_jwt_token(data: dict) -> str:
-    expiration = datetime.datetime.utcnow() + datetime.timedelta(hours=1)
-    data.update({"exp": expiration})
-    token = jwt.encode(
-        data,
-        str(environ.get("SECRET_KEY")),
-        algorithm=str(environ.get("ALGORITHM")),
-    )
-    return token
+    @inject
+    async def __call__(
+        self,
+        request: Request,
+        versions: TableVersions = Depends(Provide[Container.table_versions]),
+    ) -> str:
+        query = urlencode(sorted(request.query_params.multi_items()))
+        etag = versions.etag(self.tables, query)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+        return etag
 
 
-def decode_jwt_token(token: str) -> dict[str, str]:
+@inject
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    auth_service: AuthService = Depends(Provide[Container.auth_service]),
+) -> dict:
     try:
-        payload = jwt.decode(
-            token,
-            str(environ.get("SECRET_KEY")),
-            algorithms=[str(environ.get("ALGORITHM"))],
-        )
-        return payload
+        return auth_service.decode_token(token)
     except jwt.ExpiredSignatureError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has expired"
@@ -59,36 +91,83 @@ def decode_jwt_token(token: str) -> dict[str, str]:
         )
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
-    payload = decode_jwt_token(token)
-    return payload
-
-
 @router.get("/", status_code=status.HTTP_200_OK, tags=["root"])
 async def root():
     return
 
 
+@router.get("/stats", status_code=status.HTTP_200_OK, tags=["root"])
+@inject
+async def get_stats(
+    password_hasher: PasswordHasher = Depends(Provide[Container.password_hasher]),
+    auth_service: AuthService = Depends(Provide[Container.auth_service]),
+    entity_cache: EntityCache = Depends(Provide[Container.entity_cache]),
+    overdue_scanner: OverdueScanner = Depends(Provide[Container.overdue_scanner]),
+    counter_reconciler: CounterReconciler = Depends(
+        Provide[Container.counter_reconciler]
+    ),
+    rental_archiver: RentalArchiver = Depends(Provide[Container.rental_archiver]),
+    single_flight: SingleFlight = Depends(Provide[Container.single_flight]),
+    user: dict = Depends(get_current_user),
+):
+    if user["is_superuser"]:
+        return {
+            "password_hasher": password_hasher.stats(),
+            "auth": auth_service.stats(),
+            "entity_cache": entity_cache.stats(),
+            "overdue_scanner": overdue_scanner.stats(),
+            "counter_reconciler": counter_reconciler.stats(),
+            "rental_archiver": rental_archiver.stats(),
+            "single_flight": single_flight.stats(),
+        }
+    raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@router.get("/search", status_code=status.HTTP_200_OK, tags=["search"])
+@inject
+async def search(
+    q: str = Query(..., min_length=1),
+    kind: Literal["book", "author"] = None,
+    limit: int = PAGE_LIMIT,
+    cursor: str = None,
+    search_service: AsyncSearchService = Depends(
+        Provide[Container.async_search_service]
+    ),
+) -> Page[SearchResultSchema]:
+    try:
+        return await search_service.search(q, kind, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/metrics", tags=["root"], response_class=PlainTextResponse)
+@inject
+async def get_metrics(metrics: Metrics = Depends(Provide[Container.metrics])):
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 @router.post("/token")
 @inject
 async def generate_token(
     email: str,
     password: str,
-    user_service: UserService = Depends(Provide[Container.user_service]),
+    user_service: AsyncUserService = Depends(Provide[Container.async_user_service]),
+    password_hasher: PasswordHasher = Depends(Provide[Container.password_hasher]),
+    auth_service: AuthService = Depends(Provide[Container.auth_service]),
 ):
-    user = user_service.get_user(email=email)
+    user = await user_service.get_user(email=email)
     if user:
         user = user[0]
     else:
         raise HTTPException(404, detail="User not found")
-    if verify_password(password, user.password):
+    if await password_hasher.verify(password, user.password):
         if user.is_active:
             user_data = {
                 "id": user.id,
                 "name": user.email,
                 "is_superuser": user.is_superuser,
             }
-            token = create_jwt_token(user_data)
+            token = auth_service.create_token(user_data)
             return {"access_token": token, "token_type": "bearer"}
         raise HTTPException(401, detail="User is not active")
     else:
@@ -101,11 +180,39 @@ async def generate_token(
 @router.get("/book", status_code=status.HTTP_200_OK, tags=["book"])
 @inject
 async def get_book(
-    id: str = None,
+    id: list[str] = Query(None),
     name: str = None,
-    book_service: BookService = Depends(Provide[Container.book_service]),
-) -> BookSchema | list[BookSchema]:
-    books = book_service.get_book(id, name)
+    limit: int = PAGE_LIMIT,
+    cursor: str = None,
+    fields: str = None,
+    available: bool = None,
+    library_id: str = None,
+    book_service: AsyncBookService = Depends(Provide[Container.async_book_service]),
+    response: Response = None,
+    etag: str = Depends(TableETag("books", "rentals")),
+) -> BookSchema | list[BookSchema] | Page[BookSchema]:
+    response.headers["ETag"] = etag
+    ids = split_ids(id)
+    try:
+        schema = sparse_schema(BookSchema, fields)
+        if not ids and not name:
+            return page_response(
+                schema,
+                await book_service.get_book_rows(
+                    limit, cursor, available, library_id, schema
+                ),
+                {"ETag": etag},
+            )
+        if len(ids) > 1:
+            books = await book_service.get_books(ids)
+        else:
+            books = await book_service.get_book(
+                ids[0] if ids else None, name, limit, cursor, available, library_id
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if books and fields:
+        return model_response(schema, books, {"ETag": etag})
     if books:
         return books
     raise HTTPException(status_code=404, detail="Book not found.")
@@ -115,29 +222,62 @@ async def get_book(
 @inject
 async def create_book(
     book: BookSchemaIn,
-    book_service: BookService = Depends(Provide[Container.book_service]),
-    token: str = Depends(oauth2_scheme),
+    book_service: AsyncBookService = Depends(Provide[Container.async_book_service]),
+    user: dict = Depends(get_current_user),
 ):
-    user = await get_current_user(token)
     if user["is_superuser"]:
         try:
-            return book_service.create_book(book)
+            return await book_service.create_book(book)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=401, detail="Unauthorized")
 
 
+@router.post("/book/bulk", status_code=status.HTTP_200_OK, tags=["book"])
+@inject
+async def import_books(
+    request: Request,
+    book_service: AsyncBookService = Depends(Provide[Container.async_book_service]),
+    user: dict = Depends(get_current_user),
+) -> BulkResultSchema:
+    if user["is_superuser"]:
+        records = read_records(
+            request.stream(), request.headers.get("content-type", "")
+        )
+        return await book_service.import_books(records)
+    raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+@router.get("/book/export", status_code=status.HTTP_200_OK, tags=["book"])
+@inject
+async def export_books(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    updated_since: datetime = None,
+    author_id: str = None,
+    library_id: str = None,
+    book_service: AsyncBookService = Depends(Provide[Container.async_book_service]),
+    user: dict = Depends(get_current_user),
+) -> StreamingResponse:
+    if user["is_superuser"]:
+        batches = book_service.export_books(
+            updated_since=updated_since, author_id=author_id, library_id=library_id
+        )
+        return StreamingResponse(
+            export_stream(batches, format), media_type=MEDIA_TYPES[format]
+        )
+    raise HTTPException(status_code=401, detail="Unauthorized")
+
+
 @router.delete("/book", status_code=status.HTTP_200_OK, tags=["book"])
 @inject
 async def delete_book(
     id: str,
-    book_service: BookService = Depends(Provide[Container.book_service]),
-    token: str = Depends(oauth2_scheme),
-):
-    user = await get_current_user(token)
+    book_service: AsyncBookService = Depends(Provide[Container.async_book_service]),
+    user: dict = Depends(get_current_user),
+) -> BookSchema:
     if user["is_superuser"]:
         try:
-            return book_service.delete_book(id)
+            return await book_service.delete_book(id)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=401, detail="Unauthorized")
@@ -148,13 +288,12 @@ async def delete_book(
 async def update_book(
     id: str,
     book: BookSchemaIn,
-    book_service: BookService = Depends(Provide[Container.book_service]),
-    token: str = Depends(oauth2_scheme),
+    book_service: AsyncBookService = Depends(Provide[Container.async_book_service]),
+    user: dict = Depends(get_current_user),
 ):
-    user = await get_current_user(token)
     if user["is_superuser"]:
         try:
-            return book_service.update_book(id, book)
+            return await book_service.update_book(id, book)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=401, detail="Unauthorized")
@@ -163,12 +302,41 @@ async def update_book(
 @router.get("/author", status_code=status.HTTP_200_OK, tags=["author"])
 @inject
 async def get_author(
-    id: str = None,
+    id: list[str] = Query(None),
     name: str = None,
-    author_service: AuthorService = Depends(Provide[Container.author_service]),
-) -> list[AuthorSchema] | AuthorSchema:
-    authors = author_service.get_author(id, name)
+    limit: int = PAGE_LIMIT,
+    cursor: str = None,
+    fields: str = None,
+    counts: bool = False,
+    author_service: AsyncAuthorService = Depends(
+        Provide[Container.async_author_service]
+    ),
+    response: Response = None,
+    etag: str = Depends(TableETag("authors", "books")),
+) -> list[AuthorSchema] | AuthorSchema | Page[AuthorSchema]:
+    response.headers["ETag"] = etag
+    ids = split_ids(id)
+    try:
+        schema = sparse_schema(AuthorCountsSchema if counts else AuthorSchema, fields)
+        if counts and (ids or name):
+            raise ValueError("counts is only supported on list pages")
+        if not ids and not name:
+            return page_response(
+                schema,
+                await author_service.get_author_rows(limit, cursor, schema),
+                {"ETag": etag},
+            )
+        if len(ids) > 1:
+            authors = await author_service.get_authors(ids)
+        else:
+            authors = await author_service.get_author(
+                ids[0] if ids else None, name, limit, cursor
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
+    if authors and fields:
+        return model_response(schema, authors, {"ETag": etag})
     if authors:
         return authors
     raise HTTPException(status_code=404, detail="Author not found.")
@@ -178,45 +346,84 @@ async def get_author(
 @inject
 async def create_author(
     author: AuthorSchemaIn,
-    author_service: AuthorService = Depends(Provide[Container.author_service]),
-    token: str = Depends(oauth2_scheme),
+    author_service: AsyncAuthorService = Depends(
+        Provide[Container.async_author_service]
+    ),
+    user: dict = Depends(get_current_user),
 ):
-    user = await get_current_user(token)
     if user["is_superuser"]:
         try:
-            return author_service.create_author(author)
+            return await author_service.create_author(author)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=401, detail="Unauthorized")
 
 
+@router.post("/author/bulk", status_code=status.HTTP_200_OK, tags=["author"])
+@inject
+async def import_authors(
+    request: Request,
+    author_service: AsyncAuthorService = Depends(
+        Provide[Container.async_author_service]
+    ),
+    user: dict = Depends(get_current_user),
+) -> BulkResultSchema:
+    if user["is_superuser"]:
+        records = read_records(
+            request.stream(), request.headers.get("content-type", "")
+        )
+        return await author_service.import_authors(records)
+    raise HTTPException(status_code=401, detail="Unauthorized")
+
+
+@router.get("/author/export", status_code=status.HTTP_200_OK, tags=["author"])
+@inject
+async def export_authors(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    updated_since: datetime = None,
+    author_service: AsyncAuthorService = Depends(
+        Provide[Container.async_author_service]
+    ),
+    user: dict = Depends(get_current_user),
+) -> StreamingResponse:
+    if user["is_superuser"]:
+        batches = author_service.export_authors(updated_since=updated_since)
+        return StreamingResponse(
+            export_stream(batches, format), media_type=MEDIA_TYPES[format]
+        )
+    raise HTTPException(status_code=401, detail="Unauthorized")
+
+
 @router.delete("/author", status_code=status.HTTP_200_OK, tags=["author"])
 @inject
 async def delete_author(
     id: str,
-    author_service: AuthorService = Depends(Provide[Container.author_service]),
-    token: str = Depends(oauth2_scheme),
-):
-    user = await get_current_user(token)
+    author_service: AsyncAuthorService = Depends(
+        Provide[Container.async_author_service]
+    ),
+    user: dict = Depends(get_current_user),
+) -> AuthorSchema:
     if user["is_superuser"]:
         try:
-            return author_service.delete_author(id)
+            return await author_service.delete_author(id)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=401, detail="Unauthorized")
 
 
 @router.put("/author", status_code=status.HTTP_200_OK, tags=["author"])
+@inject
 async def update_author(
     id: str,
     author: AuthorSchemaIn,
-    author_service: AuthorService = Depends(Provide[Container.author_service]),
-    token: str = Depends(oauth2_scheme),
+    author_service: AsyncAuthorService = Depends(
+        Provide[Container.async_author_service]
+    ),
+    user: dict = Depends(get_current_user),
 ):
-    user = await get_current_user(token)
     if user["is_superuser"]:
         try:
-            return author_service.update_author(id, author)
+            return await author_service.update_author(id, author)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=401, detail="Unauthorized")
@@ -225,11 +432,40 @@ async def update_author(
 @router.get("/library", status_code=status.HTTP_200_OK, tags=["library"])
 @inject
 async def get_library(
-    id: str = None,
+    id: list[str] = Query(None),
     city: str = None,
-    library_service: LibraryService = Depends(Provide[Container.library_service]),
-) -> LibrarySchema | list[LibrarySchema]:
-    library = library_service.get_library(id, city)
+    limit: int = PAGE_LIMIT,
+    cursor: str = None,
+    fields: str = None,
+    counts: bool = False,
+    library_service: AsyncLibraryService = Depends(
+        Provide[Container.async_library_service]
+    ),
+    response: Response = None,
+    etag: str = Depends(TableETag("libraries", "books")),
+) -> LibrarySchema | list[LibrarySchema] | Page[LibrarySchema]:
+    response.headers["ETag"] = etag
+    ids = split_ids(id)
+    try:
+        schema = sparse_schema(LibraryCountsSchema if counts else LibrarySchema, fields)
+        if counts and (ids or city):
+            raise ValueError("counts is only supported on list pages")
+        if not ids and not city:
+            return page_response(
+                schema,
+                await library_service.get_library_rows(limit, cursor, schema),
+                {"ETag": etag},
+            )
+        if len(ids) > 1:
+            library = await library_service.get_libraries(ids)
+        else:
+            library = await library_service.get_library(
+                ids[0] if ids else None, city, limit, cursor
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if library and fields:
+        return model_response(schema, library, {"ETag": etag})
     if library:
         return library
     raise HTTPException(status_code=404, detail="Library not found.")
@@ -239,29 +475,69 @@ async def get_library(
 @inject
 async def create_library(
     library: LibrarySchemaIn,
-    library_service: LibraryService = Depends(Provide[Container.library_service]),
-    token: str = Depends(oauth2_scheme),
+    library_service: AsyncLibraryService = Depends(
+        Provide[Container.async_library_service]
+    ),
+    user: dict = Depends(get_current_user),
 ):
-    user = await get_current_user(token)
     if user["is_superuser"]:
         try:
-            return library_service.create_library(library)
+            return await library_service.create_library(library)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=403, detail="Forbidden")
 
 
+@router.post("/library/bulk", status_code=status.HTTP_200_OK, tags=["library"])
+@inject
+async def import_libraries(
+    request: Request,
+    library_service: AsyncLibraryService = Depends(
+        Provide[Container.async_library_service]
+    ),
+    user: dict = Depends(get_current_user),
+) -> BulkResultSchema:
+    if user["is_superuser"]:
+        records = read_records(
+            request.stream(), request.headers.get("content-type", "")
+        )
+        return await library_service.import_libraries(records)
+    raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@router.get("/library/export", status_code=status.HTTP_200_OK, tags=["library"])
+@inject
+async def export_libraries(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    updated_since: datetime = None,
+    city: str = None,
+    library_service: AsyncLibraryService = Depends(
+        Provide[Container.async_library_service]
+    ),
+    user: dict = Depends(get_current_user),
+) -> StreamingResponse:
+    if user["is_superuser"]:
+        batches = library_service.export_libraries(
+            updated_since=updated_since, city=city
+        )
+        return StreamingResponse(
+            export_stream(batches, format), media_type=MEDIA_TYPES[format]
+        )
+    raise HTTPException(status_code=401, detail="Unauthorized")
+
+
 @router.delete("/library", status_code=status.HTTP_200_OK, tags=["library"])
 @inject
 async def delete_library(
     id: str,
-    library_service: LibraryService = Depends(Provide[Container.library_service]),
-    token: str = Depends(oauth2_scheme),
-):
-    user = await get_current_user(token)
+    library_service: AsyncLibraryService = Depends(
+        Provide[Container.async_library_service]
+    ),
+    user: dict = Depends(get_current_user),
+) -> LibrarySchema:
     if user["is_superuser"]:
         try:
-            return library_service.delete_library(id)
+            return await library_service.delete_library(id)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=403, detail="Forbidden")
@@ -272,13 +548,14 @@ async def delete_library(
 async def update_library(
     id: str,
     library: LibrarySchemaIn,
-    library_service: LibraryService = Depends(Provide[Container.library_service]),
-    token: str = Depends(oauth2_scheme),
+    library_service: AsyncLibraryService = Depends(
+        Provide[Container.async_library_service]
+    ),
+    user: dict = Depends(get_current_user),
 ):
-    user = await get_current_user(token)
     if user["is_superuser"]:
         try:
-            return library_service.update_library(id, library)
+            return await library_service.update_library(id, library)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=403, detail="Forbidden")
@@ -289,9 +566,14 @@ async def update_library(
 async def get_user(
     id: str = None,
     name: str = None,
-    user_service: AuthorService = Depends(Provide[Container.user_service]),
+    limit: int = PAGE_LIMIT,
+    cursor: str = None,
+    user_service: AsyncUserService = Depends(Provide[Container.async_user_service]),
 ):
-    users = user_service.get_user(id, name)
+    try:
+        users = await user_service.get_user(id, name, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if users:
         return users
     raise HTTPException(status_code=404, detail="User not found.")
@@ -301,10 +583,10 @@ async def get_user(
 @inject
 async def create_user(
     user: UserSchemaIn,
-    user_service: AuthorService = Depends(Provide[Container.user_service]),
+    user_service: AsyncUserService = Depends(Provide[Container.async_user_service]),
 ):
     try:
-        return user_service.create_user(user)
+        return await user_service.create_user(user)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -314,13 +596,12 @@ async def create_user(
 async def update_user(
     id: str,
     userUpdate: UserSchemaIn,
-    user_service: AuthorService = Depends(Provide[Container.user_service]),
-    token: str = Depends(oauth2_scheme),
+    user_service: AsyncUserService = Depends(Provide[Container.async_user_service]),
+    user: dict = Depends(get_current_user),
 ):
-    user = await get_current_user(token)
     if user["is_superuser"] or id == user["id"]:
         try:
-            return user_service.update_user(id, userUpdate)
+            return await user_service.update_user(id, userUpdate)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=403, detail="You can't update this user.")
@@ -330,13 +611,12 @@ async def update_user(
 @inject
 async def delete_user(
     id: str,
-    user_service: RentalService = Depends(Provide[Container.user_service]),
-    token: str = Depends(oauth2_scheme),
-):
-    user = await get_current_user(token)
+    user_service: AsyncUserService = Depends(Provide[Container.async_user_service]),
+    user: dict = Depends(get_current_user),
+) -> UserSchema:
     if user["is_superuser"] or id == user["id"]:
         try:
-            return user_service.delete_user(id)
+            return await user_service.delete_user(id)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=403, detail="You can't delete this user.")
@@ -346,13 +626,24 @@ async def delete_user(
 @inject
 async def get_rental(
     id: str = None,
-    rental_service: RentalService = Depends(Provide[Container.rental_service]),
-    token: str = Depends(oauth2_scheme),
+    limit: int = PAGE_LIMIT,
+    cursor: str = None,
+    archived: bool = False,
+    rental_service: AsyncRentalService = Depends(
+        Provide[Container.async_rental_service]
+    ),
+    user: dict = Depends(get_current_user),
 ):
-    user = await get_current_user(token)
-    rentals = rental_service.get_rental(id, user["id"])
+    try:
+        rentals = await rental_service.get_rental(
+            id, user["id"], limit, cursor, archived
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not id:
+        return rentals
     if rentals:
-        if user["is_superuser"] or rentals[0].user_id == user["id"]:
+        if user["is_superuser"] or rentals.user_id == user["id"]:
             return rentals
         raise HTTPException(
             status_code=403, detail="You are not allowed to see this rental."
@@ -360,33 +651,95 @@ async def get_rental(
     raise HTTPException(status_code=404, detail="Rental not found.")
 
 
+@router.get("/rental/overdue", status_code=status.HTTP_200_OK, tags=["rental"])
+@inject
+async def get_overdue_rentals(
+    limit: int = PAGE_LIMIT,
+    cursor: str = None,
+    overdue_scanner: OverdueScanner = Depends(Provide[Container.overdue_scanner]),
+    user: dict = Depends(get_current_user),
+) -> Page[OverdueRentalSchema]:
+    user_id = None if user["is_superuser"] else user["id"]
+    try:
+        return await overdue_scanner.get_overdue(user_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/rental/export", status_code=status.HTTP_200_OK, tags=["rental"])
+@inject
+async def export_rentals(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    updated_since: datetime = None,
+    user_id: str = None,
+    book_id: str = None,
+    rental_service: AsyncRentalService = Depends(
+        Provide[Container.async_rental_service]
+    ),
+    user: dict = Depends(get_current_user),
+) -> StreamingResponse:
+    if user["is_superuser"]:
+        batches = rental_service.export_rentals(
+            updated_since=updated_since, user_id=user_id, book_id=book_id
+        )
+        return StreamingResponse(
+            export_stream(batches, format), media_type=MEDIA_TYPES[format]
+        )
+    raise HTTPException(status_code=401, detail="Unauthorized")
+
+
 @router.post("/rental", status_code=status.HTTP_201_CREATED, tags=["rental"])
 @inject
 async def create_rental(
     rental: RentalSchemaIn,
-    rental_service: RentalService = Depends(Provide[Container.rental_service]),
-    token: str = Depends(oauth2_scheme),
+    rental_service: AsyncRentalService = Depends(
+        Provide[Container.async_rental_service]
+    ),
+    user: dict = Depends(get_current_user),
 ):
-    user = await get_current_user(token)
     try:
         rental = rental.copy(update={"user_id": user["id"]})
-        return rental_service.create_rental(rental)
+        return await rental_service.create_rental(rental)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@router.post("/rental/return", status_code=status.HTTP_200_OK, tags=["rental"])
+@inject
+async def return_rental(
+    id: str,
+    rental_service: AsyncRentalService = Depends(
+        Provide[Container.async_rental_service]
+    ),
+    user: dict = Depends(get_current_user),
+) -> RentalSchema:
+    rental = await rental_service.get_rental(id)
+    if rental is None:
+        raise HTTPException(status_code=404, detail="Rental not found.")
+    if user["id"] == rental.user_id or user["is_superuser"]:
+        try:
+            return await rental_service.return_rental(id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    raise HTTPException(status_code=400, detail="You can't return other user's rental.")
+
+
 @router.put("/rental", status_code=status.HTTP_200_OK, tags=["rental"])
 @inject
 async def update_rental(
     id: str,
     rental: RentalSchemaIn,
-    rental_service: RentalService = Depends(Provide[Container.rental_service]),
-    token: str = Depends(oauth2_scheme),
+    rental_service: AsyncRentalService = Depends(
+        Provide[Container.async_rental_service]
+    ),
+    user: dict = Depends(get_current_user),
 ):
-    user = await get_current_user(token)
-    if user["id"] == rental_service.get_rental(id)[0].user_id or user["is_superuser"]:
+    if (
+        user["id"] == (await rental_service.get_rental(id)).user_id
+        or user["is_superuser"]
+    ):
         try:
-            return rental_service.update_rental(id, rental)
+            return await rental_service.update_rental(id, rental)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=400, detail="You can't update other user's rental.")
@@ -396,12 +749,14 @@ async def update_rental(
 @inject
 async def delete_rental(
     id: str,
-    rental_service: AuthorService = Depends(Provide[Container.rental_service]),
+    rental_service: AsyncRentalService = Depends(
+        Provide[Container.async_rental_service]
+    ),
     user: dict = Depends(get_current_user),
-):
+) -> RentalSchema:
     if user["id"] == id:
         try:
-            return rental_service.delete_rental(id)
+            return await rental_service.delete_rental(id)
         except Exception as e:
             raise HTTPException(status_code=400, detail=str(e))
     raise HTTPException(status_code=400, detail="You can't delete other user's rental.")
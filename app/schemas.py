@@ -1,9 +1,12 @@
 from __future__ import annotations
 from pydantic import BaseModel, BaseConfig, EmailStr, validator
-from datetime import date
-from typing import List, Optional
+from pydantic.generics import GenericModel
+from datetime import date, datetime
+from typing import Generic, List, Optional, TypeVar
 from uuid import UUID
 
+T = TypeVar("T")
+
 
 class UserSchema(BaseModel):
     id: UUID
@@ -42,6 +45,18 @@ class RentalSchema(BaseModel):
     id: UUID
     rented_at: date
     returned_at: date
+    closed_at: Optional[datetime]
+
+    class Config(BaseConfig):
+        orm_mode = True
+
+
+class OverdueRentalSchema(BaseModel):
+    rental_id: UUID
+    user_id: str
+    book_id: str
+    due_at: date
+    detected_at: datetime
 
     class Config(BaseConfig):
         orm_mode = True
@@ -84,6 +99,27 @@ class LibrarySchema(BaseModel):
         orm_mode = True
 
 
+class AuthorCountsSchema(BaseModel):
+    id: UUID
+    name: str
+    book_count: int
+    on_loan_count: int
+
+    class Config(BaseConfig):
+        orm_mode = True
+
+
+class LibraryCountsSchema(BaseModel):
+    id: UUID
+    name: str
+    city: str
+    book_count: int
+    on_loan_count: int
+
+    class Config(BaseConfig):
+        orm_mode = True
+
+
 class AuthorSchemaIn(BaseModel):
     name: str
 
@@ -107,3 +143,43 @@ class BookSchemaIn(BaseModel):
 
     class Config(BaseConfig):
         orm_mode = True
+
+
+class BookImportSchema(BaseModel):
+    name: str
+    written_at: date
+    library_id: str
+    author_id: Optional[str]
+    author: Optional[str]
+
+    @validator("author", always=True)
+    def validate_author(cls, value, values):
+        if not value and not values.get("author_id"):
+            raise ValueError("Either author_id or author is required")
+        return value
+
+
+class BulkErrorSchema(BaseModel):
+    row: int
+    error: str
+
+
+class BulkResultSchema(BaseModel):
+    received: int
+    created: int
+    errors: List[BulkErrorSchema] = []
+
+
+class SearchResultSchema(BaseModel):
+    kind: str
+    id: str
+    name: str
+    rank: float
+
+
+class Page(GenericModel, Generic[T]):
+    items: List[T] = []
+    next_cursor: Optional[str] = None
+
+    class Config(BaseConfig):
+        orm_mode = True
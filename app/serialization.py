@@ -0,0 +1,122 @@
+from functools import lru_cache
+from typing import Callable, Mapping, Sequence
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, create_model
+from sqlalchemy import Column
+from app.schemas import Page
+
+# Fast path for large listings: repositories select only the columns a schema
+# exposes and return plain row tuples, laid out as the schema's scalar fields
+# followed by its nested list fields, each in declaration order. The compiled
+# serializer turns those tuples into dicts in one comprehension and orjson
+# encodes the result, skipping ORM instances, pydantic validation and
+# jsonable_encoder.
+
+
+def scalar_fields(schema: type[BaseModel]) -> list[str]:
+    return [
+        name for name, field in schema.__fields__.items() if not _is_model(field.type_)
+    ]
+
+
+def nested_fields(schema: type[BaseModel]) -> list[tuple[str, type[BaseModel]]]:
+    return [
+        (name, field.type_)
+        for name, field in schema.__fields__.items()
+        if _is_model(field.type_)
+    ]
+
+
+def columns(schema: type[BaseModel], model, *extra: Column) -> tuple[Column, ...]:
+    # extra columns (keyset keys, parent ids) go after the schema's own so
+    # the serializer's positions are unaffected; it never reads past them.
+    table = model.__table__
+    selected = tuple(table.c[name] for name in scalar_fields(schema))
+    return selected + tuple(
+        column for column in extra if column.key not in scalar_fields(schema)
+    )
+
+
+def sparse_schema(schema: type[BaseModel], fields: str | None) -> type[BaseModel]:
+    # fields=id,name,books.name keeps those fields in declaration order;
+    # a bare nested name ("books") keeps the whole nested schema.
+    if not fields:
+        return schema
+    paths = {path.strip() for path in fields.split(",") if path.strip()}
+    return _sparse_schema(schema, tuple(sorted(paths)))
+
+
+@lru_cache(maxsize=256)
+def _sparse_schema(schema: type[BaseModel], paths: tuple[str, ...]) -> type[BaseModel]:
+    wanted: dict[str, list[str] | None] = {}
+    for path in paths:
+        name, _, rest = path.partition(".")
+        field = schema.__fields__.get(name)
+        if field is None or (rest and not _is_model(field.type_)):
+            raise ValueError(f"Unknown field '{path}' for {schema.__name__}")
+        if not rest:
+            wanted[name] = None
+        elif wanted.get(name, []) is not None:
+            wanted.setdefault(name, []).append(rest)
+    definitions = {}
+    for name, field in schema.__fields__.items():
+        if name not in wanted:
+            continue
+        type_ = field.outer_type_
+        if _is_model(field.type_):
+            child = field.type_
+            if wanted[name] is not None:
+                child = _sparse_schema(child, tuple(wanted[name]))
+            type_ = list[child]
+        definitions[name] = (type_, ... if field.required else field.default)
+    return create_model(schema.__name__, __config__=schema.__config__, **definitions)
+
+
+def _is_model(type_) -> bool:
+    return isinstance(type_, type) and issubclass(type_, BaseModel)
+
+
+@lru_cache(maxsize=None)
+def compile_serializer(
+    schema: type[BaseModel],
+) -> Callable[[Sequence[tuple]], list[dict]]:
+    scalars = scalar_fields(schema)
+    nested = nested_fields(schema)
+    position = {name: i for i, name in enumerate(scalars)}
+    position.update((name, len(scalars) + i) for i, (name, _) in enumerate(nested))
+    namespace = {f"_{name}": compile_serializer(child) for name, child in nested}
+    values = ", ".join(
+        (
+            f"{name!r}: _{name}(row[{position[name]}])"
+            if f"_{name}" in namespace
+            else f"{name!r}: row[{position[name]}]"
+        )
+        for name in schema.__fields__
+    )
+    source = f"def serialize(rows):\n    return [{{{values}}} for row in rows]\n"
+    exec(compile(source, f"<serializer {schema.__name__}>", "exec"), namespace)
+    return namespace["serialize"]
+
+
+def page_response(
+    schema: type[BaseModel], page: Page, headers: Mapping[str, str] | None = None
+) -> ORJSONResponse:
+    return ORJSONResponse(
+        {
+            "items": compile_serializer(schema)(page.items),
+            "next_cursor": page.next_cursor,
+        },
+        headers=headers,
+    )
+
+
+def model_response(
+    schema: type[BaseModel],
+    data: object | list,
+    headers: Mapping[str, str] | None = None,
+) -> ORJSONResponse:
+    if isinstance(data, list):
+        content = [schema.from_orm(item).dict() for item in data]
+    else:
+        content = schema.from_orm(data).dict()
+    return ORJSONResponse(content, headers=headers)
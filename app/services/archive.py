@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+from app.repositories.archive import AsyncRentalArchiveRepository
+from app.services.periodic import PeriodicJob
+
+
+class RentalArchiver(PeriodicJob):
+    def __init__(
+        self,
+        archive_repository: AsyncRentalArchiveRepository,
+        interval: float = 3600.0,
+        after_days: int = 365,
+        batch_size: int = 1000,
+    ) -> None:
+        super().__init__(interval, batch_size)
+        self._repository = archive_repository
+        self._after_days = after_days
+        self._archived = 0
+
+    async def run(self, now: datetime | None = None) -> int:
+        closed_before = (now or datetime.utcnow()) - timedelta(days=self._after_days)
+        archived = 0
+        while True:
+            # One transaction per batch keeps each write lock short.
+            moved = await self._repository.archive(closed_before, self._batch_size)
+            archived += moved
+            if moved < self._batch_size:
+                break
+        self._archived += archived
+        return archived
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "after_days": self._after_days,
+            "archived": self._archived,
+        }
@@ -0,0 +1,60 @@
+import datetime
+import hashlib
+import time
+from collections import OrderedDict
+import jwt
+
+
+class AuthService:
+    def __init__(
+        self,
+        secret_key: str,
+        algorithm: str,
+        cache_size: int = 1024,
+        expires_in: int = 3600,
+    ) -> None:
+        self._secret_key = str(secret_key)
+        self._algorithm = str(algorithm)
+        self._algorithms = [self._algorithm]
+        self._expires_in = datetime.timedelta(seconds=expires_in)
+        self._cache_size = cache_size
+        self._cache: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def create_token(self, data: dict) -> str:
+        expiration = datetime.datetime.utcnow() + self._expires_in
+        return jwt.encode(
+            {**data, "exp": expiration}, self._secret_key, algorithm=self._algorithm
+        )
+
+    def decode_token(self, token: str) -> dict:
+        key = hashlib.sha256(token.encode()).digest()
+        entry = self._cache.get(key)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > time.time():
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return payload
+            del self._cache[key]
+        self._misses += 1
+        payload = jwt.decode(token, self._secret_key, algorithms=self._algorithms)
+        if "exp" in payload and self._cache_size:
+            self._cache[key] = (float(payload["exp"]), payload)
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+                self._evictions += 1
+        return payload
+
+    def stats(self) -> dict:
+        lookups = self._hits + self._misses
+        return {
+            "size": len(self._cache),
+            "max_size": self._cache_size,
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+        }
@@ -1,6 +1,10 @@
+from datetime import datetime
+from typing import AsyncIterator, Sequence
 from app.models import Author
-from app.repositories.author import AuthorRepository
-from app.schemas import AuthorSchemaIn
+from app.repositories.batch import BatchLoader
+from app.repositories.author import AuthorRepository, AsyncAuthorRepository
+from app.services.bulk import import_records
+from app.schemas import AuthorSchema, AuthorSchemaIn, BulkResultSchema, Page
 
 
 class AuthorService:
@@ -23,3 +27,52 @@ class AuthorService:
 
     def update_author(self, id: int, author: AuthorSchemaIn) -> Author:
         return self._repository.update(id, author)
+
+
+class AsyncAuthorService:
+    def __init__(self, author_repository: AsyncAuthorRepository) -> None:
+        self._repository: AsyncAuthorRepository = author_repository
+        self._loader = BatchLoader(self._repository.get_by_ids)
+
+    async def get_author(
+        self, id: str = None, name: str = None, limit: int = 50, cursor: str = None
+    ) -> list[Author] | Page:
+        if id:
+            return await self._repository.get_by_id(id)
+        elif name:
+            return await self._repository.get_by_name(name)
+        else:
+            return await self._repository.get_page(limit, cursor)
+
+    async def get_author_rows(
+        self,
+        limit: int = 50,
+        cursor: str = None,
+        schema: type[AuthorSchema] = AuthorSchema,
+    ) -> Page:
+        return await self._repository.get_rows(limit, cursor, schema)
+
+    async def load_author(self, id: str) -> Author | None:
+        return await self._loader.load(id)
+
+    async def get_authors(self, ids: list[str]) -> list[Author]:
+        return [author for author in await self._loader.load_many(ids) if author]
+
+    async def create_author(self, author: AuthorSchemaIn) -> Author:
+        return await self._repository.add(author)
+
+    async def import_authors(
+        self, records: AsyncIterator[tuple[int, dict | str]]
+    ) -> BulkResultSchema:
+        return await import_records(records, AuthorSchemaIn, self._repository.add_many)
+
+    def export_authors(
+        self, updated_since: datetime = None
+    ) -> AsyncIterator[Sequence[dict]]:
+        return self._repository.export(updated_since=updated_since)
+
+    async def delete_author(self, id: str) -> Author:
+        return await self._repository.delete(id)
+
+    async def update_author(self, id: str, author: AuthorSchemaIn) -> Author:
+        return await self._repository.update(id, author)
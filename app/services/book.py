@@ -1,6 +1,16 @@
+from datetime import datetime
+from typing import AsyncIterator, Sequence
 from app.models import Book
-from app.repositories.book import BookRepository
-from app.schemas import BookSchemaIn
+from app.repositories.batch import BatchLoader
+from app.repositories.book import BookRepository, AsyncBookRepository
+from app.services.bulk import import_records
+from app.schemas import (
+    BookImportSchema,
+    BookSchema,
+    BookSchemaIn,
+    BulkResultSchema,
+    Page,
+)
 
 
 class BookService:
@@ -23,3 +33,69 @@ class BookService:
 
     def update_book(self, id: int, book: BookSchemaIn) -> Book:
         return self._repository.update(id, book)
+
+
+class AsyncBookService:
+    def __init__(self, book_repository: AsyncBookRepository) -> None:
+        self._repository: AsyncBookRepository = book_repository
+        self._loader = BatchLoader(self._repository.get_by_ids)
+
+    async def get_book(
+        self,
+        id: str = None,
+        name: str = None,
+        limit: int = 50,
+        cursor: str = None,
+        available: bool = None,
+        library_id: str = None,
+    ) -> list[Book] | Page:
+        if id:
+            return await self._repository.get_by_id(id)
+        elif name:
+            return await self._repository.get_by_name(name)
+        else:
+            return await self._repository.get_page(limit, cursor, available, library_id)
+
+    async def get_book_rows(
+        self,
+        limit: int = 50,
+        cursor: str = None,
+        available: bool = None,
+        library_id: str = None,
+        schema: type[BookSchema] = BookSchema,
+    ) -> Page:
+        return await self._repository.get_rows(
+            limit, cursor, available, library_id, schema
+        )
+
+    async def load_book(self, id: str) -> Book | None:
+        return await self._loader.load(id)
+
+    async def get_books(self, ids: list[str]) -> list[Book]:
+        return [book for book in await self._loader.load_many(ids) if book]
+
+    async def create_book(self, book: BookSchemaIn) -> Book:
+        return await self._repository.add(book)
+
+    async def import_books(
+        self, records: AsyncIterator[tuple[int, dict | str]]
+    ) -> BulkResultSchema:
+        return await import_records(
+            records, BookImportSchema, self._repository.add_many
+        )
+
+    def export_books(
+        self,
+        updated_since: datetime = None,
+        author_id: str = None,
+        library_id: str = None,
+    ) -> AsyncIterator[Sequence[dict]]:
+        return self._repository.export(
+            updated_since=updated_since, author_id=author_id, library_id=library_id
+        )
+
+    async def delete_book(self, id: str) -> Book:
+        return await self._repository.delete(id)
+
+    async def update_book(self, id: str, book: BookSchemaIn) -> Book:
+        return await self._repository.update(id, book)
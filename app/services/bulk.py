@@ -0,0 +1,128 @@
+import csv
+import json
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Iterator
+from pydantic import BaseModel, ValidationError
+from app.schemas import BulkErrorSchema, BulkResultSchema
+
+CHUNK_SIZE = 500
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    buffer = b""
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+def open_quote(line: str, quoted: bool) -> bool:
+    # Whether a quoted field is still open at the end of line, by csv's rules:
+    # a quote opens a field only at its start, and "" inside one is literal.
+    if '"' not in line:
+        return quoted
+    state = "quoted" if quoted else "start"
+    for char in line:
+        if state == "quoted":
+            state = "closing" if char == '"' else "quoted"
+        elif char == ",":
+            state = "start"
+        elif char == '"' and state in ("start", "closing"):
+            state = "quoted"
+        else:
+            state = "field"
+    return state == "quoted"
+
+
+def drain(pending: deque[str]) -> Iterator[str]:
+    # Never runs dry: the reader is only asked for a row once pending holds a
+    # whole record.
+    while True:
+        yield pending.popleft()
+
+
+async def read_records(
+    stream: AsyncIterator[bytes], content_type: str
+) -> AsyncIterator[tuple[int, dict | str]]:
+    lines = iter_lines(stream)
+    if content_type.startswith("text/csv"):
+        pending: deque[str] = deque()
+        reader = csv.reader(drain(pending))
+        header = None
+        row = 0
+        quoted = False
+        async for line in lines:
+            if not pending and not line.strip():
+                continue
+            # A quoted field may span lines, so hand the reader whole records.
+            pending.append(line + "\n")
+            quoted = open_quote(line, quoted)
+            if quoted:
+                continue
+            values = next(reader)
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            row += 1
+            if len(values) != len(header):
+                yield row, f"Expected {len(header)} columns, got {len(values)}"
+                continue
+            yield row, {key: value or None for key, value in zip(header, values)}
+        if pending:
+            yield row + 1, "Unterminated quoted field"
+        return
+    row = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield row, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield row, "Expected a JSON object"
+            continue
+        yield row, record
+
+
+async def import_records(
+    records: AsyncIterator[tuple[int, dict | str]],
+    schema: type[BaseModel],
+    add_many: Callable[[list[tuple[int, BaseModel]]], Awaitable[tuple[list, list]]],
+    chunk_size: int = CHUNK_SIZE,
+) -> BulkResultSchema:
+    received = created = 0
+    errors: list[tuple[int, str]] = []
+    chunk: list[tuple[int, BaseModel]] = []
+
+    async def flush() -> None:
+        nonlocal created
+        inserted, failed = await add_many(chunk)
+        created += len(inserted)
+        errors.extend(failed)
+        chunk.clear()
+
+    async for row, record in records:
+        received += 1
+        if isinstance(record, str):
+            errors.append((row, record))
+            continue
+        try:
+            chunk.append((row, schema.parse_obj(record)))
+        except ValidationError as e:
+            errors.append((row, str(e)))
+            continue
+        if len(chunk) >= chunk_size:
+            await flush()
+    if chunk:
+        await flush()
+    return BulkResultSchema(
+        received=received,
+        created=created,
+        errors=[BulkErrorSchema(row=row, error=error) for row, error in sorted(errors)],
+    )
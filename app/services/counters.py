@@ -0,0 +1,36 @@
+import logging
+from app.repositories.counters import COUNTED, AsyncCounterRepository
+from app.services.periodic import PeriodicJob
+
+logger = logging.getLogger(__name__)
+
+
+class CounterReconciler(PeriodicJob):
+    def __init__(
+        self,
+        counter_repository: AsyncCounterRepository,
+        interval: float = 3600.0,
+        batch_size: int = 1000,
+    ) -> None:
+        super().__init__(interval, batch_size)
+        self._repository = counter_repository
+        self._repaired = 0
+
+    async def run(self) -> int:
+        repaired = 0
+        for model in COUNTED:
+            after = None
+            while True:
+                after, count = await self._repository.reconcile(
+                    model, after, self._batch_size
+                )
+                repaired += count
+                if after is None:
+                    break
+        if repaired:
+            logger.warning("Repaired %d drifted book counters", repaired)
+        self._repaired += repaired
+        return repaired
+
+    def stats(self) -> dict:
+        return {**super().stats(), "repaired": self._repaired}
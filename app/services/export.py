@@ -0,0 +1,45 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator, Sequence
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)
+
+
+async def to_ndjson(batches: AsyncIterator[Sequence[dict]]) -> AsyncIterator[bytes]:
+    async for batch in batches:
+        yield "".join(
+            json.dumps(dict(row), default=_default) + "\n" for row in batch
+        ).encode()
+
+
+async def to_csv(batches: AsyncIterator[Sequence[dict]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    columns = None
+    async for batch in batches:
+        if columns is None and batch:
+            columns = list(batch[0].keys())
+            writer.writerow(columns)
+        writer.writerows(
+            ["" if row[key] is None else _default(row[key]) for key in columns]
+            for row in batch
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export_stream(
+    batches: AsyncIterator[Sequence[dict]], format: str
+) -> AsyncIterator[bytes]:
+    if format == "csv":
+        return to_csv(batches)
+    return to_ndjson(batches)
@@ -1,6 +1,10 @@
+from datetime import datetime
+from typing import AsyncIterator, Sequence
 from app.models import Library
-from app.repositories.library import LibraryRepository
-from app.schemas import LibrarySchemaIn
+from app.repositories.batch import BatchLoader
+from app.repositories.library import LibraryRepository, AsyncLibraryRepository
+from app.services.bulk import import_records
+from app.schemas import LibrarySchema, LibrarySchemaIn, BulkResultSchema, Page
 
 
 class LibraryService:
@@ -23,3 +27,52 @@ class LibraryService:
 
     def update_library(self, id: int, library: LibrarySchemaIn) -> Library:
         return self._repository.update(id, library)
+
+
+class AsyncLibraryService:
+    def __init__(self, library_repository: AsyncLibraryRepository) -> None:
+        self._repository: AsyncLibraryRepository = library_repository
+        self._loader = BatchLoader(self._repository.get_by_ids)
+
+    async def get_library(
+        self, id: str = None, name: str = None, limit: int = 50, cursor: str = None
+    ) -> list[Library] | Page:
+        if id:
+            return await self._repository.get_by_id(id)
+        elif name:
+            return await self._repository.get_by_name(name)
+        else:
+            return await self._repository.get_page(limit, cursor)
+
+    async def get_library_rows(
+        self,
+        limit: int = 50,
+        cursor: str = None,
+        schema: type[LibrarySchema] = LibrarySchema,
+    ) -> Page:
+        return await self._repository.get_rows(limit, cursor, schema)
+
+    async def load_library(self, id: str) -> Library | None:
+        return await self._loader.load(id)
+
+    async def get_libraries(self, ids: list[str]) -> list[Library]:
+        return [library for library in await self._loader.load_many(ids) if library]
+
+    async def create_library(self, library: LibrarySchemaIn) -> Library:
+        return await self._repository.add(library)
+
+    async def import_libraries(
+        self, records: AsyncIterator[tuple[int, dict | str]]
+    ) -> BulkResultSchema:
+        return await import_records(records, LibrarySchemaIn, self._repository.add_many)
+
+    def export_libraries(
+        self, updated_since: datetime = None, city: str = None
+    ) -> AsyncIterator[Sequence[dict]]:
+        return self._repository.export(updated_since=updated_since, city=city)
+
+    async def delete_library(self, id: str) -> Library:
+        return await self._repository.delete(id)
+
+    async def update_library(self, id: str, library: LibrarySchemaIn) -> Library:
+        return await self._repository.update(id, library)
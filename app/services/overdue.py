@@ -0,0 +1,63 @@
+from datetime import date, datetime, timedelta
+from app.repositories.overdue import AsyncOverdueRepository
+from app.schemas import Page
+from app.services.periodic import PeriodicJob
+
+
+class OverdueScanner(PeriodicJob):
+    def __init__(
+        self,
+        overdue_repository: AsyncOverdueRepository,
+        interval: float = 300.0,
+        batch_size: int = 500,
+    ) -> None:
+        super().__init__(interval, batch_size)
+        self._repository = overdue_repository
+        self._found = 0
+        self._pruned = 0
+        self._updated_since: datetime | None = None
+
+    async def run(self, today: date | None = None) -> int:
+        today = today or date.today()
+        started = datetime.utcnow()
+        found = 0
+        after = checkpoint = await self._repository.checkpoint()
+        while True:
+            rows = await self._repository.scan(today, after, self._batch_size)
+            if not rows:
+                break
+            await self._repository.record(rows)
+            found += len(rows)
+            after = rows[-1]["due_at"], rows[-1]["rental_id"]
+            if len(rows) < self._batch_size:
+                break
+        if checkpoint[0] is not None:
+            found += await self._recheck(today, checkpoint)
+        # Overlap the previous run a little so an update committed while it was
+        # scanning is still rechecked; rows already recorded are skipped anyway.
+        self._updated_since = started - timedelta(minutes=1)
+        self._pruned += await self._repository.prune(today)
+        self._found += found
+        return found
+
+    async def _recheck(self, today: date, checkpoint: tuple[date, str]) -> int:
+        found = 0
+        while True:
+            rows = await self._repository.missed(
+                today, checkpoint, self._updated_since, self._batch_size
+            )
+            if not rows:
+                break
+            await self._repository.record(rows, advance=False)
+            found += len(rows)
+            if len(rows) < self._batch_size:
+                break
+        return found
+
+    async def get_overdue(
+        self, user_id: str = None, limit: int = 50, cursor: str = None
+    ) -> Page:
+        return await self._repository.get_page(limit, cursor, user=user_id)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "found": self._found, "pruned": self._pruned}
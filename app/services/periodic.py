@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    # Background jobs run once at start() and then every interval seconds;
+    # an interval of 0 disables them. Subclasses implement run().
+    def __init__(self, interval: float, batch_size: int) -> None:
+        self._interval = interval
+        self._batch_size = batch_size
+        self._task: asyncio.Task | None = None
+        self._runs = 0
+        self._last_run_at: float | None = None
+        self._last_run_seconds = 0.0
+
+    async def run(self, *args, **kwargs) -> int:
+        raise NotImplementedError
+
+    async def run_once(self, *args, **kwargs) -> int:
+        started_at = time.perf_counter()
+        result = await self.run(*args, **kwargs)
+        self._runs += 1
+        self._last_run_at = time.time()
+        self._last_run_seconds = time.perf_counter() - started_at
+        return result
+
+    async def _run_forever(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("%s run failed", type(self).__name__)
+            await asyncio.sleep(self._interval)
+
+    def start(self) -> None:
+        if self._interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "interval": self._interval,
+            "batch_size": self._batch_size,
+            "running": self._task is not None,
+            "runs": self._runs,
+            "last_run_at": self._last_run_at,
+            "last_run_seconds": self._last_run_seconds,
+        }
@@ -1,6 +1,8 @@
-from app.models import Rental
-from app.repositories.rental import RentalRepository
-from app.schemas import RentalSchemaIn
+from datetime import datetime
+from typing import AsyncIterator, Sequence
+from app.models import ArchivedRental, Rental
+from app.repositories.rental import RentalRepository, AsyncRentalRepository
+from app.schemas import RentalSchemaIn, Page
 
 
 class RentalService:
@@ -23,3 +25,41 @@ class RentalService:
 
     def update_rental(self, id: int, rental: RentalSchemaIn) -> Rental:
         return self._repository.update(id, rental)
+
+
+class AsyncRentalService:
+    def __init__(self, rental_repository: AsyncRentalRepository) -> None:
+        self._repository: AsyncRentalRepository = rental_repository
+
+    async def get_rental(
+        self,
+        id: str = None,
+        user_id: str = None,
+        limit: int = 50,
+        cursor: str = None,
+        archived: bool = False,
+    ) -> Rental | ArchivedRental | Page:
+        if id:
+            return await self._repository.get_by_id(id, archived)
+        return await self._repository.get_page(
+            limit, cursor, user=user_id, archived=archived
+        )
+
+    async def create_rental(self, rental: RentalSchemaIn) -> Rental:
+        return await self._repository.add(rental)
+
+    def export_rentals(
+        self, updated_since: datetime = None, user_id: str = None, book_id: str = None
+    ) -> AsyncIterator[Sequence[dict]]:
+        return self._repository.export(
+            updated_since=updated_since, user_id=user_id, book_id=book_id
+        )
+
+    async def return_rental(self, id: str) -> Rental:
+        return await self._repository.close(id)
+
+    async def delete_rental(self, id: str) -> Rental:
+        return await self._repository.delete(id)
+
+    async def update_rental(self, id: str, rental: RentalSchemaIn) -> Rental:
+        return await self._repository.update(id, rental)
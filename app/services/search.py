@@ -0,0 +1,12 @@
+from app.repositories.search import AsyncSearchRepository
+from app.schemas import Page
+
+
+class AsyncSearchService:
+    def __init__(self, search_repository: AsyncSearchRepository) -> None:
+        self._repository: AsyncSearchRepository = search_repository
+
+    async def search(
+        self, q: str, kind: str = None, limit: int = 50, cursor: str = None
+    ) -> Page:
+        return await self._repository.search(q, [kind] if kind else None, limit, cursor)
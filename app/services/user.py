@@ -1,6 +1,6 @@
 from app.models import User
-from app.repositories.user import UserRepository
-from app.schemas import UserSchemaIn
+from app.repositories.user import UserRepository, AsyncUserRepository
+from app.schemas import UserSchemaIn, Page
 
 
 class UserService:
@@ -27,3 +27,34 @@ class UserService:
 
     def update_user(self, id: int, user: UserSchemaIn) -> User:
         return self._repository.update(id, user)
+
+
+class AsyncUserService:
+    def __init__(self, user_repository: AsyncUserRepository) -> None:
+        self._repository: AsyncUserRepository = user_repository
+
+    async def get_user(
+        self,
+        id: str = None,
+        name: str = None,
+        email: str = None,
+        limit: int = 50,
+        cursor: str = None,
+    ) -> list[User] | Page:
+        if id:
+            return await self._repository.get_by_id(id)
+        elif name:
+            return await self._repository.get_by_name(name)
+        elif email:
+            return await self._repository.get_by_email(email)
+        else:
+            return await self._repository.get_page(limit, cursor)
+
+    async def create_user(self, user: UserSchemaIn) -> User:
+        return await self._repository.add(user)
+
+    async def delete_user(self, id: str) -> User:
+        return await self._repository.delete(id)
+
+    async def update_user(self, id: str, user: UserSchemaIn) -> User:
+        return await self._repository.update(id, user)
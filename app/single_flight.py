@@ -0,0 +1,100 @@
+import asyncio
+from hashlib import blake2b
+from urllib.parse import parse_qsl, urlencode
+from app.metrics import Metrics
+
+# Request headers that change what a GET returns. Authorization keeps callers
+# with different tokens apart; If-None-Match decides between 200 and 304.
+KEY_HEADERS = (b"authorization", b"if-none-match")
+
+
+def flight_key(scope) -> tuple:
+    query = urlencode(sorted(parse_qsl(scope["query_string"].decode(), True)))
+    headers = dict(scope["headers"])
+    digest = blake2b(digest_size=16)
+    for name in KEY_HEADERS:
+        digest.update(headers.get(name, b"") + b"\0")
+    return scope["path"], query, digest.hexdigest()
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._flights: dict[tuple, asyncio.Future] = {}
+        self._leaders = 0
+        self._coalesced = 0
+
+    def join(self, key: tuple) -> asyncio.Future | None:
+        return self._flights.get(key)
+
+    def lead(self, key: tuple) -> asyncio.Future:
+        self._leaders += 1
+        flight = self._flights[key] = asyncio.get_running_loop().create_future()
+        return flight
+
+    def land(self, key: tuple, result: tuple | None) -> None:
+        self._flights.pop(key).set_result(result)
+
+    def replayed(self) -> None:
+        self._coalesced += 1
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self._leaders,
+            "coalesced": self._coalesced,
+        }
+
+
+class SingleFlightMiddleware:
+    # Identical GETs to the opted-in paths that arrive while one is being
+    # served wait for it and replay its response messages instead of running
+    # the route again.
+    def __init__(
+        self,
+        app,
+        single_flight: SingleFlight,
+        metrics: Metrics,
+        paths: tuple[str, ...] = (),
+    ) -> None:
+        self.app = app
+        self.single_flight = single_flight
+        self.metrics = metrics
+        self.paths = paths
+
+    async def __call__(self, scope, receive, send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or scope["path"] not in self.paths
+        ):
+            await self.app(scope, receive, send)
+            return
+        key = flight_key(scope)
+        flight = self.single_flight.join(key)
+        if flight is not None:
+            result = await asyncio.shield(flight)
+            if result is not None:
+                route, messages = result
+                scope["route"] = route
+                self.single_flight.replayed()
+                self.metrics.coalesced.inc(scope["path"])
+                for message in messages:
+                    await send(message)
+                return
+            # The leader failed or was cancelled: serve this one normally.
+            await self.app(scope, receive, send)
+            return
+
+        self.single_flight.lead(key)
+        messages = []
+
+        async def send_wrapper(message) -> None:
+            messages.append(message)
+            await send(message)
+
+        result = None
+        try:
+            await self.app(scope, receive, send_wrapper)
+            result = scope.get("route"), messages
+        finally:
+            self.single_flight.land(key, result)
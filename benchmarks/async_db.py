@@ -0,0 +1,100 @@
+"""Throughput of the sync and async book repositories under concurrent clients.
+
+Usage: python -m benchmarks.async_db [--books 500] [--requests 2000] [--clients 50 200]
+"""
+
+import argparse
+import asyncio
+import datetime
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi import FastAPI
+
+from app.db import Database
+from app.models import Author, Book, Library
+from app.repositories.book import AsyncBookRepository, BookRepository
+
+
+def seed(db: Database, books: int) -> None:
+    db.create_database()
+    with db.session() as session:
+        author = Author(name="Benchmark Author")
+        library = Library(name="Benchmark Library", city="Benchmark")
+        session.add_all([author, library])
+        session.flush()
+        session.add_all(
+            Book(
+                name=f"Book {i}",
+                written_at=datetime.date(2000, 1, 1),
+                author_id=author.id,
+                library_id=library.id,
+            )
+            for i in range(books)
+        )
+        session.commit()
+
+
+def build_app(db: Database) -> FastAPI:
+    app = FastAPI()
+    sync_repository = BookRepository(db.session)
+    async_repository = AsyncBookRepository(db.async_session)
+
+    @app.get("/sync/book")
+    async def sync_book(name: str = None):
+        if name:
+            return len(sync_repository.get_by_name(name))
+        return len(sync_repository.get_all())
+
+    @app.get("/async/book")
+    async def async_book(name: str = None):
+        if name:
+            return len(await async_repository.get_by_name(name))
+        return len(await async_repository.get_all())
+
+    return app
+
+
+async def run(
+    app: FastAPI, path: str, clients: int, requests: int, books: int
+) -> float:
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(f"{path}?name=Book {i % books}" if books else path)
+
+    async def client_loop(client: httpx.AsyncClient) -> None:
+        while not queue.empty():
+            response = await client.get(queue.get_nowait())
+            response.raise_for_status()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+        return requests / (time.perf_counter() - started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        seed(db, args.books)
+        app = build_app(db)
+        print(f"{'query':>8} {'clients':>8} {'sync req/s':>12} {'async req/s':>12}")
+        for query, books in (("list", 0), ("by name", args.books)):
+            for clients in args.clients:
+                sync_rps = await run(app, "/sync/book", clients, args.requests, books)
+                async_rps = await run(app, "/async/book", clients, args.requests, books)
+                print(f"{query:>8} {clients:>8} {sync_rps:>12.1f} {async_rps:>12.1f}")
+        await db.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,72 @@
+"""Time POST /book/bulk for a large NDJSON catalogue.
+
+Usage: python -m benchmarks.bulk_import [--books 100000] [--authors 2000]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+TMP = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(TMP) / 'bench.db'}"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-of-sufficient-length")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import httpx
+
+from main import app
+
+
+async def ndjson(books: int, authors: int, library_id: str):
+    for start in range(0, books, 1000):
+        lines = (
+            json.dumps(
+                {
+                    "name": f"Book {i}",
+                    "author": f"Author {i % authors}",
+                    "library_id": library_id,
+                    "written_at": "2000-01-01",
+                }
+            )
+            for i in range(start, min(start + 1000, books))
+        )
+        yield ("\n".join(lines) + "\n").encode()
+
+
+async def main(args: argparse.Namespace) -> None:
+    token = app.container.auth_service().create_token(
+        {"id": "benchmark", "is_superuser": True}
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        library = await client.post(
+            "/library", json={"name": "Bulk", "city": "Bench"}, headers=headers
+        )
+        started = time.perf_counter()
+        response = await client.post(
+            "/book/bulk",
+            content=ndjson(args.books, args.authors, library.json()["id"]),
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+        )
+        elapsed = time.perf_counter() - started
+    result = response.json()
+    print(
+        f"received={result['received']} created={result['created']} "
+        f"errors={len(result['errors'])} seconds={elapsed:.1f} "
+        f"rows/s={result['created'] / elapsed:.0f}"
+    )
+    await app.container.db().dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=100_000)
+    parser.add_argument("--authors", type=int, default=2000)
+    asyncio.run(main(parser.parse_args()))
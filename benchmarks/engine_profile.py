@@ -0,0 +1,124 @@
+"""Mixed read/write throughput on SQLite with SQLAlchemy's default engine
+setup against the tuned profile (WAL, synchronous=normal, cache, mmap,
+busy_timeout and a connection pool).
+
+Usage: python -m benchmarks.engine_profile [--books 5000] [--clients 16]
+    [--seconds 10] [--writes 20] [--output FILE.json]
+"""
+
+import argparse
+import asyncio
+import datetime
+import random
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+
+from app.db import POOL_OPTIONS, SQLITE_PRAGMAS, Database
+from app.models import Author, Book, Library
+from app.repositories.book import AsyncBookRepository
+from app.repositories.rental import AsyncRentalRepository
+from app.schemas import RentalSchemaIn
+from benchmarks import results
+
+# "default" is SQLAlchemy's own setup: rollback journal and a NullPool.
+PROFILES = {
+    "default": {"pragmas": {}, "pool": {}},
+    "tuned": {"pragmas": SQLITE_PRAGMAS, "pool": POOL_OPTIONS},
+}
+
+
+def seed(db: Database, books: int) -> list[str]:
+    db.create_database()
+    author = {"id": str(uuid.uuid4()), "name": "Profile Author"}
+    library = {"id": str(uuid.uuid4()), "name": "Profile", "city": "Bench"}
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Book {i}",
+            "written_at": datetime.date(2000, 1, 1),
+            "author_id": author["id"],
+            "library_id": library["id"],
+        }
+        for i in range(books)
+    ]
+    with db.session() as session:
+        session.execute(insert(Author), [author])
+        session.execute(insert(Library), [library])
+        session.execute(insert(Book), rows)
+        session.commit()
+    return [row["id"] for row in rows]
+
+
+async def run(db: Database, book_ids: list[str], args: argparse.Namespace) -> dict:
+    books = AsyncBookRepository(db.async_session)
+    rentals = AsyncRentalRepository(db.async_session)
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    deadline = time.perf_counter() + args.seconds
+
+    async def client_loop(rng: random.Random) -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            if rng.random() * 100 < args.writes:
+                name = "write"
+                operation = rentals.add(
+                    RentalSchemaIn(
+                        book_id=rng.choice(book_ids),
+                        rented_at="2024-01-01",
+                        returned_at="2024-01-31",
+                    )
+                )
+            else:
+                name = "read"
+                operation = books.get_rows(50)
+            try:
+                rental = await operation
+                if name == "write":
+                    await rentals.close(rental.id)
+            except OperationalError as error:
+                errors[str(error.orig)] += 1
+                continue
+            except ValueError:
+                errors["already on loan"] += 1
+                continue
+            latencies[name].append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(client_loop(random.Random(args.seed + i)) for i in range(args.clients))
+    )
+    seconds = time.perf_counter() - started
+    summary = {
+        name: results.summarize(values, seconds) for name, values in latencies.items()
+    }
+    summary["errors"] = dict(errors)
+    return summary
+
+
+async def main(args: argparse.Namespace) -> None:
+    summary = {}
+    for profile, options in PROFILES.items():
+        db = Database(f"sqlite:///{Path(tempfile.mkdtemp()) / 'profile.db'}", **options)
+        book_ids = seed(db, args.books)
+        summary[profile] = await run(db, book_ids, args)
+        await db.dispose()
+    results.write(args.output, "engine_profile", vars(args), summary)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument(
+        "--writes", type=float, default=20, help="percent of operations"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,177 @@
+"""Drive main.app in-process with a weighted mix of reads, logins and rentals.
+
+Usage: python -m benchmarks.load [--mix read=80,login=5,rental=15] [--clients 32]
+    [--seconds 10] [--books 1000] [--users 20] [--seed 0] [--output FILE.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+TMP = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(TMP) / 'bench.db'}"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-of-sufficient-length")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import httpx
+
+from benchmarks import results
+from main import app
+
+PASSWORD = "load-password"
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, weight = part.split("=")
+        if name not in ("read", "login", "rental"):
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name}'")
+        mix[name] = int(weight)
+    return mix
+
+
+async def seed(client: httpx.AsyncClient, books: int, users: int) -> dict:
+    auth = app.container.auth_service()
+    admin = {"Authorization": "Bearer " + auth.create_token({"id": "admin", "is_superuser": True})}  # fmt: skip
+    library = await client.post(
+        "/library", json={"name": "Load", "city": "Bench"}, headers=admin
+    )
+    lines = "\n".join(
+        json.dumps(
+            {
+                "name": f"Load book {i}",
+                "author": f"Load author {i % 50}",
+                "library_id": library.json()["id"],
+                "written_at": "2000-01-01",
+            }
+        )
+        for i in range(books)
+    )
+    await client.post(
+        "/book/bulk",
+        content=lines.encode(),
+        headers={**admin, "Content-Type": "application/x-ndjson"},
+    )
+    book_ids, cursor = [], None
+    while True:
+        params = {"limit": 500, **({"cursor": cursor} if cursor else {})}
+        page = (await client.get("/book", params=params)).json()
+        book_ids += [book["id"] for book in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    accounts = []
+    for i in range(users):
+        email = f"load{i}@example.com"
+        await client.post(
+            "/user", json={"name": f"load{i}", "email": email, "password": PASSWORD}
+        )
+        token = await client.post(
+            "/token", params={"email": email, "password": PASSWORD}
+        )
+        accounts.append(
+            {"email": email, "headers": {"Authorization": "Bearer " + token.json()["access_token"]}}  # fmt: skip
+        )
+    return {"books": book_ids, "accounts": accounts}
+
+
+async def run(client: httpx.AsyncClient, data: dict, args: argparse.Namespace) -> dict:
+    operations, weights = zip(*args.mix.items())
+    latencies: dict[str, list[float]] = defaultdict(list)
+    counters: dict[str, int] = defaultdict(int)
+    deadline = time.perf_counter() + args.seconds
+
+    async def timed(name: str, request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await request
+        latencies[name].append((time.perf_counter() - started) * 1000)
+        if response.status_code >= 500:
+            counters["errors"] += 1
+        return response
+
+    async def client_loop(rng: random.Random) -> None:
+        while time.perf_counter() < deadline:
+            operation = rng.choices(operations, weights)[0]
+            account = rng.choice(data["accounts"])
+            if operation == "read":
+                kind = rng.randrange(3)
+                if kind == 0:
+                    request = client.get(
+                        "/book", params={"id": rng.choice(data["books"])}
+                    )
+                elif kind == 1:
+                    request = client.get("/book", params={"limit": 20})
+                else:
+                    request = client.get("/author", params={"limit": 20})
+                await timed("read", request)
+            elif operation == "login":
+                credentials = {"email": account["email"], "password": PASSWORD}
+                await timed("login", client.post("/token", params=credentials))
+            else:
+                rental = {
+                    "book_id": rng.choice(data["books"]),
+                    "rented_at": "2024-01-01",
+                }
+                response = await timed(
+                    "rental",
+                    client.post("/rental", json=rental, headers=account["headers"]),
+                )
+                if response.status_code == 201:
+                    await timed(
+                        "return",
+                        client.post(
+                            "/rental/return",
+                            params={"id": response.json()["id"]},
+                            headers=account["headers"],
+                        ),
+                    )
+                else:
+                    counters["conflicts"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(client_loop(random.Random(args.seed * 1000 + i)) for i in range(args.clients))
+    )
+    elapsed = time.perf_counter() - started
+    summary = {
+        name: results.summarize(samples, elapsed) for name, samples in latencies.items()
+    }
+    summary["total"] = results.summarize(
+        [sample for samples in latencies.values() for sample in samples], elapsed
+    )
+    summary["errors"] = counters["errors"]
+    summary["conflicts"] = counters["conflicts"]
+    return summary
+
+
+async def main(args: argparse.Namespace) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        data = await seed(client, args.books, args.users)
+        summary = await run(client, data, args)
+    config = {**vars(args), "mix": args.mix}
+    results.write(args.output, "load", config, summary)
+    await app.container.db().dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--mix", type=parse_mix, default=parse_mix("read=80,login=5,rental=15")
+    )
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--books", type=int, default=1000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
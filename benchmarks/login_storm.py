@@ -0,0 +1,86 @@
+"""Latency of unrelated GETs while POST /token is flooded with logins, on a
+small connection pool (DB_POOL_SIZE, default 5, no overflow) so a login that
+holds a connection while it hashes shows up as starved GETs.
+
+Usage: python -m benchmarks.login_storm [--logins 8] [--seconds 5] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+TMP = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(TMP) / 'bench.db'}"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-of-sufficient-length")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("DB_POOL_SIZE", "5")
+os.environ.setdefault("DB_MAX_OVERFLOW", "0")
+
+import httpx
+from dependency_injector import providers
+
+from app.repositories.password_managment import PasswordHasher
+from main import app
+
+CREDENTIALS = {"email": "storm@example.com", "password": "storm-password"}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    return statistics.quantiles(samples, n=100)[pct - 1] if len(samples) > 1 else 0
+
+
+async def storm(client: httpx.AsyncClient, logins: int, seconds: float) -> dict:
+    deadline = time.perf_counter() + seconds
+    latencies: list[float] = []
+    completed_logins = 0
+
+    async def login_loop() -> None:
+        nonlocal completed_logins
+        while time.perf_counter() < deadline:
+            response = await client.post("/token", params=CREDENTIALS)
+            response.raise_for_status()
+            completed_logins += 1
+
+    async def get_loop() -> None:
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            response = await client.get("/book", params={"limit": 10})
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(get_loop(), *(login_loop() for _ in range(logins)))
+    return {
+        "logins/s": completed_logins / seconds,
+        "gets": len(latencies),
+        "get p50 ms": percentile(latencies, 50),
+        "get p99 ms": percentile(latencies, 99),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        response = await client.post("/user", json={"name": "storm", **CREDENTIALS})
+        response.raise_for_status()
+        for label, workers in (("inline", 0), ("pool", args.workers)):
+            hasher = PasswordHasher(max_workers=workers)
+            app.container.password_hasher.override(providers.Object(hasher))
+            result = await storm(client, args.logins, args.seconds)
+            hasher.shutdown()
+            print(label, {key: round(value, 1) for key, value in result.items()})
+    await app.container.db().dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    asyncio.run(main(parser.parse_args()))
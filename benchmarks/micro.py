@@ -0,0 +1,106 @@
+"""Micro-benchmarks for the async repositories and response serialization.
+
+Usage: python -m benchmarks.micro [--books 5000] [--iterations 500] [--output FILE.json]
+"""
+
+import argparse
+import asyncio
+import datetime
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+
+from app.db import Database
+from app.models import Author, Book, Library
+from app.repositories.author import AsyncAuthorRepository
+from app.repositories.book import AsyncBookRepository
+from app.repositories.rental import AsyncRentalRepository
+from app.schemas import AuthorSchema, BookSchema, Page, RentalSchemaIn
+from benchmarks import results
+
+
+def seed(db: Database, books: int) -> list[str]:
+    db.create_database()
+    authors = [{"id": str(uuid.uuid4()), "name": f"Author {i}"} for i in range(100)]
+    library = {"id": str(uuid.uuid4()), "name": "Micro", "city": "Bench"}
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Book {i}",
+            "written_at": datetime.date(2000, 1, 1),
+            "author_id": authors[i % len(authors)]["id"],
+            "library_id": library["id"],
+        }
+        for i in range(books)
+    ]
+    with db.session() as session:
+        session.execute(insert(Author), authors)
+        session.execute(insert(Library), [library])
+        session.execute(insert(Book), rows)
+        session.commit()
+    return [row["id"] for row in rows]
+
+
+async def measure(iterations: int, operation) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        began = time.perf_counter()
+        result = operation()
+        if asyncio.iscoroutine(result):
+            await result
+        latencies.append((time.perf_counter() - began) * 1000)
+    return results.summarize(latencies, time.perf_counter() - started)
+
+
+async def main(args: argparse.Namespace) -> None:
+    db = Database(f"sqlite:///{Path(tempfile.mkdtemp()) / 'micro.db'}")
+    book_ids = seed(db, args.books)
+    rng = random.Random(args.seed)
+    books = AsyncBookRepository(db.async_session)
+    authors = AsyncAuthorRepository(db.async_session)
+    rentals = AsyncRentalRepository(db.async_session)
+    book_page = await books.get_page(50)
+    author_page = await authors.get_page(20)
+
+    async def rent_and_return() -> None:
+        rental = await rentals.add(
+            RentalSchemaIn(book_id=rng.choice(book_ids), rented_at="2024-01-01")
+        )
+        await rentals.close(rental.id)
+
+    n = args.iterations
+    summary = {
+        "repository": {
+            "book_get_by_id": await measure(
+                n, lambda: books.get_by_id(rng.choice(book_ids))
+            ),
+            "book_get_page_50": await measure(n, lambda: books.get_page(50)),
+            "author_get_page_20": await measure(n, lambda: authors.get_page(20)),
+            "rental_add_close": await measure(n, rent_and_return),
+        },
+        "serialization": {
+            "book_page_50": await measure(
+                n, lambda: jsonable_encoder(Page[BookSchema].validate(book_page))
+            ),
+            "author_page_20": await measure(
+                n, lambda: jsonable_encoder(Page[AuthorSchema].validate(author_page))
+            ),
+        },
+    }
+    await db.dispose()
+    results.write(args.output, "micro", vars(args), summary)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=5000)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,109 @@
+"""Many clients racing POST /rental for the same books.
+
+Usage: python -m benchmarks.rental_contention [--books 20] [--clients 50]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+TMP = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(TMP) / 'bench.db'}"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-of-sufficient-length")
+os.environ.setdefault("ALGORITHM", "HS256")
+
+import httpx
+
+from main import app
+
+
+async def seed(client: httpx.AsyncClient, headers: dict, books: int) -> list[str]:
+    library = await client.post(
+        "/library", json={"name": "Contention", "city": "Bench"}, headers=headers
+    )
+    lines = "\n".join(
+        json.dumps(
+            {
+                "name": f"Contended {i}",
+                "author": "Contention",
+                "library_id": library.json()["id"],
+                "written_at": "2000-01-01",
+            }
+        )
+        for i in range(books)
+    )
+    await client.post(
+        "/book/bulk",
+        content=lines.encode(),
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+    )
+    page = await client.get(
+        "/book", params={"library_id": library.json()["id"], "limit": books}
+    )
+    return [book["id"] for book in page.json()["items"]]
+
+
+async def main(args: argparse.Namespace) -> None:
+    auth = app.container.auth_service()
+    admin = {"Authorization": f"Bearer {auth.create_token({'id': 'admin', 'is_superuser': True})}"}  # fmt: skip
+    users = [
+        {"Authorization": f"Bearer {auth.create_token({'id': f'user-{i}', 'is_superuser': False})}"}  # fmt: skip
+        for i in range(args.clients)
+    ]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=None
+    ) as client:
+        book_ids = await seed(client, admin, args.books)
+        latencies: list[float] = []
+        outcomes: Counter = Counter()
+        winners: Counter = Counter()
+
+        async def rent(book_id: str, headers: dict) -> None:
+            started = time.perf_counter()
+            response = await client.post(
+                "/rental",
+                json={"book_id": book_id, "rented_at": "2024-01-01"},
+                headers=headers,
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code == 201:
+                winners[book_id] += 1
+                outcomes["created"] += 1
+            elif "already on loan" in response.text:
+                outcomes["on_loan"] += 1
+            else:
+                outcomes[f"error {response.status_code}: {response.text[:60]}"] += 1
+
+        started = time.perf_counter()
+        for book_id in book_ids:
+            await asyncio.gather(*(rent(book_id, headers) for headers in users))
+        elapsed = time.perf_counter() - started
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"books={len(book_ids)} clients={args.clients} requests={len(latencies)} "
+        f"seconds={elapsed:.2f} req/s={len(latencies) / elapsed:.0f}"
+    )
+    print(
+        f"p50={quantiles[49]:.1f}ms p95={quantiles[94]:.1f}ms p99={quantiles[98]:.1f}ms"
+    )
+    print(f"outcomes={dict(outcomes)}")
+    double = [book_id for book_id, count in winners.items() if count > 1]
+    print(
+        f"books with one winner={len(winners) - len(double)} double-booked={len(double)}"
+    )
+    await app.container.db().dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""get_by_user and the first history page for one user with a long loan
+history, before and after returned rentals are moved to the archive.
+
+Usage: python -m benchmarks.rental_history [--loans 10000] [--active 5] [--iterations 100] [--output FILE.json]
+"""
+
+import argparse
+import asyncio
+import datetime
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import insert
+
+from app.db import Database
+from app.models import Rental
+from app.repositories.archive import AsyncRentalArchiveRepository
+from app.repositories.rental import AsyncRentalRepository
+from app.services.archive import RentalArchiver
+from benchmarks import micro, results
+
+
+def seed_history(db: Database, book_ids: list[str], loans: int, active: int) -> str:
+    user = str(uuid.uuid4())
+    start = datetime.date(2020, 1, 1)
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "book_id": book_ids[i % len(book_ids)],
+            "user_id": user,
+            "rented_at": start + datetime.timedelta(days=i // 10),
+            "returned_at": start + datetime.timedelta(days=i // 10 + 14),
+            "closed_at": datetime.datetime.combine(
+                start + datetime.timedelta(days=i // 10 + 7), datetime.time()
+            ),
+        }
+        for i in range(loans)
+    ]
+    rows += [
+        {
+            "id": str(uuid.uuid4()),
+            "book_id": book_ids[-(i + 1)],
+            "user_id": user,
+            "rented_at": datetime.date.today(),
+            "returned_at": datetime.date.today() + datetime.timedelta(days=30),
+            "closed_at": None,
+        }
+        for i in range(active)
+    ]
+    with db.session() as session:
+        for chunk in range(0, len(rows), 5000):
+            session.execute(insert(Rental), rows[chunk : chunk + 5000])
+        session.commit()
+    return user
+
+
+async def main(args: argparse.Namespace) -> None:
+    db = Database(f"sqlite:///{Path(tempfile.mkdtemp()) / 'rental_history.db'}")
+    book_ids = micro.seed(db, args.books)
+    user = seed_history(db, book_ids, args.loans, args.active)
+    rentals = AsyncRentalRepository(db.async_session)
+    n = args.iterations
+
+    async def measure_reads() -> dict:
+        return {
+            "get_by_user": await micro.measure(n, lambda: rentals.get_by_user(user)),
+            "get_page": await micro.measure(n, lambda: rentals.get_page(50, user=user)),
+        }
+
+    summary = {"before_archive": await measure_reads()}
+    archiver = RentalArchiver(
+        AsyncRentalArchiveRepository(db.async_session),
+        after_days=args.after_days,
+        batch_size=args.batch_size,
+    )
+    started = time.perf_counter()
+    archived = await archiver.run_once()
+    summary["archive_run"] = {
+        "archived": archived,
+        "seconds": time.perf_counter() - started,
+    }
+    summary["after_archive"] = {
+        **await measure_reads(),
+        "get_by_user_archived": await micro.measure(
+            n, lambda: rentals.get_by_user(user, archived=True)
+        ),
+        "get_page_archived": await micro.measure(
+            n, lambda: rentals.get_page(50, user=user, archived=True)
+        ),
+    }
+    summary["rows"] = {
+        "hot": len(await rentals.get_by_user(user)),
+        "with_archive": len(await rentals.get_by_user(user, archived=True)),
+    }
+    await db.dispose()
+    results.write(args.output, "rental_history", vars(args), summary)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--loans", type=int, default=10_000)
+    parser.add_argument("--active", type=int, default=5)
+    parser.add_argument("--after-days", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
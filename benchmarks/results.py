@@ -0,0 +1,94 @@
+"""Shared timing summaries and JSON result files for the benchmark scripts.
+
+Usage: python -m benchmarks.results BEFORE.json AFTER.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+
+def summarize(latencies: list[float], seconds: float) -> dict:
+    if not latencies:
+        return {"count": 0}
+    cuts = (
+        statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    )
+    return {
+        "count": len(latencies),
+        "per_second": len(latencies) / seconds,
+        "mean_ms": statistics.fmean(latencies),
+        "p50_ms": cuts[49],
+        "p95_ms": cuts[94],
+        "p99_ms": cuts[98],
+    }
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write(path: str | None, benchmark: str, config: dict, results: dict) -> None:
+    document = {
+        "benchmark": benchmark,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": config,
+        "results": results,
+    }
+    text = json.dumps(document, indent=2, sort_keys=True)
+    if path:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        Path(path).write_text(text + "\n")
+    print(text)
+
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(before: dict, after: dict) -> list[tuple[str, float, float, float]]:
+    old, new = flatten(before["results"]), flatten(after["results"])
+    rows = []
+    for key in sorted(old.keys() & new.keys()):
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        rows.append((key, old[key], new[key], change))
+    return rows
+
+
+def main(args: argparse.Namespace) -> None:
+    before = json.loads(Path(args.before).read_text())
+    after = json.loads(Path(args.after).read_text())
+    if before["benchmark"] != after["benchmark"]:
+        sys.exit(f"Cannot compare {before['benchmark']} with {after['benchmark']}")
+    print(f"{'metric':<40}{before['revision'] or 'before':>14}{after['revision'] or 'after':>14}{'change':>10}")  # fmt: skip
+    for key, old, new, change in compare(before, after):
+        print(f"{key:<40}{old:>14.2f}{new:>14.2f}{change:>+9.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("before")
+    parser.add_argument("after")
+    main(parser.parse_args())
@@ -0,0 +1,77 @@
+"""Latency of GET /search's FTS5 index against a LIKE '%q%' scan.
+
+Usage: python -m benchmarks.search [--books 1000000] [--repeat 20]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from sqlalchemy import insert
+
+from app.db import Database
+from app.models import Book
+from app.repositories.search import AsyncSearchRepository, FTS5Search, LikeSearch
+
+SYLLABLES = ["ka", "lo", "mir", "ten", "sa", "vel", "dor", "ian", "re", "shu", "bel"]
+QUERIES = ["kalo", "mir", "tensa velre", "xylophone"]
+
+
+def vocabulary(rng: random.Random, size: int = 20_000) -> list[str]:
+    return ["".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))) for _ in range(size)]
+
+
+def seed(db: Database, books: int) -> None:
+    db.create_database()
+    rng = random.Random(0)
+    words = vocabulary(rng)
+    with db.session() as session:
+        for start in range(0, books, 10_000):
+            session.execute(
+                insert(Book),
+                [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "name": " ".join(rng.choices(words, k=4)) + f" {i}",
+                    }
+                    for i in range(start, min(start + 10_000, books))
+                ],
+            )
+        session.commit()
+
+
+async def measure(repository: AsyncSearchRepository, query: str, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await repository.search(query, ["book"], limit=50)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def main(args: argparse.Namespace) -> None:
+    db = Database(f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench.db'}")
+    started = time.perf_counter()
+    seed(db, args.books)
+    print(f"seeded {args.books} books in {time.perf_counter() - started:.1f}s")
+    backends = {"fts5": FTS5Search(), "like": LikeSearch()}
+    print(f"{'query':<16}" + "".join(f"{name:>12}" for name in backends))
+    for query in QUERIES:
+        row = f"{query!r:<16}"
+        for backend in backends.values():
+            repository = AsyncSearchRepository(db.async_session, backend)
+            row += f"{await measure(repository, query, args.repeat):>10.1f}ms"
+        print(row)
+    await db.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
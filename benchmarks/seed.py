@@ -0,0 +1,326 @@
+"""Fill a database with a deterministic, Zipf-skewed catalogue and rental history.
+
+Usage: python -m benchmarks.seed DATABASE_URL [--preset 10k|1m|10m] [--seed 0]
+    [--reset] [--batch 50000] [--workers N]
+
+Every synthetic user's password is "password".
+"""
+
+import argparse
+import datetime
+import functools
+import os
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable
+
+from sqlalchemy import bindparam, create_engine, func, insert, select, text, update
+from sqlalchemy.engine import Connection
+
+from app.db import Base
+from app.models import Author, Book, Library, Rental, User
+from app.repositories.counters import COUNTED
+from app.repositories.password_managment import hash_password
+from app.repositories.search import BACKENDS, LikeSearch
+
+PRESETS = {
+    "10k": {
+        "libraries": 10,
+        "authors": 1_000,
+        "books": 10_000,
+        "users": 1_000,
+        "rentals": 30_000,
+    },
+    "1m": {
+        "libraries": 100,
+        "authors": 50_000,
+        "books": 1_000_000,
+        "users": 100_000,
+        "rentals": 3_000_000,
+    },
+    "10m": {
+        "libraries": 500,
+        "authors": 200_000,
+        "books": 10_000_000,
+        "users": 500_000,
+        "rentals": 30_000_000,
+    },
+}
+# Share of books with an open loan, and how far back rental history goes.
+OPEN_SHARE = 0.02
+HISTORY_DAYS = 730
+TODAY = datetime.date(2026, 1, 1)
+NOW = "2026-01-01 00:00:00.000000"
+
+
+def uid(prefix: int, i: int) -> str:
+    return f"{prefix:08x}-0000-4000-8000-{i:012x}"
+
+
+@functools.lru_cache(maxsize=8)
+def ids(prefix: int, count: int) -> list[str]:
+    return [uid(prefix, i) for i in range(count)]
+
+
+class Zipf:
+    # Log-uniform ranks give P(rank k) ~ 1/k; a multiplicative permutation
+    # spreads the popular ranks across the id space.
+    def __init__(self, n: int, rng: random.Random) -> None:
+        self.n = n
+        self.rng = rng
+        self.step = next(p for p in range(n // 2 + 1, 2 * n + 2) if _coprime(p, n))
+
+    def __call__(self) -> int:
+        rank = int(self.n ** self.rng.random()) - 1
+        return (rank * self.step) % self.n
+
+
+def _coprime(a: int, b: int) -> bool:
+    while b:
+        a, b = b, a % b
+    return a == 1
+
+
+@functools.lru_cache(maxsize=8)
+def days(count: int) -> list[str]:
+    start = TODAY - datetime.timedelta(days=count)
+    return [str(start + datetime.timedelta(days=i)) for i in range(count + 60)]
+
+
+def libraries(start: int, stop: int, counts: dict, rng: random.Random) -> list:
+    return [
+        (uid(1, i), f"Library {i}", f"City {i % 50}", 0, 0, NOW)
+        for i in range(start, stop)
+    ]
+
+
+def authors(start: int, stop: int, counts: dict, rng: random.Random) -> list:
+    return [(uid(2, i), f"Author {i}", 0, 0, NOW) for i in range(start, stop)]
+
+
+def books(start: int, stop: int, counts: dict, rng: random.Random) -> list:
+    authors = ids(2, counts["authors"])
+    libraries = ids(1, counts["libraries"])
+    author = Zipf(counts["authors"], rng)
+    dates = days(36_500)
+    random = rng.random
+    return [
+        (
+            uid(3, i),
+            f"Book {i}",
+            dates[int(random() * 36_000)],
+            authors[author()],
+            libraries[int(random() * len(libraries))],
+            NOW,
+        )
+        for i in range(start, stop)
+    ]
+
+
+def users(start: int, stop: int, counts: dict, rng: random.Random) -> list:
+    password = counts["password"]
+    return [
+        (uid(4, i), f"user{i}", f"user{i}@example.com", password, True, False)
+        for i in range(start, stop)
+    ]
+
+
+def rentals(start: int, stop: int, counts: dict, rng: random.Random) -> list:
+    # Rentals past the closed share are open, one per book, on distinct books.
+    # The Zipf draws are inlined: this loop produces most of the rows.
+    book_count, user_count = counts["books"], counts["users"]
+    book_step = Zipf(book_count, rng).step
+    user_step = Zipf(user_count, rng).step
+    users = ids(4, user_count)
+    dates = days(HISTORY_DAYS)
+    random = rng.random
+    closed = counts["rentals"] - int(book_count * OPEN_SHARE)
+    rows = []
+    append = rows.append
+    for i in range(start, min(stop, closed)):
+        day = int(random() * (HISTORY_DAYS - 45))
+        book = (int(book_count ** random()) - 1) * book_step % book_count
+        append(
+            (
+                uid(5, i),
+                uid(3, book),
+                users[(int(user_count ** random()) - 1) * user_step % user_count],
+                dates[day],
+                dates[day + 30],
+                dates[day + 1 + int(random() * 44)] + " 12:00:00.000000",
+                NOW,
+            )
+        )
+    for i in range(max(start, closed), stop):
+        day = HISTORY_DAYS - 1 - int(random() * 44)
+        append(
+            (
+                uid(5, i),
+                uid(3, (i - closed) * book_step % book_count),
+                users[(int(user_count ** random()) - 1) * user_step % user_count],
+                dates[day],
+                dates[day + 30],
+                None,
+                NOW,
+            )
+        )
+    return rows
+
+
+def generate(table: str, start: int, stop: int, counts: dict, seed: int) -> list:
+    rng = random.Random(f"{seed}:{table}:{start}")
+    return GENERATORS[table](start, stop, counts, rng)
+
+
+GENERATORS = {
+    "libraries": libraries,
+    "authors": authors,
+    "books": books,
+    "users": users,
+    "rentals": rentals,
+}
+MODELS = {
+    "libraries": Library,
+    "authors": Author,
+    "books": Book,
+    "users": User,
+    "rentals": Rental,
+}
+
+
+COLUMNS = {
+    Library: ("id", "name", "city", "book_count", "on_loan_count", "updated_at"),
+    Author: ("id", "name", "book_count", "on_loan_count", "updated_at"),
+    Book: ("id", "name", "written_at", "author_id", "library_id", "updated_at"),
+    User: ("id", "name", "email", "password", "is_active", "is_superuser"),
+    Rental: (
+        "id",
+        "book_id",
+        "user_id",
+        "rented_at",
+        "returned_at",
+        "closed_at",
+        "updated_at",
+    ),
+}
+
+
+def statement(connection: Connection, model) -> tuple[str, Callable]:
+    columns = COLUMNS[model]
+    compiled = insert(model.__table__).compile(
+        dialect=connection.dialect, column_keys=list(columns)
+    )
+    if not compiled.positional:
+        return str(compiled), lambda rows: [dict(zip(columns, row)) for row in rows]
+    order = [columns.index(key) for key in compiled.positiontup]
+    if order == list(range(len(columns))):
+        return str(compiled), lambda rows: rows
+    return str(compiled), lambda rows: [tuple(row[i] for i in order) for row in rows]
+
+
+def count_books(connection: Connection) -> None:
+    # Authors and libraries go in before their books, so their counters are
+    # filled afterwards from grouped counts over the loaded rows.
+    for model, parent in COUNTED.items():
+        counted = select(parent, func.count()).group_by(parent)
+        on_loan = (
+            counted.select_from(Rental)
+            .join(Book, Rental.book_id == Book.id)
+            .where(Rental.closed_at.is_(None))
+        )
+        table = model.__table__
+        for column, counts in (("book_count", counted), ("on_loan_count", on_loan)):
+            rows = [{"parent_id": id, "n": n} for id, n in connection.execute(counts)]
+            if rows:
+                connection.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("parent_id"))
+                    .values({column: bindparam("n")}),
+                    rows,
+                )
+
+
+def load(
+    connection: Connection,
+    executor: ProcessPoolExecutor | None,
+    table: str,
+    counts: dict,
+    args: argparse.Namespace,
+) -> int:
+    sql, convert = statement(connection, MODELS[table])
+    chunks = iter(range(0, counts[table], args.batch))
+    pending: deque = deque()
+    total = 0
+    while True:
+        while len(pending) < max(2 * args.workers, 1):
+            start = next(chunks, None)
+            if start is None:
+                break
+            stop = min(start + args.batch, counts[table])
+            if executor is None:
+                pending.append(generate(table, start, stop, counts, args.seed))
+            else:
+                pending.append(
+                    executor.submit(generate, table, start, stop, counts, args.seed)
+                )
+        if not pending:
+            return total
+        rows = pending.popleft()
+        if executor is not None:
+            rows = rows.result()
+        connection.exec_driver_sql(sql, convert(rows))
+        total += len(rows)
+
+
+def main(args: argparse.Namespace) -> None:
+    counts = PRESETS[args.preset]
+    engine = create_engine(args.database_url)
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    search = BACKENDS.get(engine.dialect.name, LikeSearch)()
+    counts = {**counts, "password": hash_password("password")}
+    started = time.perf_counter()
+    inserted = 0
+    executor = ProcessPoolExecutor(args.workers) if args.workers > 1 else None
+    with engine.begin() as connection:
+        if engine.dialect.name == "sqlite":
+            connection.execute(text("PRAGMA synchronous = OFF"))
+        search.drop(connection)
+        indexes = [
+            index for table in Base.metadata.sorted_tables for index in table.indexes
+        ]
+        for index in indexes:
+            index.drop(connection)
+        for table in GENERATORS:
+            table_started = time.perf_counter()
+            rows = load(connection, executor, table, counts, args)
+            elapsed = time.perf_counter() - table_started
+            inserted += rows
+            print(f"{table:<10}{rows:>12,} rows {elapsed:>8.1f}s {rows / elapsed:>12,.0f} rows/s")  # fmt: skip
+        count_books(connection)
+        load_seconds = time.perf_counter() - started
+        for index in indexes:
+            index.create(connection)
+        search.create(connection)
+    if executor is not None:
+        executor.shutdown()
+    total_seconds = time.perf_counter() - started
+    print(
+        f"inserted {inserted:,} rows in {load_seconds:.1f}s "
+        f"({inserted / load_seconds:,.0f} rows/s), "
+        f"{total_seconds:.1f}s including indexes"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("database_url")
+    parser.add_argument("--preset", choices=PRESETS, default="10k")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--reset", action="store_true")
+    main(parser.parse_args())
@@ -0,0 +1,102 @@
+"""Rows per second for large list responses: ORM + pydantic + json against
+column rows + compiled serializer + orjson.
+
+Usage: python -m benchmarks.serialization [--items 10000] [--repeat 10] [--output FILE.json]
+"""
+
+import argparse
+import asyncio
+import datetime
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert
+
+from app.db import Database
+from app.models import Author, Book, Library
+from app.repositories.author import AsyncAuthorRepository
+from app.repositories.book import AsyncBookRepository
+from app.schemas import AuthorSchema, BookSchema, Page
+from app.serialization import page_response
+from benchmarks import results
+
+
+def seed(db: Database, items: int) -> None:
+    db.create_database()
+    library = {"id": str(uuid.uuid4()), "name": "Serialization", "city": "Bench"}
+    authors = [{"id": str(uuid.uuid4()), "name": f"Author {i}"} for i in range(items)]
+    books = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Book {i}",
+            "written_at": datetime.date(2000, 1, 1) + datetime.timedelta(days=i),
+            "author_id": authors[i % len(authors)]["id"],
+            "library_id": library["id"],
+        }
+        for i in range(items)
+    ]
+    with db.session() as session:
+        session.execute(insert(Library), [library])
+        session.execute(insert(Author), authors)
+        session.execute(insert(Book), books)
+        session.commit()
+
+
+async def measure(repeat: int, items: int, operation) -> dict:
+    latencies = []
+    size = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        began = time.perf_counter()
+        size = len((await operation()).body)
+        latencies.append((time.perf_counter() - began) * 1000)
+    seconds = time.perf_counter() - started
+    summary = results.summarize(latencies, seconds)
+    return {**summary, "rows_per_second": items * repeat / seconds, "bytes": size}
+
+
+async def main(args: argparse.Namespace) -> None:
+    db = Database(f"sqlite:///{Path(tempfile.mkdtemp()) / 'serialization.db'}")
+    seed(db, args.items)
+    books = AsyncBookRepository(db.async_session)
+    authors = AsyncAuthorRepository(db.async_session)
+    n = args.items
+
+    async def orm(repository, schema) -> JSONResponse:
+        page = await repository.get_page(n)
+        return JSONResponse(jsonable_encoder(Page[schema].validate(page)))
+
+    async def rows(repository, schema):
+        return page_response(schema, await repository.get_rows(n))
+
+    summary = {}
+    for name, repository, schema in (
+        ("book", books, BookSchema),
+        ("author", authors, AuthorSchema),
+    ):
+        summary[name] = {
+            "orm_pydantic_json": await measure(
+                args.repeat, n, lambda: orm(repository, schema)
+            ),
+            "rows_orjson": await measure(
+                args.repeat, n, lambda: rows(repository, schema)
+            ),
+        }
+        summary[name]["speedup"] = (
+            summary[name]["rows_orjson"]["rows_per_second"]
+            / summary[name]["orm_pydantic_json"]["rows_per_second"]
+        )
+    await db.dispose()
+    results.write(args.output, "serialization", vars(args), summary)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,108 @@
+"""Pool checkouts, commits and latency per request-shaped flow, with every
+repository call on its own session against one unit of work per flow.
+
+Usage: python -m benchmarks.unit_of_work [--books 2000] [--iterations 300] [--output FILE.json]
+"""
+
+import argparse
+import asyncio
+import datetime
+import random
+import tempfile
+from collections import Counter
+from contextlib import nullcontext
+from pathlib import Path
+
+from sqlalchemy import event
+
+from app.db import Database
+from app.repositories.author import AsyncAuthorRepository, CachedAuthorRepository
+from app.repositories.book import AsyncBookRepository, CachedBookRepository
+from app.repositories.cache import EntityCache
+from app.repositories.rental import AsyncRentalRepository
+from app.schemas import AuthorSchemaIn, BookSchemaIn, RentalSchemaIn
+from app.services.author import AsyncAuthorService
+from app.services.book import AsyncBookService
+from benchmarks import micro, results
+
+
+def count_events(db: Database) -> Counter:
+    counts = Counter()
+    for engine in db.engines:
+        event.listen(engine, "checkout", lambda *_: counts.update(["checkouts"]))
+        event.listen(engine, "commit", lambda *_: counts.update(["commits"]))
+    return counts
+
+
+async def main(args: argparse.Namespace) -> None:
+    db = Database(f"sqlite:///{Path(tempfile.mkdtemp()) / 'unit_of_work.db'}")
+    book_ids = micro.seed(db, args.books)
+    counts = count_events(db)
+    # Cache off, so every lookup reaches the database as on a cold request.
+    cache = EntityCache(max_size=0)
+    books = AsyncBookService(
+        CachedBookRepository(AsyncBookRepository(db.async_session), cache)
+    )
+    authors = AsyncAuthorService(
+        CachedAuthorRepository(AsyncAuthorRepository(db.async_session), cache)
+    )
+    rentals = AsyncRentalRepository(db.async_session)
+    rng = random.Random(args.seed)
+
+    async def update_book() -> None:
+        book = await books.get_book(rng.choice(book_ids))
+        await books.update_book(
+            book.id,
+            BookSchemaIn(
+                name=book.name,
+                written_at=book.written_at + datetime.timedelta(days=1),
+                author_id=book.author_id,
+                library_id=book.library_id,
+            ),
+        )
+
+    async def rent_and_return() -> None:
+        rental = await rentals.add(
+            RentalSchemaIn(book_id=rng.choice(book_ids), rented_at="2024-01-01")
+        )
+        await rentals.close(rental.id)
+
+    async def rename_author() -> None:
+        [book] = await books.get_books([rng.choice(book_ids)])
+        author = await authors.get_author(book.author_id)
+        await authors.update_author(author.id, AuthorSchemaIn(name=author.name))
+
+    summary = {}
+    for name, flow in (
+        ("update_book", update_book),
+        ("rent_and_return", rent_and_return),
+        ("rename_author", rename_author),
+    ):
+        summary[name] = {}
+        for mode, scope in (
+            ("session_per_call", nullcontext),
+            ("unit_of_work", db.unit_of_work),
+        ):
+            counts.clear()
+
+            async def request() -> None:
+                async with scope():
+                    await flow()
+
+            timing = await micro.measure(args.iterations, request)
+            summary[name][mode] = {
+                **timing,
+                "checkouts_per_request": counts["checkouts"] / args.iterations,
+                "commits_per_request": counts["commits"] / args.iterations,
+            }
+    await db.dispose()
+    results.write(args.output, "unit_of_work", vars(args), summary)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--books", type=int, default=2000)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output")
+    asyncio.run(main(parser.parse_args()))
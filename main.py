@@ -1,17 +1,63 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.routes import router
 from app.containers import Container
+from app.db import ReadYourWritesMiddleware, UnitOfWorkMiddleware
+from app.metrics import MetricsMiddleware
+from app.single_flight import SingleFlightMiddleware
+from app.query_budget import RepeatedStatementMiddleware
 import uvicorn
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI()
 container = Container()
 db = container.db()
 db.create_database()
+metrics = container.metrics()
+for engine in db.engines:
+    metrics.instrument(engine)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    scanner = container.overdue_scanner()
+    scanner.start()
+    reconciler = container.counter_reconciler()
+    reconciler.start()
+    archiver = container.rental_archiver()
+    archiver.start()
+    yield
+    await archiver.stop()
+    await reconciler.stop()
+    await scanner.stop()
+    await db.dispose()
+    container.password_hasher().shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 app.container = container
 app.include_router(router)
+# Inside the metrics middleware, so coalesced requests are still counted.
+app.add_middleware(
+    SingleFlightMiddleware,
+    single_flight=container.single_flight(),
+    metrics=metrics,
+    paths=("/book", "/author", "/library"),
+)
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+if container.config.db.unit_of_work():
+    # Bulk imports commit chunk by chunk instead of holding one transaction
+    # (and SQLite's write lock) for the whole upload.
+    bulk = ("/book/bulk", "/author/bulk", "/library/bulk")
+    # Logins and user writes await bcrypt in the process pool; a unit of work
+    # would hold its pooled connection for the whole hash.
+    hashing = ("/token", "/user")
+    app.add_middleware(UnitOfWorkMiddleware, db=db, exclude=bulk + hashing)
+if db.replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
+if container.config.dev_mode():
+    app.add_middleware(RepeatedStatementMiddleware, query_budget=db.query_budget)
 
 if __name__ == "__main__":
     uvicorn.run(app)
@@ -0,0 +1,19 @@
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+
+
+@pytest.fixture
+def query_budget():
+    return app.container.db().query_budget
+
+
+@pytest.fixture(scope="session", autouse=True)
+def dispose_database():
+    # Pooled aiosqlite connections each hold a worker thread open.
+    yield
+    asyncio.run(app.container.db().dispose())
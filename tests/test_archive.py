@@ -0,0 +1,117 @@
+import asyncio
+import httpx
+import pytest
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+from sqlalchemy import func, insert, select
+from app.db import Database
+from app.models import ArchivedRental, Rental
+from app.repositories.archive import AsyncRentalArchiveRepository
+from app.repositories.rental import AsyncRentalRepository
+from app.services.archive import RentalArchiver
+
+BASE_URL = "http://localhost:8000"
+
+
+def test_archive_moves_old_returned_rentals(tmp_path):
+    db = Database(f"sqlite:///{tmp_path / 'archive.db'}")
+    db.create_database()
+    now = datetime(2024, 6, 1)
+    rows = [
+        {
+            "id": f"r{i:02}",
+            "user_id": "u",
+            "rented_at": date(2023, 1, 1) + timedelta(days=i),
+            "returned_at": date(2023, 2, 1),
+            "closed_at": now - timedelta(days=30 - i) if i < 25 else None,
+        }
+        for i in range(30)
+    ]
+    with db.session() as session:
+        session.execute(insert(Rental), rows)
+        session.commit()
+    rentals = AsyncRentalRepository(db.async_session)
+    archiver = RentalArchiver(
+        AsyncRentalArchiveRepository(db.async_session), after_days=10, batch_size=8
+    )
+
+    async def run() -> tuple:
+        archived = await archiver.run_once(now)
+        hot = await rentals.get_by_user("u")
+        everything = await rentals.get_by_user("u", archived=True)
+        pages, cursor = [], None
+        while True:
+            page = await rentals.get_page(7, cursor, user="u", archived=True)
+            pages.append([item["id"] for item in page.items])
+            if not (cursor := page.next_cursor):
+                break
+        found = await rentals.get_by_id("r00", archived=True)
+        async with db.async_session() as session:
+            stored = await session.scalar(select(func.count(ArchivedRental.id)))
+        await db.dispose()
+        return archived, hot, everything, pages, found, stored
+
+    archived, hot, everything, pages, found, stored = asyncio.run(run())
+    # Closed more than 10 days before now: r00..r19.
+    assert archived == stored == 20
+    assert sorted(rental.id for rental in hot) == [f"r{i:02}" for i in range(20, 30)]
+    assert len(everything) == 30
+    assert [id for page in pages for id in page] == [row["id"] for row in rows]
+    assert max(map(len, pages)) == 7
+    assert found.closed_at == now - timedelta(days=30)
+    assert archiver.stats()["archived"] == 20
+
+
+@pytest.mark.asyncio
+async def test_history_endpoint_reads_archive_only_when_asked():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        author = await client.post(
+            "/author", json={"name": f"Archived {suffix}"}, headers=headers
+        )
+        library = await client.post(
+            "/library",
+            json={"name": f"Archived {suffix}", "city": "X"},
+            headers=headers,
+        )
+        book = await client.post(
+            "/book",
+            json={
+                "name": f"Archived {suffix}",
+                "author_id": author.json()["id"],
+                "library_id": library.json()["id"],
+                "written_at": "2001-01-01",
+            },
+            headers=headers,
+        )
+        rental = await client.post(
+            "/rental",
+            json={"book_id": book.json()["id"], "rented_at": "2001-01-01"},
+            headers=headers,
+        )
+        id = rental.json()["id"]
+        await client.post("/rental/return", params={"id": id}, headers=headers)
+
+        archiver = app.container.rental_archiver()
+        assert await archiver.run_once(datetime.utcnow() + timedelta(days=400)) >= 1
+
+        params = {"id": id}
+        response = await client.get("/rental", params=params, headers=headers)
+        assert response.status_code == 404
+        params["archived"] = True
+        response = await client.get("/rental", params=params, headers=headers)
+        assert response.json()["id"] == id
+
+        params = {"limit": 500}
+        page = await client.get("/rental", params=params, headers=headers)
+        assert id not in [item["id"] for item in page.json()["items"]]
+        params["archived"] = True
+        page = await client.get("/rental", params=params, headers=headers)
+        assert id in [item["id"] for item in page.json()["items"]]
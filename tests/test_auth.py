@@ -0,0 +1,45 @@
+import jwt
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from app.services import auth
+from app.services.auth import AuthService
+
+SECRET_KEY = "test-secret-key-of-sufficient-length"
+
+
+def test_decode_token_is_cached():
+    auth_service = AuthService(SECRET_KEY, "HS256")
+    token = auth_service.create_token({"id": "1", "is_superuser": False})
+    assert auth_service.decode_token(token)["id"] == "1"
+    assert auth_service.decode_token(token)["id"] == "1"
+    stats = auth_service.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+
+
+def test_cached_token_expires_at_exp(monkeypatch):
+    auth_service = AuthService(SECRET_KEY, "HS256")
+    token = auth_service.create_token({"id": "1"})
+    exp = auth_service.decode_token(token)["exp"]
+    monkeypatch.setattr(auth.time, "time", lambda: exp + 1)
+    auth_service.decode_token(token)
+    assert auth_service.stats()["misses"] == 2
+
+
+def test_cache_is_bounded():
+    auth_service = AuthService(SECRET_KEY, "HS256", cache_size=2)
+    tokens = [auth_service.create_token({"id": str(i)}) for i in range(3)]
+    for token in tokens:
+        auth_service.decode_token(token)
+    stats = auth_service.stats()
+    assert (stats["size"], stats["evictions"]) == (2, 1)
+
+
+def test_invalid_token_is_not_cached():
+    auth_service = AuthService(SECRET_KEY, "HS256")
+    token = jwt.encode({"id": "1"}, "another-secret-key-of-sufficient-len")
+    with pytest.raises(jwt.InvalidTokenError):
+        auth_service.decode_token(token)
+    assert auth_service.stats()["size"] == 0
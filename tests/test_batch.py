@@ -0,0 +1,92 @@
+import asyncio
+import httpx
+import pytest
+import sys
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+from app.repositories.batch import BatchLoader, fetch_by_ids
+from app.models import Author
+from sqlalchemy import select
+
+BASE_URL = "http://localhost:8000"
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_coalesces_loads():
+    calls = []
+
+    async def load_many(keys):
+        calls.append(keys)
+        return [key * 2 for key in keys]
+
+    loader = BatchLoader(load_many)
+    assert await asyncio.gather(loader.load(1), loader.load(2), loader.load(1)) == [
+        2,
+        4,
+        2,
+    ]
+    assert await loader.load_many([2, 3]) == [4, 6]
+    assert calls == [[1, 2], [3]]
+    assert loader.stats() == {"batches": 2, "keys": 3}
+
+
+@pytest.mark.asyncio
+async def test_batch_loader_failure_is_not_cached():
+    calls = []
+
+    async def load_many(keys):
+        calls.append(keys)
+        if len(calls) == 1:
+            raise RuntimeError("down")
+        return keys
+
+    loader = BatchLoader(load_many)
+    with pytest.raises(RuntimeError):
+        await loader.load("a")
+    assert await loader.load("a") == "a"
+
+
+@pytest.mark.asyncio
+async def test_get_many_ids_in_request_order(query_budget):
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        ids = [
+            (
+                await client.post(
+                    "/author", json={"name": f"Batch {uuid4().hex}"}, headers=headers
+                )
+            ).json()["id"]
+            for _ in range(3)
+        ]
+        wanted = [ids[2], "missing", ids[0], ids[2]]
+
+        with query_budget.limit(2, "GET /author with 4 ids"):
+            response = await client.get(
+                "/author", params={"id": [wanted[0], ",".join(wanted[1:])]}
+            )
+        assert response.status_code == 200
+        assert [author["id"] for author in response.json()] == [ids[2], ids[0], ids[2]]
+
+        response = await client.get("/author", params={"id": ids[1]})
+        assert response.json()["id"] == ids[1]
+
+        response = await client.get("/author", params={"id": ["missing", "gone"]})
+        assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_fetch_by_ids_chunks(query_budget):
+    db = app.container.db()
+    async with db.async_session() as session:
+        session.add_all(Author(name=f"Chunk {uuid4().hex}") for _ in range(4))
+        await session.commit()
+        authors = (await session.execute(select(Author).limit(4))).scalars().all()
+        ids = [author.id for author in reversed(authors)] + ["missing"]
+        with query_budget.limit(3, "5 ids in chunks of 2") as log:
+            found = await fetch_by_ids(session, select(Author), Author.id, ids, 2)
+    assert len(log) == 3
+    assert [author and author.id for author in found] == ids[:-1] + [None]
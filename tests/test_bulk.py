@@ -0,0 +1,83 @@
+import httpx
+import json
+import pytest
+import sys
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+
+BASE_URL = "http://localhost:8000"
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_books():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        library = await client.post(
+            "/library", json={"name": f"Bulk {suffix}", "city": "X"}, headers=headers
+        )
+        book = {"written_at": "2001-01-01", "library_id": library.json()["id"]}
+        lines = [
+            json.dumps({**book, "name": f"Bulk 1 {suffix}", "author": suffix}),
+            json.dumps({**book, "name": f"Bulk 2 {suffix}", "author": suffix}),
+            json.dumps({**book, "name": f"Bulk 2 {suffix}", "author": suffix}),
+            json.dumps({**book, "name": f"Bulk 3 {suffix}", "library_id": "nope"}),
+            "{not json",
+            json.dumps({**book, "name": f"Bulk 4 {suffix}", "author": "x" + suffix}),
+        ]
+        response = await client.post(
+            "/book/bulk",
+            content="\n".join(lines).encode(),
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        result = response.json()
+        assert (result["received"], result["created"]) == (6, 3)
+        assert [error["row"] for error in result["errors"]] == [3, 4, 5]
+        author = await client.get("/author", params={"name": suffix})
+        assert len(author.json()["books"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_authors_csv():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        body = f"name\nCSV 1 {suffix}\nCSV 2 {suffix}\nCSV 1 {suffix}\n"
+        response = await client.post(
+            "/author/bulk",
+            content=body.encode(),
+            headers={**headers, "Content-Type": "text/csv"},
+        )
+        assert response.json()["created"] == 2
+        assert [error["row"] for error in response.json()["errors"]] == [3]
+
+
+@pytest.mark.asyncio
+async def test_bulk_import_csv_quoted_newline():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        body = (
+            f'name\n"CSV\nmultiline, ""quoted"" {suffix}"\nCSV 5" {suffix}\n'
+            f'"CSV\n\nblank {suffix}"\n"CSV open {suffix}\n'
+        )
+        response = await client.post(
+            "/author/bulk",
+            content=body.encode(),
+            headers={**headers, "Content-Type": "text/csv"},
+        )
+        result = response.json()
+        assert (result["received"], result["created"]) == (4, 3)
+        assert [error["row"] for error in result["errors"]] == [4]
+        for name in (
+            f'CSV\nmultiline, "quoted" {suffix}',
+            f'CSV 5" {suffix}',
+            f"CSV\n\nblank {suffix}",
+        ):
+            author = await client.get("/author", params={"name": name})
+            assert author.status_code == 200
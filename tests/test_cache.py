@@ -0,0 +1,138 @@
+import httpx
+import pytest
+import sys
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+from app.repositories import cache
+from app.repositories.cache import EntityCache, MISSING
+
+BASE_URL = "http://localhost:8000"
+
+
+def test_cache_lru_and_ttl(monkeypatch):
+    entity_cache = EntityCache(max_size=2, ttl=10)
+    entity_cache.set("a", 1)
+    entity_cache.set("b", 2)
+    assert entity_cache.get("a") == 1
+    entity_cache.set("c", 3)
+    assert entity_cache.get("b") is MISSING
+    now = cache.time.monotonic()
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now + 11)
+    assert entity_cache.get("a") is MISSING
+    stats = entity_cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 2, 2)
+
+
+def test_cache_invalidates_by_tag():
+    entity_cache = EntityCache()
+    entity_cache.set("author:1", "author", tags=[("author", "1")])
+    entity_cache.set("book:1", "book", tags=[("book", "1"), ("author", "1", "books")])
+    entity_cache.invalidate(("author", "1"))
+    assert entity_cache.get("author:1") is MISSING
+    assert entity_cache.get("book:1") == "book"
+
+
+@pytest.mark.asyncio
+async def test_cache_skips_stale_load():
+    entity_cache = EntityCache()
+
+    async def load():
+        entity_cache.invalidate(("book", "1"))
+        return "stale"
+
+    assert await entity_cache.get_or_load("book:1", load, lambda _: []) == "stale"
+    assert entity_cache.get("book:1") is MISSING
+
+
+@pytest.mark.asyncio
+async def test_book_write_invalidates_author():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        author = await client.post(
+            "/author", json={"name": f"Cached {suffix}"}, headers=headers
+        )
+        library = await client.post(
+            "/library", json={"name": f"Cached {suffix}", "city": "X"}, headers=headers
+        )
+        params = {"id": author.json()["id"]}
+        assert (await client.get("/author", params=params)).json()["books"] == []
+        await client.post(
+            "/book",
+            json={
+                "name": f"Cached {suffix}",
+                "author_id": author.json()["id"],
+                "library_id": library.json()["id"],
+                "written_at": "2001-01-01",
+            },
+            headers=headers,
+        )
+        books = (await client.get("/author", params=params)).json()["books"]
+        assert [book["name"] for book in books] == [f"Cached {suffix}"]
+
+
+async def create_book(client: httpx.AsyncClient, headers: dict) -> dict:
+    suffix = uuid4().hex
+    author = await client.post(
+        "/author", json={"name": f"Cascade {suffix}"}, headers=headers
+    )
+    library = await client.post(
+        "/library", json={"name": f"Cascade {suffix}", "city": "X"}, headers=headers
+    )
+    book = await client.post(
+        "/book",
+        json={
+            "name": f"Cascade {suffix}",
+            "author_id": author.json()["id"],
+            "library_id": library.json()["id"],
+            "written_at": "2001-01-01",
+        },
+        headers=headers,
+    )
+    return book.json()
+
+
+async def cached_books(client: httpx.AsyncClient, book: dict) -> dict:
+    author = await client.get("/author", params={"id": book["author_id"]})
+    library = await client.get("/library", params={"id": book["library_id"]})
+    by_name = await client.get("/book", params={"name": book["name"]})
+    return {
+        "author": [item["id"] for item in author.json().get("books", [])],
+        "library": [item["id"] for item in library.json().get("books", [])],
+        "name": by_name.status_code,
+        "book": (await client.get("/book", params={"id": book["id"]})).status_code,
+    }
+
+
+@pytest.mark.asyncio
+async def test_library_delete_invalidates_cached_author_books():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        book = await create_book(client, headers)
+        assert (await cached_books(client, book))["author"] == [book["id"]]
+        response = await client.delete(
+            "/library", params={"id": book["library_id"]}, headers=headers
+        )
+        assert response.status_code == 200
+        found = await cached_books(client, book)
+        assert found["author"] == []
+        assert found["name"] == found["book"] == 404
+
+
+@pytest.mark.asyncio
+async def test_author_delete_invalidates_cached_library_books():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        book = await create_book(client, headers)
+        assert (await cached_books(client, book))["library"] == [book["id"]]
+        response = await client.delete(
+            "/author", params={"id": book["author_id"]}, headers=headers
+        )
+        assert response.status_code == 200
+        found = await cached_books(client, book)
+        assert found["library"] == []
+        assert found["name"] == found["book"] == 404
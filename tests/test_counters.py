@@ -0,0 +1,126 @@
+import httpx
+import pytest
+import sqlite3
+import sys
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+from sqlalchemy import select, update
+from app.db import Database
+from app.models import Author, Library
+
+BASE_URL = "http://localhost:8000"
+
+
+@pytest.mark.asyncio
+async def test_counts_follow_book_and_rental_writes():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+
+        async def create(path: str, **values) -> str:
+            response = await client.post(path, json=values, headers=headers)
+            return response.json()["id"]
+
+        author = await create("/author", name=f"Counted {suffix}")
+        other = await create("/author", name=f"Other {suffix}")
+        library = await create("/library", name=f"Counted {suffix}", city="X")
+        books = [
+            await create(
+                "/book",
+                name=f"Counted {i} {suffix}",
+                author_id=author,
+                library_id=library,
+                written_at="2001-01-01",
+            )
+            for i in range(3)
+        ]
+        rentals = [
+            await create("/rental", book_id=book, rented_at="2024-01-01")
+            for book in books[:2]
+        ]
+
+        async def counts(path: str, id: str) -> tuple[int, int]:
+            params = {"counts": True, "limit": 500}
+            page = (await client.get(path, params=params)).json()
+            [item] = [item for item in page["items"] if item["id"] == id]
+            assert "books" not in item
+            return item["book_count"], item["on_loan_count"]
+
+        assert await counts("/author", author) == (3, 2)
+        assert await counts("/library", library) == (3, 2)
+
+        await client.post("/rental/return", params={"id": rentals[0]}, headers=headers)
+        moved = {
+            "name": f"Counted 1 {suffix}",
+            "author_id": other,
+            "library_id": library,
+            "written_at": "2001-01-01",
+        }
+        await client.put("/book", params={"id": books[1]}, json=moved, headers=headers)
+        assert await counts("/author", author) == (2, 0)
+        assert await counts("/author", other) == (1, 1)
+        assert await counts("/library", library) == (3, 1)
+
+        await client.delete("/book", params={"id": books[1]}, headers=headers)
+        await client.delete("/author", params={"id": author}, headers=headers)
+        assert await counts("/author", other) == (0, 0)
+        assert await counts("/library", library) == (0, 0)
+
+        response = await client.get("/author", params={"id": other, "counts": True})
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_reconcile_repairs_drift():
+    db = app.container.db()
+    async with db.async_session() as session:
+        author = Author(name=f"Drifted {uuid4().hex}")
+        session.add(author)
+        await session.commit()
+        await session.execute(update(Library).values(book_count=Library.book_count + 7))
+        await session.execute(
+            update(Author).where(Author.id == author.id).values(on_loan_count=3)
+        )
+        await session.commit()
+
+    reconciler = app.container.counter_reconciler()
+    assert await reconciler.run_once() >= 2
+    assert await reconciler.run_once() == 0
+    async with db.async_session() as session:
+        result = await session.execute(
+            select(Author.book_count, Author.on_loan_count).where(
+                Author.id == author.id
+            )
+        )
+        assert result.one() == (0, 0)
+    assert reconciler.stats()["runs"] == 2
+
+
+def test_counters_added_to_existing_database(tmp_path):
+    path = tmp_path / "legacy.db"
+    with sqlite3.connect(path) as connection:
+        connection.executescript("""
+            CREATE TABLE authors (id VARCHAR PRIMARY KEY, name VARCHAR, updated_at DATETIME);
+            CREATE TABLE libraries (
+                id VARCHAR PRIMARY KEY, name VARCHAR, city VARCHAR, updated_at DATETIME
+            );
+            CREATE TABLE books (
+                id VARCHAR PRIMARY KEY, name VARCHAR, written_at DATE,
+                author_id VARCHAR, library_id VARCHAR, updated_at DATETIME
+            );
+            INSERT INTO authors VALUES ('a', 'Ann', NULL);
+            INSERT INTO libraries VALUES ('l', 'Central', 'X', NULL);
+            INSERT INTO books VALUES ('b1', 'One', NULL, 'a', 'l', NULL);
+            INSERT INTO books VALUES ('b2', 'Two', NULL, 'a', 'l', NULL);
+            """)
+    Database(f"sqlite:///{path}").create_database()
+    with sqlite3.connect(path) as connection:
+        rows = connection.execute(
+            "SELECT book_count, on_loan_count FROM authors "
+            "UNION ALL SELECT book_count, on_loan_count FROM libraries"
+        ).fetchall()
+    assert rows == [(2, 0), (2, 0)]
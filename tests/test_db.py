@@ -0,0 +1,138 @@
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from sqlalchemy import text
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.db import POOL_OPTIONS, Database, engine_options, split_urls, to_async_url
+from app.repositories.author import AsyncAuthorRepository
+from app.schemas import AuthorSchemaIn
+
+
+def test_to_async_url():
+    assert to_async_url("sqlite:///db.db") == "sqlite+aiosqlite:///db.db"
+    assert (
+        to_async_url("postgresql://user:pw@localhost/lib")
+        == "postgresql+asyncpg://user:pw@localhost/lib"
+    )
+    assert to_async_url("sqlite+aiosqlite:///db.db") == "sqlite+aiosqlite:///db.db"
+
+
+def test_to_async_url_unknown_backend():
+    with pytest.raises(ValueError):
+        to_async_url("mssql://localhost/lib")
+
+
+def test_engine_options():
+    server = engine_options("postgresql+asyncpg://localhost/lib", POOL_OPTIONS)
+    assert server == POOL_OPTIONS
+    assert engine_options("sqlite:///db.db", POOL_OPTIONS)["poolclass"] is QueuePool
+    assert (
+        engine_options("sqlite+aiosqlite:///db.db", POOL_OPTIONS)["poolclass"]
+        is AsyncAdaptedQueuePool
+    )
+    assert engine_options("sqlite://", POOL_OPTIONS) == {}
+    assert engine_options("postgresql://localhost/lib", {}) == {}
+
+
+def test_sqlite_pragmas(tmp_path):
+    db = Database(f"sqlite:///{tmp_path / 'pragmas.db'}")
+
+    async def pragmas() -> tuple:
+        async with db.async_session() as session:
+            journal_mode = await session.scalar(text("PRAGMA journal_mode"))
+            busy_timeout = await session.scalar(text("PRAGMA busy_timeout"))
+        await db.dispose()
+        return journal_mode, busy_timeout
+
+    with db.session() as session:
+        assert session.scalar(text("PRAGMA synchronous")) == 1
+    assert asyncio.run(pragmas()) == ("wal", 5000)
+
+
+def replicated_database(tmp_path, **options) -> tuple[Database, list[str]]:
+    # No replication between the files: each "replica" gets its own author so
+    # a read shows which database served it.
+    replica_urls = [f"sqlite:///{tmp_path / f'replica{i}.db'}" for i in range(2)]
+    db = Database(
+        f"sqlite:///{tmp_path / 'primary.db'}", replica_urls=replica_urls, **options
+    )
+    db.create_database()
+    for i, url in enumerate(replica_urls):
+        replica = Database(url)
+        replica.create_database()
+        with replica.session() as session:
+            session.execute(
+                text("INSERT INTO authors (id, name) VALUES (:id, :name)"),
+                {"id": f"r{i}", "name": f"replica {i}"},
+            )
+            session.commit()
+        replica._engine.dispose()
+    return db, replica_urls
+
+
+def test_reads_round_robin_across_replicas(tmp_path):
+    db, _ = replicated_database(tmp_path)
+    repository = AsyncAuthorRepository(db.async_session, db.async_read_session)
+
+    async def names() -> list:
+        served = [
+            [author.name for author in await repository.get_all()] for _ in range(4)
+        ]
+        await db.dispose()
+        return served
+
+    assert db.replicas == 2
+    assert asyncio.run(names()) == [["replica 0"], ["replica 1"]] * 2
+
+
+def test_read_your_writes(tmp_path):
+    db, _ = replicated_database(tmp_path)
+    repository = AsyncAuthorRepository(db.async_session, db.async_read_session)
+
+    async def request(write: bool) -> list:
+        if write:
+            await repository.add(AuthorSchemaIn(name="primary"))
+        return [author.name for author in await repository.get_all()]
+
+    async def requests() -> list:
+        served = [
+            await asyncio.create_task(request(write)) for write in (False, True, False)
+        ]
+        await db.dispose()
+        return served
+
+    assert asyncio.run(requests()) == [["replica 0"], ["primary"], ["replica 1"]]
+
+
+def test_reads_least_busy_replica(tmp_path):
+    db, _ = replicated_database(tmp_path, replica_selection="least_busy")
+
+    async def names() -> list:
+        async with db.async_read_session() as busy:
+            held = await busy.scalar(text("SELECT name FROM authors"))
+            served = []
+            for _ in range(2):
+                async with db.async_read_session() as session:
+                    served.append(
+                        await session.scalar(text("SELECT name FROM authors"))
+                    )
+        await db.dispose()
+        return [held, *served]
+
+    assert asyncio.run(names()) == ["replica 0", "replica 1", "replica 1"]
+
+
+def test_split_urls():
+    assert split_urls("") == []
+    assert split_urls("sqlite:///a.db, sqlite:///b.db,") == [
+        "sqlite:///a.db",
+        "sqlite:///b.db",
+    ]
+
+
+def test_unknown_replica_selection():
+    with pytest.raises(ValueError):
+        Database("sqlite://", replica_selection="random")
@@ -0,0 +1,101 @@
+import httpx
+import pytest
+import sys
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+from app.repositories import versions
+from app.repositories.versions import TableVersions, etag_matches
+
+BASE_URL = "http://localhost:8000"
+
+
+def test_etag_matches():
+    etag = TableVersions().etag(("authors",), "limit=5")
+    assert etag.startswith('W/"')
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", {etag.removeprefix("W/")}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('W/"other"', etag)
+
+
+def test_versions_change_etag():
+    versions = TableVersions()
+    before = versions.etag(("authors", "books"), "limit=5")
+    assert versions.etag(("authors", "books"), "limit=6") != before
+    versions.bump("rentals")
+    assert versions.etag(("authors", "books"), "limit=5") == before
+    versions.bump("books")
+    assert versions.etag(("authors", "books"), "limit=5") != before
+
+
+def test_etag_expires_with_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(versions.time, "time", lambda: now[0])
+    table_versions = TableVersions(ttl=60)
+    before = table_versions.etag(("books",))
+    now[0] = 1019.0
+    assert table_versions.etag(("books",)) == before
+    now[0] = 1020.0
+    assert table_versions.etag(("books",)) != before
+    uncached = TableVersions(ttl=0)
+    assert uncached.etag(("books",)) != uncached.etag(("books",))
+
+
+@pytest.mark.asyncio
+async def test_conditional_get(query_budget):
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        response = await client.get("/author", params={"limit": 5})
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        with query_budget.limit(0, "GET /author 304"):
+            response = await client.get(
+                "/author", params={"limit": 5}, headers={"If-None-Match": etag}
+            )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+        response = await client.get(
+            "/author", params={"limit": 6}, headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+
+        author = await client.post(
+            "/author", json={"name": f"ETag {uuid4().hex}"}, headers=headers
+        )
+        response = await client.get(
+            "/author", params={"limit": 5}, headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+        library = await client.post(
+            "/library",
+            json={"name": f"ETag {uuid4().hex}", "city": "X"},
+            headers=headers,
+        )
+        response = await client.get("/author", params={"id": author.json()["id"]})
+        etag = response.headers["etag"]
+        await client.post(
+            "/book",
+            json={
+                "name": f"ETag {uuid4().hex}",
+                "author_id": author.json()["id"],
+                "library_id": library.json()["id"],
+                "written_at": "2001-01-01",
+            },
+            headers=headers,
+        )
+        response = await client.get(
+            "/author",
+            params={"id": author.json()["id"]},
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 200
@@ -0,0 +1,76 @@
+import csv
+import httpx
+import io
+import json
+import pytest
+import sys
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+
+BASE_URL = "http://localhost:8000"
+
+
+@pytest.mark.asyncio
+async def test_export_books():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        library = await client.post(
+            "/library", json={"name": f"Export {suffix}", "city": "X"}, headers=headers
+        )
+        library_id = library.json()["id"]
+        lines = "\n".join(
+            json.dumps(
+                {
+                    "name": f"Export {i} {suffix}",
+                    "author": suffix,
+                    "library_id": library_id,
+                    "written_at": "2001-01-01",
+                }
+            )
+            for i in range(3)
+        )
+        await client.post(
+            "/book/bulk",
+            content=lines.encode(),
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+        )
+        response = await client.get(
+            "/book/export", params={"library_id": library_id}, headers=headers
+        )
+        assert response.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(row["name"] for row in rows) == [
+            f"Export {i} {suffix}" for i in range(3)
+        ]
+        assert {row["written_at"] for row in rows} == {"2001-01-01"}
+
+        response = await client.get(
+            "/book/export",
+            params={"library_id": library_id, "format": "csv"},
+            headers=headers,
+        )
+        assert response.headers["content-type"].startswith("text/csv")
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 3 and rows[0]["library_id"] == library_id
+
+
+@pytest.mark.asyncio
+async def test_export_updated_since():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        await client.post("/author", json={"name": uuid4().hex}, headers=headers)
+        since = datetime.utcnow().isoformat()
+        name = uuid4().hex
+        await client.post("/author", json={"name": name}, headers=headers)
+        response = await client.get(
+            "/author/export", params={"updated_since": since}, headers=headers
+        )
+        assert [json.loads(line)["name"] for line in response.text.splitlines()] == [
+            name
+        ]
@@ -0,0 +1,60 @@
+import httpx
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from app.schemas import AuthorSchema, BookSchema
+from app.serialization import scalar_fields, nested_fields, sparse_schema
+from test_serialization import create_catalogue
+
+BASE_URL = "http://localhost:8000"
+
+
+def test_sparse_schema():
+    assert sparse_schema(AuthorSchema, None) is AuthorSchema
+    schema = sparse_schema(AuthorSchema, "books.name, id")
+    assert scalar_fields(schema) == ["id"]
+    [(name, books)] = nested_fields(schema)
+    assert name == "books" and scalar_fields(books) == ["name"]
+    assert sparse_schema(AuthorSchema, "id,books.name") is schema
+    whole = sparse_schema(AuthorSchema, "books,books.name")
+    assert scalar_fields(nested_fields(whole)[0][1]) == scalar_fields(BookSchema)
+    for fields in ("title", "books.title", "name.first"):
+        with pytest.raises(ValueError):
+            sparse_schema(AuthorSchema, fields)
+
+
+@pytest.mark.asyncio
+async def test_fields_restrict_columns_and_joins(query_budget):
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        await create_catalogue(client)
+
+        with query_budget.limit(1, "GET /library names") as log:
+            response = await client.get("/library", params={"fields": "name"})
+        assert "books" not in log[0] and "city" not in log[0]
+        items = response.json()["items"]
+        assert items and all(item.keys() == {"name"} for item in items)
+
+        with query_budget.limit(2, "GET /author ids and book names") as log:
+            response = await client.get(
+                "/author", params={"fields": "id,books.name", "limit": 2}
+            )
+        assert "written_at" not in log[1]
+        page = response.json()
+        assert all(item.keys() == {"id", "books"} for item in page["items"])
+        books = [book for item in page["items"] for book in item["books"]]
+        assert all(book.keys() == {"name"} for book in books)
+        next_page = await client.get(
+            "/author",
+            params={"fields": "id", "limit": 2, "cursor": page["next_cursor"]},
+        )
+        assert next_page.status_code == 200
+
+        author = page["items"][0]["id"]
+        response = await client.get("/author", params={"id": author, "fields": "id"})
+        assert response.json() == {"id": author}
+
+        response = await client.get("/book", params={"fields": "isbn"})
+        assert response.status_code == 400
@@ -0,0 +1,98 @@
+import httpx
+import pytest
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+from sqlalchemy import event
+from app.db import Base, Database
+from app.models import Library, User
+
+BASE_URL = "http://localhost:8000"
+
+
+@contextmanager
+def count_queries():
+    engine = app.container.db()._async_engine.sync_engine
+    stats = {"statements": 0, "rows": 0}
+
+    def on_execute(*args):
+        stats["statements"] += 1
+
+    def on_load(*args):
+        stats["rows"] += 1
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    event.listen(Base, "load", on_load, propagate=True)
+    try:
+        yield stats
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+        event.remove(Base, "load", on_load)
+
+
+async def create_catalogue(client: httpx.AsyncClient) -> tuple:
+    headers = {"Authorization": environ.get("TOKEN")}
+    suffix = uuid4().hex
+    author = await client.post(
+        "/author", json={"name": f"Author {suffix}"}, headers=headers
+    )
+    library = await client.post(
+        "/library", json={"name": f"Library {suffix}", "city": "X"}, headers=headers
+    )
+    books = []
+    for i in range(3):
+        book = await client.post(
+            "/book",
+            json={
+                "name": f"Book {i} {suffix}",
+                "author_id": author.json()["id"],
+                "library_id": library.json()["id"],
+                "written_at": "2001-01-01",
+            },
+            headers=headers,
+        )
+        books.append(book.json())
+    return author.json(), library.json(), books
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "path,params,statements,rows",
+    [
+        ("/book", lambda a, l, b: {"id": b[0]["id"]}, 1, 1),
+        ("/author", lambda a, l, b: {"id": a["id"]}, 2, 4),
+        ("/library", lambda a, l, b: {"id": l["id"]}, 2, 4),
+        # Listings select plain rows, so no ORM instances are loaded.
+        ("/book", lambda a, l, b: {"limit": 2}, 1, 0),
+        ("/author", lambda a, l, b: {"limit": 1}, 2, None),
+        ("/library", lambda a, l, b: {"limit": 1}, 2, None),
+    ],
+)
+async def test_endpoint_loading(path, params, statements, rows):
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        author, library, books = await create_catalogue(client)
+        with count_queries() as stats:
+            response = await client.get(path, params=params(author, library, books))
+        assert response.status_code == 200
+        assert stats["statements"] == statements
+        if rows is not None:
+            assert stats["rows"] == rows
+
+
+def test_repr_without_loaded_relationships(tmp_path):
+    db = Database(f"sqlite:///{tmp_path / 'repr.db'}")
+    db.create_database()
+    with db.session() as session:
+        session.add(Library(name="Central", city="X"))
+        session.add(User(name="ann", email="ann@example.com", password="x"))
+        session.commit()
+    with db.session() as session:
+        library = session.query(Library).one()
+        user = session.query(User).one()
+        assert repr(library) == "Library(name=Central, city=X)"
+        assert repr(user).startswith("User(name=ann, email=ann@example.com")
@@ -0,0 +1,49 @@
+import httpx
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from app.metrics import Histogram
+
+BASE_URL = "http://localhost:8000"
+
+
+def sample(text: str, name: str) -> float:
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{name} not exported")
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        before = (await client.get("/metrics")).text
+        await client.get("/book", params={"limit": 5})
+        await client.get("/book", params={"id": "missing"})
+        response = await client.get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain")
+    text = response.text
+    ok = 'http_requests_total{method="GET",route="/book",status="200"}'
+    assert sample(text, ok) >= 1
+    assert sample(text, 'http_requests_total{method="GET",route="/book",status="404"}')
+    statements = 'db_statements_per_request_count{route="/book"}'
+    assert sample(text, statements) >= 2
+    assert sample(text, "db_statements_total") > sample(before, "db_statements_total")
+    assert sample(text, "db_pool_checkout_seconds_count") > 0
+    assert "http_requests_in_flight 1" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency", "", (0.1, 1), ("route",))
+    for value in (0.05, 0.1, 0.5, 3):
+        histogram.observe(value, "/book")
+    assert list(histogram.samples()) == [
+        ('latency_bucket{route="/book",le="0.1"}', 2),
+        ('latency_bucket{route="/book",le="1"}', 3),
+        ('latency_bucket{route="/book",le="+Inf"}', 4),
+        ('latency_sum{route="/book"}', 3.65),
+        ('latency_count{route="/book"}', 4),
+    ]
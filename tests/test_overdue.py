@@ -0,0 +1,130 @@
+import httpx
+import pytest
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+
+BASE_URL = "http://localhost:8000"
+
+
+@pytest.mark.asyncio
+async def test_overdue_scan():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        author = await client.post(
+            "/author", json={"name": f"Author {suffix}"}, headers=headers
+        )
+        library = await client.post(
+            "/library", json={"name": f"Library {suffix}", "city": "X"}, headers=headers
+        )
+        rentals = []
+        for i, due in enumerate((-3, -1, 5)):
+            book = await client.post(
+                "/book",
+                json={
+                    "name": f"Book {i} {suffix}",
+                    "author_id": author.json()["id"],
+                    "library_id": library.json()["id"],
+                    "written_at": "2001-01-01",
+                },
+                headers=headers,
+            )
+            rental = await client.post(
+                "/rental",
+                json={
+                    "book_id": book.json()["id"],
+                    "rented_at": str(date.today() - timedelta(days=10)),
+                    "returned_at": str(date.today() + timedelta(days=due)),
+                },
+                headers=headers,
+            )
+            rentals.append(rental.json()["id"])
+
+        async def overdue() -> list[str]:
+            response = await client.get(
+                "/rental/overdue", params={"limit": 500}, headers=headers
+            )
+            items = response.json()["items"]
+            return [item["rental_id"] for item in items if item["rental_id"] in rentals]
+
+        scanner = app.container.overdue_scanner()
+        assert await scanner.run_once() >= 2
+        assert await overdue() == rentals[:2]
+        assert await scanner.run_once() == 0
+
+        await client.post("/rental/return", params={"id": rentals[0]}, headers=headers)
+        assert await overdue() == rentals[1:2]
+
+        await scanner.run_once(date.today() + timedelta(days=6))
+        assert await overdue() == rentals[1:]
+
+
+@pytest.mark.asyncio
+async def test_overdue_scan_picks_up_due_date_moved_behind_checkpoint():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        author = await client.post(
+            "/author", json={"name": f"Author {suffix}"}, headers=headers
+        )
+        library = await client.post(
+            "/library", json={"name": f"Library {suffix}", "city": "X"}, headers=headers
+        )
+        rentals = []
+        for i, due in enumerate((-2, 5)):
+            book = await client.post(
+                "/book",
+                json={
+                    "name": f"Book {i} {suffix}",
+                    "author_id": author.json()["id"],
+                    "library_id": library.json()["id"],
+                    "written_at": "2001-01-01",
+                },
+                headers=headers,
+            )
+            rental = await client.post(
+                "/rental",
+                json={
+                    "book_id": book.json()["id"],
+                    "rented_at": str(date.today() - timedelta(days=10)),
+                    "returned_at": str(date.today() + timedelta(days=due)),
+                },
+                headers=headers,
+            )
+            rentals.append(rental.json())
+
+        async def overdue() -> list[str]:
+            response = await client.get(
+                "/rental/overdue", params={"limit": 500}, headers=headers
+            )
+            ids = [rental["id"] for rental in rentals]
+            items = response.json()["items"]
+            return [item["rental_id"] for item in items if item["rental_id"] in ids]
+
+        scanner = app.container.overdue_scanner()
+        await scanner.run_once()
+        assert await overdue() == [rentals[0]["id"]]
+
+        # The checkpoint is now past the first rental; pull the second one's
+        # due date back behind it.
+        moved = rentals[1]
+        response = await client.put(
+            "/rental",
+            params={"id": moved["id"]},
+            json={
+                "book_id": moved["book_id"],
+                "rented_at": moved["rented_at"],
+                "returned_at": str(date.today() - timedelta(days=5)),
+            },
+            headers=headers,
+        )
+        assert response.status_code == 200
+        assert await scanner.run_once() >= 1
+        assert await overdue() == [moved["id"], rentals[0]["id"]]
+        assert await scanner.run_once() == 0
@@ -0,0 +1,21 @@
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from app.repositories.password_managment import PasswordHasher
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [0, 1])
+async def test_password_hasher(workers):
+    hasher = PasswordHasher(max_workers=workers)
+    try:
+        hashed = await hasher.hash("secret")
+        assert await hasher.verify("secret", hashed)
+        assert not await hasher.verify("wrong", hashed)
+        stats = hasher.stats()
+        assert stats["completed"] == 3
+        assert stats["queued"] == stats["running"] == 0
+    finally:
+        hasher.shutdown()
@@ -0,0 +1,73 @@
+import asyncio
+import httpx
+import pytest
+import sys
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+
+BASE_URL = "http://localhost:8000"
+
+
+@pytest.mark.asyncio
+async def test_rental_availability():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        author = await client.post(
+            "/author", json={"name": f"Author {suffix}"}, headers=headers
+        )
+        library = await client.post(
+            "/library", json={"name": f"Library {suffix}", "city": "X"}, headers=headers
+        )
+        books = []
+        for i in range(2):
+            book = await client.post(
+                "/book",
+                json={
+                    "name": f"Book {i} {suffix}",
+                    "author_id": author.json()["id"],
+                    "library_id": library.json()["id"],
+                    "written_at": "2001-01-01",
+                },
+                headers=headers,
+            )
+            books.append(book.json()["id"])
+
+        rental = {"book_id": books[0], "rented_at": "2024-01-01"}
+        responses = await asyncio.gather(
+            *(client.post("/rental", json=rental, headers=headers) for _ in range(5))
+        )
+        assert sorted(response.status_code for response in responses) == [
+            201,
+            400,
+            400,
+            400,
+            400,
+        ]
+        rental_id = next(r for r in responses if r.status_code == 201).json()["id"]
+
+        async def available(value: str) -> list[str]:
+            response = await client.get(
+                "/book",
+                params={"available": value, "library_id": library.json()["id"]},
+            )
+            return [book["id"] for book in response.json()["items"]]
+
+        assert await available("true") == [books[1]]
+        assert await available("false") == [books[0]]
+
+        response = await client.post(
+            "/rental/return", params={"id": rental_id}, headers=headers
+        )
+        assert response.json()["closed_at"] is not None
+        response = await client.post(
+            "/rental/return", params={"id": rental_id}, headers=headers
+        )
+        assert response.status_code == 400
+        assert await available("true") == books
+        response = await client.post("/rental", json=rental, headers=headers)
+        assert response.status_code == 201
@@ -1,11 +1,15 @@
 import httpx
+import json
 import pytest
 import sys
 from pathlib import Path
+from uuid import uuid4
 
 sys.path.append(str(Path(__file__).parent.parent))
 from main import app
 from os import environ
+from sqlalchemy import text
+from app.query_budget import QueryBudgetExceeded
 from app.schemas import (
     AuthorSchemaIn,
 )
@@ -29,3 +33,127 @@ async def test_create_author():
         response = await client.post("/author", json=new_author.dict(), headers=headers)
         assert response.status_code == 201
         assert response.json()["name"] == new_author.name
+
+
+@pytest.mark.asyncio
+async def test_author_pagination():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        for i in range(5):
+            author = AuthorSchemaIn(name=f"Paged Author {i}")
+            await client.post("/author", json=author.dict(), headers=headers)
+        names, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            response = await client.get("/author", params=params)
+            assert response.status_code == 200
+            page = response.json()
+            assert len(page["items"]) <= 2
+            names += [author["name"] for author in page["items"]]
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+        assert names == sorted(names)
+        assert len(names) == len(set(names))
+        assert {f"Paged Author {i}" for i in range(5)} <= set(names)
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        response = await client.get("/book", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_query_budgets(query_budget):
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        ndjson = {**headers, "Content-Type": "application/x-ndjson"}
+        suffix = uuid4().hex
+        name = f"Budget {suffix}"
+
+        async def call(budget: int, method: str, path: str, **kwargs):
+            with query_budget.limit(budget, f"{method} {path}"):
+                response = await client.request(method, path, **kwargs)
+            assert response.status_code < 500, response.text
+            if response.headers["content-type"] == "application/json":
+                return response.json()
+
+        await call(0, "GET", "/")
+        await call(0, "GET", "/stats", headers=headers)
+        author = await call(2, "POST", "/author", json={"name": name}, headers=headers)
+        library_in = {"name": name, "city": "X"}
+        library = await call(2, "POST", "/library", json=library_in, headers=headers)
+        book_in = {
+            "name": name,
+            "author_id": author["id"],
+            "library_id": library["id"],
+            "written_at": "2001-01-01",
+        }
+        book = await call(4, "POST", "/book", json=book_in, headers=headers)
+        bulk_book = json.dumps({**book_in, "name": f"Bulk {suffix}"})
+        await call(6, "POST", "/book/bulk", content=bulk_book, headers=ndjson)
+        bulk_author = json.dumps({"name": f"Bulk {suffix}"})
+        await call(2, "POST", "/author/bulk", content=bulk_author, headers=ndjson)
+        bulk_library = json.dumps({"name": f"Bulk {suffix}", "city": "X"})
+        await call(1, "POST", "/library/bulk", content=bulk_library, headers=ndjson)
+
+        for path, id, budget in (
+            ("/book", book["id"], 1),
+            ("/author", author["id"], 2),
+            ("/library", library["id"], 2),
+        ):
+            await call(budget, "GET", path, params={"id": id})
+            await call(budget, "GET", path, params={"name": name})
+            await call(budget, "GET", path, params={"limit": 10})
+            await call(1, "GET", f"{path}/export", headers=headers)
+        available = {"available": True, "library_id": library["id"]}
+        await call(1, "GET", "/book", params=available)
+        await call(1, "GET", "/search", params={"q": suffix})
+        params = {"params": {"id": book["id"]}, "headers": headers}
+        await call(3, "PUT", "/book", json=book_in, **params)
+        params = {"params": {"id": author["id"]}, "headers": headers}
+        await call(5, "PUT", "/author", json={"name": name}, **params)
+        params = {"params": {"id": library["id"]}, "headers": headers}
+        await call(5, "PUT", "/library", json=library_in, **params)
+
+        user_in = {"name": name, "email": f"{suffix}@example.com", "password": "x"}
+        user = await call(2, "POST", "/user", json=user_in)
+        await call(2, "GET", "/user", params={"id": user["id"]})
+        await call(1, "GET", "/user", params={"limit": 10})
+        credentials = {"email": user_in["email"], "password": "x"}
+        await call(1, "POST", "/token", params=credentials)
+        params = {"params": {"id": user["id"]}, "headers": headers}
+        await call(3, "PUT", "/user", json=user_in, **params)
+
+        rental_in = {"book_id": book["id"], "rented_at": "2024-01-01"}
+        rental = await call(4, "POST", "/rental", json=rental_in, headers=headers)
+        await call(1, "GET", "/rental", params={"limit": 10}, headers=headers)
+        await call(1, "GET", "/rental/overdue", headers=headers)
+        await call(1, "GET", "/rental/export", headers=headers)
+        params = {"params": {"id": rental["id"]}, "headers": headers}
+        await call(1, "GET", "/rental", **params)
+        await call(4, "PUT", "/rental", json=rental_in, **params)
+        await call(6, "POST", "/rental/return", **params)
+        await call(0, "DELETE", "/rental", **params)
+
+        await call(3, "DELETE", "/user", params={"id": user["id"]}, headers=headers)
+        await call(6, "DELETE", "/book", params={"id": book["id"]}, headers=headers)
+        await call(6, "DELETE", "/author", params={"id": author["id"]}, headers=headers)
+        params = {"params": {"id": library["id"]}, "headers": headers}
+        await call(3, "DELETE", "/library", **params)
+        await call(0, "GET", "/metrics")
+
+
+def test_query_budget_decorator(query_budget):
+    db = app.container.db()
+
+    @query_budget.budget(1)
+    def two_statements():
+        with db.session() as session:
+            session.execute(text("SELECT 1"))
+            session.execute(text("SELECT 2"))
+
+    with pytest.raises(QueryBudgetExceeded, match="ran 2 statements, budget is 1"):
+        two_statements()
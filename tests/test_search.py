@@ -0,0 +1,101 @@
+import httpx
+import json
+import pytest
+import sys
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+
+BASE_URL = "http://localhost:8000"
+
+
+@pytest.mark.asyncio
+async def test_search():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        library = await client.post(
+            "/library", json={"name": f"Search {suffix}", "city": "X"}, headers=headers
+        )
+        lines = "\n".join(
+            json.dumps(
+                {
+                    "name": name,
+                    "author": f"Writer {suffix}",
+                    "library_id": library.json()["id"],
+                    "written_at": "2001-01-01",
+                }
+            )
+            for name in (
+                f"Dune {suffix}",
+                f"Dune Messiah {suffix}",
+                f"Children of Dune and the long road home {suffix}",
+            )
+        )
+        await client.post(
+            "/book/bulk",
+            content=lines.encode(),
+            headers={**headers, "Content-Type": "application/x-ndjson"},
+        )
+
+        response = await client.get("/search", params={"q": suffix[:12]})
+        assert response.status_code == 200
+        assert sorted(item["kind"] for item in response.json()["items"]) == [
+            "author",
+            "book",
+            "book",
+            "book",
+        ]
+
+        response = await client.get(
+            "/search", params={"q": f"dun {suffix}", "kind": "book", "limit": 2}
+        )
+        page = response.json()
+        assert [item["name"] for item in page["items"]] == [
+            f"Dune {suffix}",
+            f"Dune Messiah {suffix}",
+        ]
+        response = await client.get(
+            "/search",
+            params={
+                "q": f"dun {suffix}",
+                "kind": "book",
+                "cursor": page["next_cursor"],
+            },
+        )
+        assert [item["name"] for item in response.json()["items"]] == [
+            f"Children of Dune and the long road home {suffix}"
+        ]
+
+        author = await client.get("/search", params={"q": suffix, "kind": "author"})
+        await client.put(
+            "/book",
+            params={"id": page["items"][0]["id"]},
+            json={
+                "name": f"Arrakis {suffix}",
+                "library_id": library.json()["id"],
+                "author_id": author.json()["items"][0]["id"],
+                "written_at": "2001-01-01",
+            },
+            headers=headers,
+        )
+        await client.delete(
+            "/book",
+            params={"id": page["items"][1]["id"]},
+            headers=headers,
+        )
+        response = await client.get("/search", params={"q": suffix, "kind": "book"})
+        assert sorted(item["name"] for item in response.json()["items"]) == [
+            f"Arrakis {suffix}",
+            f"Children of Dune and the long road home {suffix}",
+        ]
+
+
+@pytest.mark.asyncio
+async def test_search_requires_words():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        response = await client.get("/search", params={"q": "%%"})
+        assert response.status_code == 400
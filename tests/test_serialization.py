@@ -0,0 +1,77 @@
+import httpx
+import json
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from fastapi.encoders import jsonable_encoder
+from app.schemas import AuthorSchema, BookSchema, LibrarySchema, Page
+from app.serialization import compile_serializer, page_response
+from os import environ
+from uuid import uuid4
+
+BASE_URL = "http://localhost:8000"
+
+
+async def create_catalogue(client: httpx.AsyncClient) -> None:
+    headers = {"Authorization": environ.get("TOKEN")}
+    suffix = uuid4().hex
+    author = await client.post("/author", json={"name": f"A {suffix}"}, headers=headers)
+    library = await client.post(
+        "/library", json={"name": f"L {suffix}", "city": "X"}, headers=headers
+    )
+    for i in range(2):
+        await client.post(
+            "/book",
+            json={
+                "name": f"B {i} {suffix}",
+                "author_id": author.json()["id"],
+                "library_id": library.json()["id"],
+                "written_at": "2001-01-01",
+            },
+            headers=headers,
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "schema,repository",
+    [
+        (BookSchema, "async_book_repository"),
+        (AuthorSchema, "async_author_repository"),
+        (LibrarySchema, "async_library_repository"),
+    ],
+)
+async def test_rows_match_orm_serialization(schema, repository):
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        await create_catalogue(client)
+    repository = getattr(app.container, repository)()
+    orm_page = await repository.get_page(20)
+    rows_page = await repository.get_rows(20)
+    expected = jsonable_encoder(Page[schema].validate(orm_page))
+    expected["items"] = [
+        (
+            {**item, "books": sorted(item["books"], key=lambda book: book["id"])}
+            if "books" in item
+            else item
+        )
+        for item in expected["items"]
+    ]
+    actual = json.loads(page_response(schema, rows_page).body)
+    for item in actual["items"]:
+        if "books" in item:
+            item["books"].sort(key=lambda book: book["id"])
+    assert actual == expected
+
+
+def test_compiled_serializer_layout():
+    serialize = compile_serializer(AuthorSchema)
+    assert serialize([("1", "Ann", [("2", "Book", "2001-01-01")])]) == [
+        {
+            "id": "1",
+            "name": "Ann",
+            "books": [{"id": "2", "name": "Book", "written_at": "2001-01-01"}],
+        }
+    ]
@@ -0,0 +1,63 @@
+import asyncio
+import httpx
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+from fastapi import FastAPI
+from app.metrics import Metrics
+from app.single_flight import SingleFlight, SingleFlightMiddleware, flight_key
+
+BASE_URL = "http://localhost:8000"
+
+
+def scope(query: bytes, headers: list[tuple[bytes, bytes]] = ()) -> dict:
+    return {"path": "/library", "query_string": query, "headers": list(headers)}
+
+
+def test_flight_key():
+    assert flight_key(scope(b"id=1&limit=5")) == flight_key(scope(b"limit=5&id=1"))
+    assert flight_key(scope(b"id=1")) != flight_key(scope(b"id=2"))
+    token = [(b"authorization", b"Bearer a")]
+    assert flight_key(scope(b"id=1", token)) != flight_key(scope(b"id=1"))
+
+
+@pytest.mark.asyncio
+async def test_identical_gets_share_one_response():
+    calls = []
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow(id: str):
+        calls.append(id)
+        await release.wait()
+        return {"id": id, "call": len(calls)}
+
+    single_flight = SingleFlight()
+    metrics = Metrics()
+    app.add_middleware(
+        SingleFlightMiddleware,
+        single_flight=single_flight,
+        metrics=metrics,
+        paths=("/slow",),
+    )
+
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        requests = [
+            asyncio.create_task(client.get("/slow", params={"id": "a"}))
+            for _ in range(10)
+        ]
+        other = asyncio.create_task(client.get("/slow", params={"id": "b"}))
+        while len(calls) < 2:
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.01)
+        release.set()
+        responses = await asyncio.gather(*requests)
+        assert (await other).json()["id"] == "b"
+
+    assert sorted(calls) == ["a", "b"]
+    assert {response.content for response in responses} == {responses[0].content}
+    assert single_flight.stats() == {"in_flight": 0, "leaders": 2, "coalesced": 9}
+    assert 'http_requests_coalesced_total{route="/slow"} 9' in metrics.render()
@@ -0,0 +1,162 @@
+import asyncio
+import httpx
+import pytest
+import sys
+from collections import Counter
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.append(str(Path(__file__).parent.parent))
+from main import app
+from os import environ
+from dependency_injector import providers
+from sqlalchemy import event
+from app.db import Database
+from app.repositories.author import AsyncAuthorRepository
+from app.repositories.password_managment import PasswordHasher
+from app.repositories.versions import TableVersions
+from app.schemas import AuthorSchemaIn
+
+BASE_URL = "http://localhost:8000"
+
+
+def unit_of_work_database(tmp_path) -> tuple[Database, Counter]:
+    db = Database(f"sqlite:///{tmp_path / 'uow.db'}")
+    db.create_database()
+    counts = Counter()
+    engine = db.engines[1]
+    event.listen(engine, "checkout", lambda *_: counts.update(["checkouts"]))
+    event.listen(engine, "commit", lambda *_: counts.update(["commits"]))
+    return db, counts
+
+
+def test_unit_of_work_shares_one_session(tmp_path):
+    db, counts = unit_of_work_database(tmp_path)
+    versions = TableVersions()
+    authors = AsyncAuthorRepository(db.async_session, versions=versions)
+
+    async def run() -> list:
+        async with db.unit_of_work():
+            author = await authors.add(AuthorSchemaIn(name="Ann"))
+            await authors.update(author.id, AuthorSchemaIn(name="Anne"))
+            found = await authors.get_by_id(author.id)
+            assert versions.get("authors") == 2
+        names = [author.name for author in await authors.get_all()]
+        await db.dispose()
+        return [found.name, names]
+
+    assert asyncio.run(run()) == ["Anne", ["Anne"]]
+    # Bumped once per write and again when the unit of work committed.
+    assert versions.get("authors") == 4
+    assert counts == {"checkouts": 2, "commits": 1}
+
+
+def test_unit_of_work_rolls_back_on_error(tmp_path):
+    db, counts = unit_of_work_database(tmp_path)
+    authors = AsyncAuthorRepository(db.async_session)
+
+    async def run() -> list:
+        with pytest.raises(RuntimeError):
+            async with db.unit_of_work():
+                await authors.add(AuthorSchemaIn(name="Ann"))
+                raise RuntimeError("boom")
+        names = await authors.get_all()
+        await db.dispose()
+        return names
+
+    assert asyncio.run(run()) == []
+    assert counts["commits"] == 0
+
+
+async def create_book(client: httpx.AsyncClient, headers: dict, name: str) -> dict:
+    author = await client.post("/author", json={"name": name}, headers=headers)
+    library = await client.post(
+        "/library", json={"name": name, "city": "X"}, headers=headers
+    )
+    book_in = {
+        "name": name,
+        "author_id": author.json()["id"],
+        "library_id": library.json()["id"],
+        "written_at": "2001-01-01",
+    }
+    book = await client.post("/book", json=book_in, headers=headers)
+    return {**book_in, "id": book.json()["id"]}
+
+
+@pytest.mark.asyncio
+async def test_failed_write_leaves_cached_book_readable():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        book = await create_book(client, headers, f"Cached {suffix}")
+        taken = await create_book(client, headers, f"Taken {suffix}")
+        duplicate = {**book, "name": taken["name"]}
+        del duplicate["id"]
+        response = await client.put(
+            "/book", params={"id": book["id"]}, json=duplicate, headers=headers
+        )
+        assert response.status_code == 400
+        response = await client.get("/book", params={"id": book["id"]})
+        assert response.status_code == 200
+        assert response.json()["name"] == book["name"]
+
+
+@pytest.mark.asyncio
+async def test_moving_a_book_invalidates_its_previous_author():
+    async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+        headers = {"Authorization": environ.get("TOKEN")}
+        suffix = uuid4().hex
+        book = await create_book(client, headers, f"Moved {suffix}")
+        other = await create_book(client, headers, f"Target {suffix}")
+        previous = await client.get("/author", params={"id": book["author_id"]})
+        assert [item["id"] for item in previous.json()["books"]] == [book["id"]]
+        moved = {**book, "author_id": other["author_id"]}
+        del moved["id"]
+        response = await client.put(
+            "/book", params={"id": book["id"]}, json=moved, headers=headers
+        )
+        assert response.status_code == 200
+        previous = await client.get("/author", params={"id": book["author_id"]})
+        assert previous.json()["books"] == []
+
+
+class PoolProbe(PasswordHasher):
+    def __init__(self, engine) -> None:
+        super().__init__(max_workers=0)
+        self.engine = engine
+        self.checked_out: list[int] = []
+
+    async def hash(self, password: str) -> str:
+        self.checked_out.append(self.engine.pool.checkedout())
+        return await super().hash(password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        self.checked_out.append(self.engine.pool.checkedout())
+        return await super().verify(plain_password, hashed_password)
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_holds_no_connection():
+    probe = PoolProbe(app.container.db().engines[1])
+    app.container.password_hasher.override(providers.Object(probe))
+    try:
+        async with httpx.AsyncClient(app=app, base_url=BASE_URL) as client:
+            credentials = {"email": f"{uuid4().hex}@example.com", "password": "pw"}
+            response = await client.post(
+                "/user", json={"name": uuid4().hex, **credentials}
+            )
+            assert response.status_code == 201
+            user = response.json()
+            response = await client.post("/token", params=credentials)
+            assert response.status_code == 200
+            token = response.json()["access_token"]
+            response = await client.put(
+                "/user",
+                params={"id": user["id"]},
+                json={"name": user["name"], **credentials, "password": "new"},
+                headers={"Authorization": f"Bearer {token}"},
+            )
+            assert response.status_code == 200
+    finally:
+        app.container.password_hasher.reset_override()
+    assert probe.checked_out == [0, 0, 0]